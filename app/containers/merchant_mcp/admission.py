@@ -0,0 +1,197 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set, Tuple
+
+from metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, ADMISSION_QUEUE_WAIT, ADMISSION_REJECTIONS
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+"""
+Admission control for the MCP server
+
+Every tool and every upstream (the data API, or the query-data pools in direct mode) gets
+a limit on concurrent calls and a short queue in front of it. A call that finds the queue
+full, or waits in it longer than ADMISSION_QUEUE_TIMEOUT_SECONDS, is shed immediately
+instead of piling up connections: tool calls are answered with HTTP 503 and Retry-After
+before the MCP server parses them, upstream calls fail the tool with a 503 error.
+
+TOOL_MAX_IN_FLIGHT applies to each tool, TOOL_CONCURRENCY_LIMITS overrides it per tool
+("search_merchants=4,get_merchant_details=32"). A limit of 0 disables admission control.
+"""
+
+TOOL_MAX_IN_FLIGHT = int(os.getenv("TOOL_MAX_IN_FLIGHT", "16"))
+UPSTREAM_MAX_IN_FLIGHT = int(os.getenv("UPSTREAM_MAX_IN_FLIGHT", "10"))
+QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "1.0"))
+RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+
+def parse_limits(value: str) -> Dict[str, int]:
+    """Parse "name=limit,name=limit" into a dict"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, limit = item.partition("=")
+        limits[name.strip()] = int(limit)
+    return limits
+
+TOOL_LIMITS = parse_limits(os.getenv("TOOL_CONCURRENCY_LIMITS", ""))
+
+class Overloaded(Exception):
+    """A call shed by a saturated limiter"""
+    def __init__(self, scope: str, name: str, retry_after: int = RETRY_AFTER_SECONDS):
+        self.scope = scope
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{scope} {name} is at capacity, retry after {retry_after}s")
+
+class Limiter:
+    """
+    At most `max_in_flight` concurrent holders, up to `max_queue` callers waiting for at
+    most `queue_timeout` seconds, everyone else rejected with Overloaded
+    """
+    def __init__(self, scope: str, name: str, max_in_flight: int, max_queue: int = QUEUE_SIZE, queue_timeout: float = QUEUE_TIMEOUT):
+        self.scope = scope
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+
+    def _reject(self) -> Overloaded:
+        ADMISSION_REJECTIONS.labels(self.scope, self.name).inc()
+        return Overloaded(self.scope, self.name)
+
+    async def acquire(self) -> None:
+        if self._semaphore is None:
+            return
+        if self._semaphore.locked():
+            if self.queued >= self.max_queue:
+                raise self._reject()
+            self.queued += 1
+            ADMISSION_QUEUED.labels(self.scope, self.name).inc()
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject()
+            finally:
+                self.queued -= 1
+                ADMISSION_QUEUED.labels(self.scope, self.name).dec()
+                ADMISSION_QUEUE_WAIT.labels(self.scope).observe(time.perf_counter() - started)
+        else:
+            await self._semaphore.acquire()
+        ADMISSION_IN_FLIGHT.labels(self.scope, self.name).inc()
+
+    def release(self) -> None:
+        if self._semaphore is None:
+            return
+        ADMISSION_IN_FLIGHT.labels(self.scope, self.name).dec()
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+_limiters: Dict[Tuple[str, str], Limiter] = {}
+
+def get_limiter(scope: str, name: str, max_in_flight: int) -> Limiter:
+    limiter = _limiters.get((scope, name))
+    if limiter is None:
+        limiter = _limiters[(scope, name)] = Limiter(scope, name, max_in_flight)
+    return limiter
+
+def tool_limiter(tool: str) -> Limiter:
+    return get_limiter("tool", tool, TOOL_LIMITS.get(tool, TOOL_MAX_IN_FLIGHT))
+
+def upstream_limiter(upstream: str) -> Limiter:
+    return get_limiter("upstream", upstream, UPSTREAM_MAX_IN_FLIGHT)
+
+def called_tool(body: bytes) -> Optional[str]:
+    """Name of the tool a JSON-RPC tools/call request body calls, None for other requests"""
+    try:
+        message = json_loads(body)
+    except ValueError:
+        return None
+    if not isinstance(message, dict) or message.get("method") != "tools/call":
+        return None
+    name = (message.get("params") or {}).get("name")
+    return name if isinstance(name, str) else None
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware admitting MCP tool calls through their tool's limiter.
+
+    Reads the (small) JSON-RPC request body to find the tool, replays it to the app once
+    admitted and holds the slot until the response is complete; rejected calls get a 503
+    with Retry-After without reaching the MCP server. Only tools registered on `server` get
+    a limiter, calls of unknown tools are left for the server to reject.
+    """
+    def __init__(self, app, server):
+        self.app = app
+        self.server = server
+        self._tools: Optional[Set[str]] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        messages = []
+        body = b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        if self._tools is None:
+            self._tools = set(await self.server.get_tools())
+        tool = called_tool(body)
+        if tool not in self._tools:
+            await self.app(scope, replay, send)
+            return
+
+        limiter = tool_limiter(tool)
+        try:
+            await limiter.acquire()
+        except Overloaded as e:
+            await send_overloaded(send, e)
+            return
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            limiter.release()
+
+async def send_overloaded(send, error: Overloaded) -> None:
+    body = json.dumps({"error": str(error)}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(error.retry_after).encode())
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -5,23 +5,30 @@ import asyncio
 import os
 import logging
 import json
+import time
 import uuid
 from typing import Dict, Any, Optional, TypedDict, List, Union
 from dotenv import load_dotenv
 import re
 import httpx
+import uvicorn
 
 from fastmcp import FastMCP, Context
 from starlette.middleware import Middleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import PlainTextResponse
+from starlette.responses import PlainTextResponse, Response
 from starlette.requests import Request
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from typing import Annotated, Literal
 from pydantic import Field
-from tools_description import MerchantToolDescriptions
+from tools_description import ToolDescriptions
+import query_data_backend
+import admission
+import resilience
+from query_data_backend import QUERY_DATA_BACKEND
+from metrics import MetricsMiddleware, ToolMetricsMiddleware, metrics_payload, observe_upstream, observe_upstream_payload, CONTENT_TYPE_LATEST
 
 """
 Merchant MCP Handler
@@ -38,6 +45,12 @@ async def dual_log(message, logger, ctx):
     logger.info(message)
     await ctx.info(message)
 
+# Parse API Gateway responses with orjson when it is installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 # Load environment variables from .env file
 if not os.getenv("API_GATEWAY_BASE_URL"): 
     logger.info("API_GATEWAY_BASE_URL environment variable set by ECS")
@@ -47,9 +60,13 @@ if not os.getenv("API_GATEWAY_BASE_URL"):
 API_GATEWAY_BASE_URL = os.getenv("API_GATEWAY_BASE_URL")
 API_KEY = os.getenv("API_KEY")  # Optional for authentication
 
-if not API_GATEWAY_BASE_URL:
+if not API_GATEWAY_BASE_URL and QUERY_DATA_BACKEND == "api":
     raise ValueError("API_GATEWAY_BASE_URL environment variable not set")
 
+# Open the in-process query-data modules at startup rather than on the first tool call
+if QUERY_DATA_BACKEND == "direct":
+    query_data_backend.load_dispatch()
+
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         request_id = str(uuid.uuid4())
@@ -69,8 +86,14 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         })
         return response
 
+def format_fields(fields: Optional[List[str]]) -> Optional[str]:
+    """Serialize an optional column projection as the comma separated `fields` query parameter"""
+    return ",".join(fields) if fields else None
+
 # Initialize FastMCP server
 mcp_server = FastMCP("FraudAIAgentTool", stateless_http=True)
+mcp_server.add_middleware(ToolMetricsMiddleware())
+mcp_server.add_middleware(resilience.DeadlineMiddleware())
 
 @mcp_server.custom_route("/healthz", methods=["GET"])
 async def healthz(request: Request):
@@ -80,6 +103,11 @@ async def healthz(request: Request):
 async def health_check(request: Request):
     return PlainTextResponse("OK", status_code=200)
 
+@mcp_server.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request):
+    """Prometheus metrics endpoint for the MCP server"""
+    return Response(metrics_payload(), media_type=CONTENT_TYPE_LATEST)
+
 @mcp_server.resource("file://README.md", mime_type="text/markdown")
 async def get_merchant_resource(ctx: Context = None) -> str:
     """
@@ -100,7 +128,7 @@ async def get_merchant_resource(ctx: Context = None) -> str:
         await dual_log(f"get_merchant_resource - Unexpected error: {str(e)}", logger, ctx)
         return f"get_merchant_resource - Unexpected error: {str(e)}"
 
-class MerchantStatsResponse(TypedDict):
+class MerchantStatsResponse(TypedDict, total=False):
     id: int
     merchant_number: str
     bucket_date: str
@@ -139,13 +167,14 @@ class MerchantStatsResponse(TypedDict):
     created_at: str
     updated_at: str
  
-@mcp_server.tool(name='get_merchant_stats', description=MerchantToolDescriptions.GET_MERCHANT_STATS)
+@mcp_server.tool(name='get_merchant_stats', description=ToolDescriptions.GET_MERCHANT_STATS)
 async def get_merchant_stats(
     merchant_number: Annotated[str, Field(description="Merchant number to get statistics for", pattern=r'^MRCH\d+$')],
     stat_date: Annotated[
         Literal["Day", "Month", "Year"],
         Field(description="Time period for stats")
     ] = "Day",
+    fields: Annotated[Optional[List[str]], Field(description="Columns to return (e.g. [\"credit_disputes_count\"]), omit to return all columns")] = None,
     ctx: Context = None
 ) -> MerchantStatsResponse:
     """
@@ -154,13 +183,14 @@ async def get_merchant_stats(
     Args:
         merchant_number: Merchant number to get statistics for
         stat_date: Date to get statistics for
+        fields: Optional list of columns to return
         
     Returns:
         Merchant statistics or error information
     """
     await dual_log(f"MCP Tool (get_merchant_stats) with merchant_number: {merchant_number}", logger, ctx)
 
-    payload = {"merchant_number": merchant_number, "stat_date": stat_date}
+    payload = {"merchant_number": merchant_number, "stat_date": stat_date, "fields": format_fields(fields)}
     try:
         result = await call_api_gateway("/api/merchant/stats", payload, ctx)
 
@@ -193,7 +223,7 @@ class FilteredStatsResponse(TypedDict):
     credit_reversals_volume: str
     credit_reversals_percent: str
 
-@mcp_server.tool(name='filter_merchant_stats', description=MerchantToolDescriptions.FILTER_MERCHANT_STATS)
+@mcp_server.tool(name='filter_merchant_stats', description=ToolDescriptions.FILTER_MERCHANT_STATS)
 async def filter_merchant_stats(
     merchant_number: Annotated[str, Field(description="The merchant number to filter stats for", pattern=r'^MRCH\d+$')],
     stat_date: Annotated[
@@ -242,12 +272,13 @@ class SearchMerchantsResponse(TypedDict):
     merchants: List[Dict[str, str]]
     pagination: Dict[str, int]
     
-@mcp_server.tool(name='search_merchants', description=MerchantToolDescriptions.SEARCH_MERCHANTS)
+@mcp_server.tool(name='search_merchants', description=ToolDescriptions.SEARCH_MERCHANTS)
 async def search_merchants(
     business_name: Annotated[Optional[str], Field(description="Business name to search for", min_length=1, max_length=100)] = None,
     category_code: Annotated[Optional[str], Field(description="Merchant category code", pattern=r'^\d{4}$')] = None,
     page: Annotated[int, Field(description="Page number for pagination", ge=1)] = 1,
     page_size: Annotated[int, Field(description="Number of items per page", ge=1, le=100)] = 10,
+    fields: Annotated[Optional[List[str]], Field(description="Columns to return for each merchant (e.g. [\"business_phone\"]), omit to return all columns")] = None,
     ctx: Context = None
 ) -> SearchMerchantsResponse:
     """
@@ -259,7 +290,8 @@ async def search_merchants(
         "business_name": business_name,
         "category_code": category_code,
         "page": page,
-        "page_size": page_size
+        "page_size": page_size,
+        "fields": format_fields(fields)
     }
     try:
         result = await call_api_gateway("/api/merchant/search", payload, ctx)
@@ -274,7 +306,7 @@ async def search_merchants(
         await dual_log(f"MCP Tool Error for search_merchants: {str(e)}", logger, ctx)
         return {"error": e.error_message, "status_code": e.status_code}
 
-class MerchantDetailsResponse(TypedDict):
+class MerchantDetailsResponse(TypedDict, total=False):
     merchant_number: str
     merchant_name: str
     address_line1: str
@@ -326,23 +358,25 @@ class MerchantDetailsResponse(TypedDict):
     created_at: str
     updated_at: str
 
-@mcp_server.tool(name='get_merchant_details', description=MerchantToolDescriptions.GET_MERCHANT_DETAILS)
+@mcp_server.tool(name='get_merchant_details', description=ToolDescriptions.GET_MERCHANT_DETAILS)
 async def get_merchant_details(
     merchant_number: Annotated[str, Field(description="Unique identifier for the merchant", pattern=r'^MRCH\d+$')],
-    ctx: Context
+    fields: Annotated[Optional[List[str]], Field(description="Columns to return (e.g. [\"business_phone\"]), omit to return all columns")] = None,
+    ctx: Context = None
 ) -> MerchantDetailsResponse:
     """
     Retrieves merchant information by merchant number
     
     Args:
         merchant_number: Unique identifier for the merchant
+        fields: Optional list of columns to return
         
     Returns:
         Merchant details or error information
     """
     await dual_log(f"MCP Tool (get_merchant_details) with merchant_number: {merchant_number}", logger, ctx)
 
-    payload = {"merchant_number": merchant_number}
+    payload = {"merchant_number": merchant_number, "fields": format_fields(fields)}
     try:
         result = await call_api_gateway("/api/merchant/details", payload, ctx)
 
@@ -361,7 +395,7 @@ async def get_merchant_details(
 class FilteredDataResponse(TypedDict):
     field_value: Any  # This will contain the value of the requested field
 
-@mcp_server.tool(name='filter_data', description=MerchantToolDescriptions.FILTER_DATA)
+@mcp_server.tool(name='filter_data', description=ToolDescriptions.FILTER_DATA)
 async def filter_data(
     merchant_number: Annotated[str, Field(description="The merchant number to filter data for", pattern=r'^MRCH\d+$')],
     field: Annotated[
@@ -449,7 +483,7 @@ def normalize_stat_date(period: str) -> str:
         
     return "Day"  # default
 
-@mcp_server.tool(name='get_recent_chargebacks', description=MerchantToolDescriptions.GET_RECENT_CHARGEBACKS)
+@mcp_server.tool(name='get_recent_chargebacks', description=ToolDescriptions.GET_RECENT_CHARGEBACKS)
 async def get_recent_chargebacks(
     merchant_number: Annotated[str, Field(description="Merchant number to get chargebacks for", pattern=r'^MRCH\d+$')],
     stat_date: Annotated[str, Field(description="Time period for stats (Day, Month, Year)")] = "Day",
@@ -501,7 +535,7 @@ class RefundSummaryResponse(TypedDict):
     summary: Dict[str, Union[int, str]]
     details: Dict[str, Dict[str, Union[int, str]]]
     
-@mcp_server.tool(name='get_refund_summary', description=MerchantToolDescriptions.GET_REFUND_SUMMARY)
+@mcp_server.tool(name='get_refund_summary', description=ToolDescriptions.GET_REFUND_SUMMARY)
 async def get_refund_summary(
     merchant_number: Annotated[str, Field(description="Merchant number to get refund summary for", pattern=r'^MRCH\d+$')],
     stat_date: Annotated[str, Field(description="Time period for stats (Day, Month, Year)")] = "Day",
@@ -576,7 +610,7 @@ class DeclineAnalysisResponse(TypedDict):
     items: List[DeclineReason]
     summary: Dict[str, int]  # {"total_declines": int, "unique_reasons": int}
 
-@mcp_server.tool(name='get_decline_analysis', description=MerchantToolDescriptions.GET_DECLINE_ANALYSIS)
+@mcp_server.tool(name='get_decline_analysis', description=ToolDescriptions.GET_DECLINE_ANALYSIS)
 async def get_decline_analysis(
     merchant_number: Annotated[str, Field(description="Merchant identification number", pattern=r'^MRCH\d+$')],
     date_from: Annotated[str, Field(description="Start date in YYYY-MM-DD format")],
@@ -602,7 +636,9 @@ async def get_decline_analysis(
             "transaction_type": "authorization",
             "date_from": date_from,
             "date_to": date_to,
-            "approval_status": "Declined"
+            "approval_status": "Declined",
+            # Only the decline reason is aggregated below
+            "fields": "decline_reason"
         }
 
         endpoint = "/api/transaction/authorization"
@@ -647,8 +683,79 @@ async def get_decline_analysis(
     except APIGatewayError as e:
         return {"error": e.error_message, "status_code": e.status_code, "items": []}
 
+class MerchantRiskSummaryResponse(TypedDict, total=False):
+    merchant_number: str
+    business_name: str
+    merchant_category_code: str
+    account_status: str
+    terminated_indicator: str
+    authorizations_count: int
+    authorizations_volume: str
+    declines_count: int
+    declines_percent: Union[str, None]
+    decline_reasons: Dict[str, int]
+    last_authorization_at: Union[str, None]
+    settlements_count: int
+    settlements_volume: str
+    reversals_count: int
+    reversals_volume: str
+    last_settlement_at: Union[str, None]
+    period_stats: Dict[str, Dict[str, Any]]
+    refreshed_at: str
+
+@mcp_server.tool(name='get_merchant_risk_summary', description=ToolDescriptions.GET_MERCHANT_RISK_SUMMARY)
+async def get_merchant_risk_summary(
+    merchant_number: Annotated[str, Field(description="Merchant identification number", pattern=r'^MRCH\d+$')],
+    fields: Annotated[Optional[List[str]], Field(description="Columns to return (e.g. [\"declines_percent\", \"decline_reasons\"]), omit to return all columns")] = None,
+    ctx: Context = None
+) -> MerchantRiskSummaryResponse:
+    """
+    Get the precomputed fraud and risk picture of a merchant in a single lookup
+    
+    Args:
+        merchant_number: Merchant number
+        fields: Optional list of columns to return
+        
+    Returns:
+        Merchant risk summary or error information
+    """
+    await dual_log(f"MCP Tool (get_merchant_risk_summary) for {merchant_number}", logger, ctx)
+
+    payload = {"merchant_number": merchant_number, "fields": format_fields(fields)}
+    try:
+        result = await call_api_gateway("/api/merchant/risk-summary", payload, ctx)
+
+        if not result.get("item"):
+            raise APIGatewayError(404, f"Risk summary not found for merchant {merchant_number}")
+
+        await dual_log(f"MCP Server: get_merchant_risk_summary result: {result}", logger, ctx)
+
+        return result.get("item")
+    except APIGatewayError as e:
+        return {"error": e.error_message, "status_code": e.status_code}
+    except Exception as e:
+        await dual_log(f"MCP Tool Error for get_merchant_risk_summary: {str(e)}", logger, ctx)
+        return {"error": f"Unexpected tool error: {str(e)}"}
+
 # Call to API Gateway
-async def call_api_gateway(api_path: str, payload: Dict[str, Any], ctx: Context) -> Dict[str, Any]:
+async def call_query_data_direct(api_path: str, payload: Dict[str, Any], ctx: Context) -> Dict[str, Any]:
+    """
+    call_api_gateway backend running the query-data route in-process (QUERY_DATA_BACKEND=direct)
+
+    Returns the same JSON body and raises the same APIGatewayError as the API Gateway backend
+    """
+    started = time.perf_counter()
+    status_code, body = await query_data_backend.execute(api_path, payload)
+    observe_upstream(api_path, status_code, started)
+
+    if status_code >= 400:
+        error_details = json_loads(body).get('error', 'Unknown error')
+        await dual_log(f"MCP Server: query-data call to {api_path} failed with status {status_code}: {error_details}", logger, ctx)
+        raise APIGatewayError(status_code, error_details)
+
+    return json_loads(body)
+
+async def call_query_data_api(api_path: str, payload: Dict[str, Any], ctx: Context) -> Dict[str, Any]:
     """
     Helper function to make a GET request to deployed API Gateway
     
@@ -663,18 +770,24 @@ async def call_api_gateway(api_path: str, payload: Dict[str, Any], ctx: Context)
 
     await dual_log(f"MCP Server: API Gateway URL: {url}", logger, ctx)
 
-    headers = {"Content-Type": "application/json"}
+    # query-data gzips large bodies on request, httpx decodes them transparently
+    headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip"}
     if API_KEY:
         headers["x-api-key"] = API_KEY
 
     async with httpx.AsyncClient() as client:
         try:
-            response = await client.get(url, params=payload, headers=headers, timeout=30.0)
+            # Retried, hedged and circuit broken per endpoint within the tool call deadline
+            response = await resilience.send_with_retries(
+                api_path,
+                lambda timeout: client.get(url, params=payload, headers=headers, timeout=timeout)
+            )
+            observe_upstream_payload(api_path, response)
 
             await dual_log(f"MCP Server: API Gateway response: {response}", logger, ctx)
             response.raise_for_status()
             
-            response_json = response.json()
+            response_json = json_loads(response.content)
             await dual_log(f"MCP Server: API Gateway response json: {response_json}", logger, ctx)
 
             return response_json
@@ -700,9 +813,24 @@ async def call_api_gateway(api_path: str, payload: Dict[str, Any], ctx: Context)
             await dual_log(f"MCP Server: API Gateway call to {url} failed with status {e.response.status_code}: {error_details}", logger, ctx)
 
             raise APIGatewayError(e.response.status_code, error_details)
-        except httpx.RequestError as e:
-            await dual_log(f"MCP Server: Network error calling API Gateway {url}: {str(e)}", logger, ctx)
-            raise APIGatewayError(503, f"Network error calling API Gateway: {str(e)}")
+        except resilience.UpstreamError as e:
+            await dual_log(f"MCP Server: API Gateway call to {url} failed: {e.error_message}", logger, ctx)
+            raise APIGatewayError(e.status_code, e.error_message)
+
+async def call_api_gateway(api_path: str, payload: Dict[str, Any], ctx: Context) -> Dict[str, Any]:
+    """
+    Query the data API through the configured backend, within the upstream's admission limit
+
+    Raises APIGatewayError(503) right away when the upstream is saturated
+    """
+    try:
+        async with admission.upstream_limiter(QUERY_DATA_BACKEND).slot():
+            if QUERY_DATA_BACKEND == "direct":
+                return await call_query_data_direct(api_path, payload, ctx)
+            return await call_query_data_api(api_path, payload, ctx)
+    except admission.Overloaded as e:
+        await dual_log(f"MCP Server: {api_path} not called: {str(e)}", logger, ctx)
+        raise APIGatewayError(503, str(e))
 
 class APIGatewayError(Exception):
     """
@@ -721,17 +849,18 @@ if __name__ == "__main__":
     logger.info("Starting Merchant FastMCP server...")
 
     custom_middleware = [
+        Middleware(MetricsMiddleware),
+        Middleware(admission.AdmissionMiddleware, server=mcp_server),
         Middleware(CORSMiddleware, allow_origins=["*"]),
         Middleware(LoggingMiddleware)
     ]
     app = mcp_server.http_app(middleware=custom_middleware)
     app.router.redirect_slashes = False
 
-    mcp_server._http_app = ProxyHeadersMiddleware(app, trusted_hosts="*")
-    mcp_server.run(
-        transport="streamable-http", 
+    # mcp_server.run() would build another app without the middleware above, serve this one
+    uvicorn.run(
+        ProxyHeadersMiddleware(app, trusted_hosts="*"),
         host="0.0.0.0",     # nosec B104 # Otherwise will use "127.0.0.1"
-        port=8080, 
-        path="/mcp",
+        port=int(os.getenv("PORT", "8080")),
         log_level="debug"
     )
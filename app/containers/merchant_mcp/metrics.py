@@ -0,0 +1,161 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import asyncio
+import os
+import time
+from typing import Union
+
+from fastmcp.server.middleware import Middleware as MCPMiddleware, MiddlewareContext
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+"""
+MCP Server Metrics
+
+Prometheus collectors for the MCP server runtime, exposed on the /metrics route.
+Collectors are updated in-process with constant-time operations so the tool hot path
+only pays for a couple of counter increments and a histogram observation
+"""
+
+LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "1.0"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+TOOL_CALLS = Counter(
+    "mcp_tool_calls_total",
+    "MCP tool calls by tool and outcome",
+    ["tool", "outcome"]
+)
+TOOL_LATENCY = Histogram(
+    "mcp_tool_latency_seconds",
+    "MCP tool call latency",
+    ["tool"],
+    buckets=LATENCY_BUCKETS
+)
+UPSTREAM_REQUESTS = Counter(
+    "mcp_upstream_requests_total",
+    "call_api_gateway requests by endpoint and status code",
+    ["endpoint", "status_code"]
+)
+UPSTREAM_LATENCY = Histogram(
+    "mcp_upstream_latency_seconds",
+    "call_api_gateway request latency",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS
+)
+UPSTREAM_RESPONSE_BYTES = Counter(
+    "mcp_upstream_response_bytes_total",
+    "call_api_gateway response bytes received on the wire",
+    ["endpoint", "content_encoding"]
+)
+UPSTREAM_RETRIES = Counter(
+    "mcp_upstream_retries_total",
+    "call_api_gateway attempts retried after a network error, 429 or 5xx",
+    ["endpoint"]
+)
+UPSTREAM_HEDGES = Counter(
+    "mcp_upstream_hedged_requests_total",
+    "call_api_gateway attempts that started a hedged second request",
+    ["endpoint"]
+)
+CIRCUIT_REJECTIONS = Counter(
+    "mcp_upstream_circuit_rejections_total",
+    "call_api_gateway calls failed fast by an open circuit breaker",
+    ["endpoint"]
+)
+CIRCUIT_OPEN = Gauge(
+    "mcp_upstream_circuit_open",
+    "1 while the circuit breaker of the endpoint is open",
+    ["endpoint"]
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "mcp_admission_in_flight",
+    "Calls holding an admission slot, by scope (tool or upstream) and name",
+    ["scope", "name"]
+)
+ADMISSION_QUEUED = Gauge(
+    "mcp_admission_queued",
+    "Calls waiting for an admission slot, by scope and name",
+    ["scope", "name"]
+)
+ADMISSION_REJECTIONS = Counter(
+    "mcp_admission_rejections_total",
+    "Calls shed by admission control, by scope and name",
+    ["scope", "name"]
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "mcp_admission_queue_wait_seconds",
+    "Time queued calls waited for an admission slot",
+    ["scope"],
+    buckets=LATENCY_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    "mcp_http_requests_in_flight",
+    "HTTP requests currently being processed"
+)
+LOOP_LAG = Gauge(
+    "mcp_event_loop_lag_seconds",
+    "Delay between the scheduled and actual wake-up of the event loop probe"
+)
+
+def observe_upstream(endpoint: str, status_code: Union[int, str], started: float) -> None:
+    """Record one call_api_gateway attempt started at `started` (perf_counter)"""
+    UPSTREAM_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
+    UPSTREAM_REQUESTS.labels(endpoint, str(status_code)).inc()
+
+def observe_upstream_payload(endpoint: str, response) -> None:
+    """Record the wire size of an httpx response, before content decoding"""
+    content_encoding = response.headers.get("content-encoding", "identity")
+    UPSTREAM_RESPONSE_BYTES.labels(endpoint, content_encoding).inc(response.num_bytes_downloaded)
+
+def metrics_payload() -> bytes:
+    """Render all collectors in the Prometheus text exposition format"""
+    return generate_latest()
+
+async def monitor_event_loop_lag(interval: float = LOOP_LAG_INTERVAL) -> None:
+    """Sleep for `interval` forever and publish how late each wake-up was"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        LOOP_LAG.set(max(0.0, loop.time() - expected))
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware tracking in-flight HTTP requests.
+
+    Also starts the event loop lag probe on the first request, once the server loop is running.
+    """
+    def __init__(self, app):
+        self.app = app
+        self._lag_task = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(monitor_event_loop_lag())
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            IN_FLIGHT.dec()
+
+class ToolMetricsMiddleware(MCPMiddleware):
+    """FastMCP middleware recording call counts and latency per tool"""
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool = context.message.name
+        outcome = "exception"
+        started = time.perf_counter()
+        try:
+            result = await call_next(context)
+            # Tools report failures as {"error": ...} payloads rather than raising
+            structured = getattr(result, "structured_content", None)
+            outcome = "error" if isinstance(structured, dict) and "error" in structured else "ok"
+            return result
+        finally:
+            TOOL_LATENCY.labels(tool).observe(time.perf_counter() - started)
+            TOOL_CALLS.labels(tool, outcome).inc()
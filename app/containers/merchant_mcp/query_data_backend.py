@@ -0,0 +1,58 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import importlib
+import os
+import sys
+from typing import Any, Dict, Tuple
+
+"""
+Direct-to-database backend for call_api_gateway
+
+With QUERY_DATA_BACKEND=direct the MCP server runs the query-data route handlers
+in-process on persistent connection pools instead of calling the data API, removing
+the API Gateway and Lambda hop from every tool call. The query-data modules are copied
+into ./query_data before the image build (by the Terraform image build or
+build-script/build-lambdas.sh), the database credentials come from
+the DB_SECRET variable injected by ECS.
+"""
+
+QUERY_DATA_BACKEND = os.getenv("QUERY_DATA_BACKEND", "api")
+QUERY_DATA_PATH = os.getenv("QUERY_DATA_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_data"))
+
+if QUERY_DATA_BACKEND not in ("api", "direct"):
+    raise ValueError("QUERY_DATA_BACKEND must be one of: api, direct")
+
+_dispatch = None
+
+def load_dispatch():
+    """
+    Import query-data's dispatch module. query-data imports its own handler.py as
+    `handler`, so the MCP server's module of that name is set aside during the import.
+    """
+    global _dispatch
+    if _dispatch is None:
+        mcp_handler = sys.modules.pop("handler", None)
+        sys.path.insert(0, QUERY_DATA_PATH)
+        try:
+            _dispatch = importlib.import_module("dispatch")
+        finally:
+            sys.path.remove(QUERY_DATA_PATH)
+            sys.modules["query_data_handler"] = sys.modules.pop("handler", None)
+            if mcp_handler is not None:
+                sys.modules["handler"] = mcp_handler
+    return _dispatch
+
+def query_params(payload: Dict[str, Any]) -> Dict[str, str]:
+    """Query string parameters as API Gateway passes them: strings, None values dropped"""
+    params = {}
+    for name, value in payload.items():
+        if value is None:
+            continue
+        params[name] = ("true" if value else "false") if isinstance(value, bool) else str(value)
+    return params
+
+async def execute(api_path: str, payload: Dict[str, Any]) -> Tuple[int, str]:
+    """Run a data API request in-process and return (status code, JSON body)"""
+    response = await load_dispatch().execute(api_path, query_params(payload))
+    return response["statusCode"], response["body"]
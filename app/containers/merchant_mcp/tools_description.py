@@ -1,6 +1,8 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import os
+
 class MerchantToolDescriptions:
     GET_MERCHANT_STATS = '''
         - Description: Get comprehensive merchant statistics for a specific period
@@ -13,6 +15,7 @@ class MerchantToolDescriptions:
         - Parameters:
             * merchant_number (required): Merchant identification number (format: MRCH####)
             * stat_date (optional): Time period for stats - "Day", "Month", or "Year" (default: "Day")
+            * fields (optional): List of columns to return, omit to return all columns
         - Returns:
             * id: Unique stats record identifier (int)
             * merchant_number: Merchant identification code (str)
@@ -90,6 +93,7 @@ class MerchantToolDescriptions:
             * category_code (optional): 4-digit merchant category code
             * page (optional): Page number for pagination (minimum: 1, default: 1)
             * page_size (optional): Number of items per page (range: 1-100, default: 10)
+            * fields (optional): List of columns to return for each merchant, omit to return all columns
         - Returns:
             * merchants: Array of merchant objects, each containing:
                 - merchant_number: Unique merchant identifier (str)
@@ -112,6 +116,7 @@ class MerchantToolDescriptions:
             * Account status and merchant categorization
         - Parameters:
             * merchant_number (required): Unique merchant identifier (format: MRCH####)
+            * fields (optional): List of columns to return (e.g. ["business_phone"]), omit to return all columns
         - Returns:
             * merchant_number: Unique merchant identifier (str)
             * affiliate_address_line1: Affiliate address line 1 (str)
@@ -270,4 +275,61 @@ class MerchantToolDescriptions:
                 - total_declines: Total number of declines in the period (int)
                 - unique_reasons: Number of unique decline reasons (int)'''
 
+    GET_MERCHANT_RISK_SUMMARY = '''
+        - Description: Returns the fraud and risk picture of a merchant in one call: profile, authorization declines, reversals, refunds and chargebacks
+        - Key features:
+            * Single lookup of a precomputed summary, use it first for "what is the risk picture of merchant X" questions
+            * Replaces calling get_merchant_details, get_merchant_stats, get_refund_summary, get_recent_chargebacks and get_decline_analysis in sequence
+            * Decline counts cover all authorizations, use get_decline_analysis for a specific date range
+            * Refreshed every 15 minutes, refreshed_at tells when
+        - Parameters:
+            * merchant_number (required): Merchant identification number (format: MRCH####)
+            * fields (optional): List of columns to return, omit to return all columns
+        - Returns:
+            * merchant_number, business_name, merchant_category_code, account_status, terminated_indicator
+            * authorizations_count, authorizations_volume, declines_count, declines_percent
+            * decline_reasons: Object mapping each decline reason to its count
+            * last_authorization_at, settlements_count, settlements_volume, reversals_count, reversals_volume, last_settlement_at
+            * period_stats: Object keyed by "Day", "Month" and "Year", each containing:
+                - refunds_count, refunds_volume, credit_refunds_percent
+                - disputes_count, disputes_volume, credit_disputes_percent, debit_disputes_percent
+                - reversals_count, declines_percent, entry_method_keyed_percent, entry_method_ecomm_percent
+            * refreshed_at: When the summary was last recomputed'''
+
+
+class CompactMerchantToolDescriptions(MerchantToolDescriptions):
+    """
+    Short variants of the tool descriptions, sent with TOOL_DESCRIPTION_STYLE=compact
+
+    Parameters are already described by each tool's input schema, so these keep what the
+    tool is for, when to prefer it and the column names `fields` accepts. A tool without a
+    compact variant here keeps its verbose description.
+    """
+    GET_MERCHANT_STATS = '''Merchant statistics for a Day, Month or Year period: credit/debit sales, refunds, disputes and reversals (count, volume, average ticket, percent), forced sales, authorizations and declines, entry method mix.
+Columns: merchant_number, stat_date, credit_sales_{count,volume,average_ticket}, credit_refunds_{count,volume,average_ticket,percent}, credit_disputes_{count,volume,average_ticket,percent}, credit_reversals_{count,volume,percent}, debit_sales_{count,volume,average_ticket}, debit_refunds_{count,volume,average_ticket}, debit_disputes_{count,volume,percent}, forced_sales_{count,volume,average_ticket,percent}, authorizations_{count,volume}, authorizations_declines_{count,volume,percent}, entry_method_{keyed,ecomm,chipped,swiped}_percent'''
+
+    FILTER_MERCHANT_STATS = '''Merchant statistics for a Day, Month or Year period limited to one metric_type: credit_sales, credit_refunds, credit_disputes, credit_reversals, debit_sales, debit_refunds, debit_disputes, authorizations, forced_sales, entry_methods or all.'''
+
+    SEARCH_MERCHANTS = '''Find merchants by business name and/or 4-digit category code, paginated. Returns merchants (merchant_number, business_name, merchant_category_code, business_city, business_state, account_status) and pagination.'''
+
+    GET_MERCHANT_DETAILS = '''Merchant profile by merchant number: business, legal, billing and affiliate names, addresses and contacts, category (MCC/SIC), account and ID status, chain, outlets, limits and key dates.
+Columns: business_{name,address_line1,city,zip_code,phone_line1,email,contact_name,pin}, legal_{name,contact_name,phone_line1}, billing_{name,attention,address_line1,address_line2,city,county,state,zip_code,phone}, affiliate_{name,address_line1,address_line2,city,state}, merchant_{category_code,category_description,id_status,phone,zip_code}, country_code, customer_contact, email_address, account_status, number_of_outlets, outlet_name, outlets_count, sic_code, standard_industrial_classification, chain_{agent,bank,business,code,name}, points_{credit_limit,cumulative_credit_limit,sales_limit}, signature_{amount,volume}, security_code, exclusion_indicator, tmf_match_indicator, first_post_date, last_post_date, prior_last_post_date, installation_date, last_cancel_date, last_status_date, last_settlement_date, nach_date, prior_dda_change_date, business_{address,phone,email}_change_date'''
+
+    FILTER_DATA = '''A single field of a merchant's profile, e.g. Business_Name, Business_Phone_Line1, Account_Status or Legal_Name; use get_merchant_details for several fields.'''
+
+    GET_RECENT_CHARGEBACKS = '''Chargeback (dispute) statistics of a merchant for a Day, Month or Year period: credit and debit disputes count, volume, average ticket and percent.'''
+
+    GET_REFUND_SUMMARY = '''Refund summary of a merchant for a Day, Month or Year period: total refunds, volume and average, with credit and debit count, volume and percent.'''
+
+    GET_DECLINE_ANALYSIS = '''Declined authorizations of a merchant between two dates (YYYY-MM-DD), counted by decline reason, with total declines and unique reasons.'''
+
+    GET_MERCHANT_RISK_SUMMARY = '''Precomputed fraud and risk picture of a merchant in one call (refreshed every 15 minutes): profile, authorizations and declines with decline_reasons, settlements, reversals, and per Day/Month/Year period_stats of refunds, disputes, reversals, declines and entry methods. Use it first for risk questions instead of calling the other merchant tools in sequence; use get_decline_analysis for a specific date range.'''
+
+TOOL_DESCRIPTION_STYLES = {"verbose": MerchantToolDescriptions, "compact": CompactMerchantToolDescriptions}
+TOOL_DESCRIPTION_STYLE = os.getenv("TOOL_DESCRIPTION_STYLE", "verbose")
+
+if TOOL_DESCRIPTION_STYLE not in TOOL_DESCRIPTION_STYLES:
+    raise ValueError(f"TOOL_DESCRIPTION_STYLE must be one of: {', '.join(TOOL_DESCRIPTION_STYLES)}")
 
+# Descriptions the tools are registered with
+ToolDescriptions = TOOL_DESCRIPTION_STYLES[TOOL_DESCRIPTION_STYLE]
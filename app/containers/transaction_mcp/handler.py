@@ -4,21 +4,28 @@
 import os
 import logging
 import json
+import time
 import uuid
 from typing import TypedDict, List, Union, Dict, Any, Optional
 from dotenv import load_dotenv
 import httpx
+import uvicorn
 
 from fastmcp import FastMCP, Context
 from starlette.middleware import Middleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import PlainTextResponse
+from starlette.responses import PlainTextResponse, Response
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from typing import Annotated, Literal
 from pydantic import Field
-from tools_description import TransactionToolDescriptions
+from tools_description import ToolDescriptions
+import query_data_backend
+import admission
+import resilience
+from query_data_backend import QUERY_DATA_BACKEND
+from metrics import MetricsMiddleware, ToolMetricsMiddleware, metrics_payload, observe_upstream, observe_upstream_payload, CONTENT_TYPE_LATEST
 
 """
 Transaction MCP Handler
@@ -35,6 +42,12 @@ async def dual_log(message, logger, ctx):
     logger.info(message)
     await ctx.info(message)
 
+# Parse API Gateway responses with orjson when it is installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 # Load environment variables from .env file
 if not os.getenv("API_GATEWAY_BASE_URL"): 
     logger.info("API_GATEWAY_BASE_URL environment variable set by ECS")
@@ -44,9 +57,13 @@ if not os.getenv("API_GATEWAY_BASE_URL"):
 API_GATEWAY_BASE_URL = os.getenv("API_GATEWAY_BASE_URL")
 API_KEY = os.getenv("API_KEY")  # Optional for authentication
 
-if not API_GATEWAY_BASE_URL:
+if not API_GATEWAY_BASE_URL and QUERY_DATA_BACKEND == "api":
     raise ValueError("API_GATEWAY_BASE_URL environment variable not set")
 
+# Open the in-process query-data modules at startup rather than on the first tool call
+if QUERY_DATA_BACKEND == "direct":
+    query_data_backend.load_dispatch()
+
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         request_id = str(uuid.uuid4())
@@ -69,11 +86,8 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             except:
                 logger.info(f"Body (raw): {body[:300]}...")
         
-        # Recreate request with body for downstream processing
-        async def receive():
-            return {"type": "http.request", "body": body}
-        
-        request._receive = receive
+        # BaseHTTPMiddleware replays the body read above to the app, and passes on the
+        # server's http.disconnect the streamable HTTP response waits for
         
         # Process the request
         try:
@@ -89,8 +103,14 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             logger.warning(f"=== REQUEST {request_id} END ===")
             raise
 
+def format_fields(fields: Optional[List[str]]) -> Optional[str]:
+    """Serialize an optional column projection as the comma separated `fields` query parameter"""
+    return ",".join(fields) if fields else None
+
 # Initialize FastMCP server
 mcp_server = FastMCP(name="FraudAIAgentTool", stateless_http=True)
+mcp_server.add_middleware(ToolMetricsMiddleware())
+mcp_server.add_middleware(resilience.DeadlineMiddleware())
 
 @mcp_server.custom_route("/healthz", methods=["GET"])
 async def healthz(request: Request):
@@ -101,6 +121,11 @@ async def health_check(request: Request):
     """Health check endpoint for the MCP server"""
     return PlainTextResponse("OK", status_code=200)
 
+@mcp_server.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request):
+    """Prometheus metrics endpoint for the MCP server"""
+    return Response(metrics_payload(), media_type=CONTENT_TYPE_LATEST)
+
 @mcp_server.resource("file://README.md", mime_type="text/markdown")
 async def get_transaction_resource(ctx: Context=None) -> str:
     """
@@ -121,7 +146,7 @@ async def get_transaction_resource(ctx: Context=None) -> str:
         await dual_log(f"get_transaction_resource - Unexpected error: {str(e)}", logger, ctx)
         return f"get_transaction_resource - Unexpected error: {str(e)}"
 
-class AuthorizationTransactionResponse(TypedDict):
+class AuthorizationTransactionResponse(TypedDict, total=False):
     id: int
     merchant_number: str
     account_number: str
@@ -137,16 +162,18 @@ class AuthorizationTransactionResponse(TypedDict):
     created_at: str
     updated_at: str
 
-@mcp_server.tool(name='get_authorization_transaction_by_id', description=TransactionToolDescriptions.GET_AUTHORIZATION_TRANSACTION_BY_ID)
+@mcp_server.tool(name='get_authorization_transaction_by_id', description=ToolDescriptions.GET_AUTHORIZATION_TRANSACTION_BY_ID)
 async def get_authorization_transaction_by_id(
     auth_transaction_id: Annotated[Union[str, int], Field(description="Unique identifier for the authorization transaction")],
-    ctx: Context
+    fields: Annotated[Optional[List[str]], Field(description="Columns to return (e.g. [\"amount\", \"transaction_datetime\"]), omit to return all columns")] = None,
+    ctx: Context = None
 ) -> AuthorizationTransactionResponse:
     """
     Retrieves authorization transaction information by transaction ID
     
     Args:
         auth_transaction_id: Unique identifier for the authorization transaction
+        fields: Optional list of columns to return
         
     Returns:
         Transaction details or error information
@@ -155,7 +182,7 @@ async def get_authorization_transaction_by_id(
     
     await dual_log(f"MCP Tool (get_authorization_transaction_by_id) with auth_transaction_id: {auth_transaction_id}", logger, ctx)
 
-    payload = {"auth_transaction_id": auth_transaction_id}
+    payload = {"auth_transaction_id": auth_transaction_id, "fields": format_fields(fields)}
 
     try:
         result = await call_api_gateway("/api/transaction/authorization", payload, ctx)
@@ -174,7 +201,7 @@ async def get_authorization_transaction_by_id(
         await dual_log(f"MCP Tool Error for get_authorization_transaction_by_id: {str(e)}", logger, ctx)
         return {"error": f"Unexpected tool error (get_authorization_transaction_by_id): {str(e)}"}
 
-class SettlementTransactionResponse(TypedDict):
+class SettlementTransactionResponse(TypedDict, total=False):
     id: int
     merchant_number: str
     account_number: str
@@ -194,16 +221,18 @@ class SettlementTransactionResponse(TypedDict):
     created_at: str
     updated_at: str
 
-@mcp_server.tool(name='get_settlement_transaction_by_id', description=TransactionToolDescriptions.GET_SETTLEMENT_TRANSACTION_BY_ID)
+@mcp_server.tool(name='get_settlement_transaction_by_id', description=ToolDescriptions.GET_SETTLEMENT_TRANSACTION_BY_ID)
 async def get_settlement_transaction_by_id(
     settlement_transaction_id: Annotated[Union[str, int], Field(description="Unique identifier for the settlement transaction")],
-    ctx: Context
+    fields: Annotated[Optional[List[str]], Field(description="Columns to return (e.g. [\"amount\", \"transaction_datetime\"]), omit to return all columns")] = None,
+    ctx: Context = None
 ) -> SettlementTransactionResponse:
     """
     Retrieves settlement transaction information by transaction ID
     
     Args:
         settlement_transaction_id: Unique identifier for the settlement transaction
+        fields: Optional list of columns to return
         
     Returns:
         Transaction details or error information
@@ -212,7 +241,7 @@ async def get_settlement_transaction_by_id(
 
     await dual_log(f"MCP Tool (get_settlement_transaction_by_id) with settlement_transaction_id: {settlement_transaction_id}", logger, ctx)
 
-    payload = {"settlement_transaction_id": settlement_transaction_id}
+    payload = {"settlement_transaction_id": settlement_transaction_id, "fields": format_fields(fields)}
 
     try:
         result = await call_api_gateway("/api/transaction/settlement", payload, ctx)
@@ -231,10 +260,15 @@ async def get_settlement_transaction_by_id(
         await dual_log(f"MCP Tool Error for get_settlement_transaction_by_id: {str(e)}", logger, ctx)
         return {"error": f"Unexpected tool error (get_settlement_transaction_by_id): {str(e)}"}
 
-class TransactionsByMerchantResponse(TypedDict):
-    item: List[Union[AuthorizationTransactionResponse, SettlementTransactionResponse]]
+class ColumnarTransactions(TypedDict):
+    columns: List[str]
+    rows: List[List[Any]]
 
-@mcp_server.tool(name='get_transactions_by_merchant', description=TransactionToolDescriptions.GET_TRANSACTIONS_BY_MERCHANT)
+class TransactionsByMerchantResponse(TypedDict, total=False):
+    items: Union[List[Union[AuthorizationTransactionResponse, SettlementTransactionResponse]], ColumnarTransactions]
+    format: str
+
+@mcp_server.tool(name='get_transactions_by_merchant', description=ToolDescriptions.GET_TRANSACTIONS_BY_MERCHANT)
 async def get_transactions_by_merchant(
     merchant_number: Annotated[str, Field(description="Merchant identification number", pattern=r'^MRCH\d+$')],
     transaction_type: Annotated[
@@ -243,6 +277,11 @@ async def get_transactions_by_merchant(
     ] = "authorization",
     date_from: Annotated[Optional[str], Field(description="Start date in YYYY-MM-DD format")] = None,
     date_to: Annotated[Optional[str], Field(description="End date in YYYY-MM-DD format")] = None,
+    fields: Annotated[Optional[List[str]], Field(description="Columns to return for each transaction (e.g. [\"amount\", \"transaction_datetime\"]), omit to return all columns")] = None,
+    response_format: Annotated[
+        Literal["records", "columnar"],
+        Field(description="Use \"columnar\" to receive {columns, rows} with column names sent once instead of on every row")
+    ] = "records",
     ctx: Context = None
 ) -> TransactionsByMerchantResponse:
     """
@@ -254,27 +293,31 @@ async def get_transactions_by_merchant(
     payload = {
         "merchant_number": merchant_number,
         "date_from": date_from,
-        "date_to": date_to
+        "date_to": date_to,
+        "fields": format_fields(fields),
+        "format": response_format
     }
     
     try:
         result = await call_api_gateway(endpoint, payload, ctx)
 
-        if not result.get("item"):
+        if not result.get("items"):
             raise APIGatewayError(404, f"Transaction for {merchant_number} not found")
         
         await dual_log(f"MCP Server: get_transactions_by_merchant result: {result}", logger, ctx)
 
-        return result.get("item")
+        # The query-data body is passed through unchanged in either format
+        return result
 
     except APIGatewayError as e:
         return {"error": e.error_message, "status_code": e.status_code}
 
-class RecentTransactionsResponse(TypedDict):
-    items: List[Union[AuthorizationTransactionResponse, SettlementTransactionResponse]]
-    summary: Dict[str, int]  # {"total_returned": int, "total_available": int}
+class RecentTransactionsResponse(TypedDict, total=False):
+    items: Union[List[Union[AuthorizationTransactionResponse, SettlementTransactionResponse]], ColumnarTransactions]
+    summary: Dict[str, int]  # {"total_returned": int}
+    format: str
 
-@mcp_server.tool(name='get_recent_transactions', description=TransactionToolDescriptions.GET_RECENT_TRANSACTIONS)
+@mcp_server.tool(name='get_recent_transactions', description=ToolDescriptions.GET_RECENT_TRANSACTIONS)
 async def get_recent_transactions(
     merchant_number: Annotated[str, Field(description="Merchant identification number", pattern=r'^MRCH\d+$')],
     transaction_type: Annotated[
@@ -282,6 +325,11 @@ async def get_recent_transactions(
         Field(description="Type of transaction to retrieve either authorization or settlement")
     ] = "authorization",
     limit: Annotated[int, Field(description="Number of transactions to retrieve", ge=1, le=100)] = 5,
+    fields: Annotated[Optional[List[str]], Field(description="Columns to return for each transaction (e.g. [\"amount\", \"transaction_datetime\"]), omit to return all columns")] = None,
+    response_format: Annotated[
+        Literal["records", "columnar"],
+        Field(description="Use \"columnar\" to receive {columns, rows} with column names sent once instead of on every row")
+    ] = "records",
     ctx: Context = None
 ) -> RecentTransactionsResponse:
     """
@@ -291,6 +339,8 @@ async def get_recent_transactions(
         merchant_number: Merchant number
         transaction_type: Type of transaction (default to "authorization")
         limit: Number of transactions to retrieve (default to 5)
+        fields: Optional list of columns to return for each transaction
+        response_format: "records" (default) or "columnar"
         
     Returns:
         Dictionary with items or error information
@@ -304,7 +354,9 @@ async def get_recent_transactions(
         payload = {
             "merchant_number": merchant_number,
             "transaction_type": transaction_type,
-            "limit": limit
+            "limit": limit,
+            "fields": format_fields(fields),
+            "format": response_format
         }
         result = await call_api_gateway(endpoint, payload, ctx)
 
@@ -313,20 +365,18 @@ async def get_recent_transactions(
         transactions = result.get("item") if result.get("item") else result.get("items", [])
         if not transactions:
             raise APIGatewayError(404, f"No transactions found for merchant {merchant_number}")
-            
-        # Filter and limit the results
-        sorted_transactions = sorted(
-            transactions,
-            key=lambda x: x.get('transaction_datetime', ''),
-            reverse=True
-        )[:limit]
 
-        return {
-            "items": sorted_transactions,
-            "summary": {
-                "total_returned": len(sorted_transactions),
-                "total_available": len(transactions)
+        # query-data returns at most `limit` rows, newest first, so they are passed through as is
+        if result.get("format") == "columnar":
+            return {
+                "items": transactions,
+                "format": "columnar",
+                "summary": {"total_returned": len(transactions["rows"])}
             }
+
+        return {
+            "items": transactions,
+            "summary": {"total_returned": len(transactions)}
         }
 
     except Exception as e:
@@ -335,11 +385,12 @@ async def get_recent_transactions(
     except APIGatewayError as e:
         return {"error": e.error_message, "status_code": e.status_code, "items": []}
 
-class FilteredTransactionsResponse(TypedDict):
-    items: List[Union[AuthorizationTransactionResponse, SettlementTransactionResponse]]
+class FilteredTransactionsResponse(TypedDict, total=False):
+    items: Union[List[Union[AuthorizationTransactionResponse, SettlementTransactionResponse]], ColumnarTransactions]
     count: int
+    format: str
 
-@mcp_server.tool(name='filter_transactions', description=TransactionToolDescriptions.FILTER_TRANSACTIONS)
+@mcp_server.tool(name='filter_transactions', description=ToolDescriptions.FILTER_TRANSACTIONS)
 async def filter_transactions(
     field: Annotated[
         Literal[
@@ -360,6 +411,15 @@ async def filter_transactions(
         Field(description="Field name to filter on")
     ],
     value: Annotated[str, Field(description="Value to filter by", min_length=1, max_length=100)],
+    table: Annotated[
+        Literal["authorizations", "settlements"],
+        Field(description="Transactions to filter, settlements for transaction_status, card_issue_type, transaction_mode and card_class")
+    ] = "authorizations",
+    fields: Annotated[Optional[List[str]], Field(description="Columns to return for each transaction (e.g. [\"amount\", \"transaction_datetime\"]), omit to return all columns")] = None,
+    response_format: Annotated[
+        Literal["records", "columnar"],
+        Field(description="Use \"columnar\" to receive {columns, rows} with column names sent once instead of on every row")
+    ] = "records",
     ctx: Context = None
 ) -> FilteredTransactionsResponse:
     """
@@ -367,23 +427,28 @@ async def filter_transactions(
     
     Args:
         field: Field name to filter on (e.g., "amount", "status", "id")
+        value: Value the field must equal
+        table: "authorizations" (default) or "settlements"
+        fields: Optional list of columns to return for each transaction
+        response_format: "records" (default) or "columnar"
         
     Returns:
         Dictionary with filtered items or error information
     """
-    await dual_log(f"MCP Tool (filter_transactions) with field: {field} and value: {value}", logger, ctx)
+    await dual_log(f"MCP Tool (filter_transactions) on {table} with field: {field} and value: {value}", logger, ctx)
 
-    payload = {"filter": {"field": field, "value": value}}
+    payload = {"table": table, "field": field, "value": value, "fields": format_fields(fields), "format": response_format}
 
     try:
         result = await call_api_gateway("/api/transaction/filter", payload, ctx)
 
-        if not result.get("item"):
+        if not result.get("items"):
             raise APIGatewayError(404, f"Filter transactions not found")
         
         await dual_log(f"MCP Server: filter_transactions result: {result}", logger, ctx)
 
-        return result.get("items")
+        # The query-data body is passed through unchanged in either format
+        return result
     
     except APIGatewayError as e:
         return {"error": e.error_message, "status_code": e.status_code, "items": []}
@@ -391,7 +456,24 @@ async def filter_transactions(
         await dual_log(f"MCP Tool Error (filter_transaction): {str(e)}", logger, ctx)
         return {"error": f"Unexpected tool error (filter_transaction): {str(e)}", "items": []}
     
-async def call_api_gateway(api_path: str, payload: Dict[str, Any], ctx: Context) -> Dict[str, Any]:
+async def call_query_data_direct(api_path: str, payload: Dict[str, Any], ctx: Context) -> Dict[str, Any]:
+    """
+    call_api_gateway backend running the query-data route in-process (QUERY_DATA_BACKEND=direct)
+
+    Returns the same JSON body and raises the same APIGatewayError as the API Gateway backend
+    """
+    started = time.perf_counter()
+    status_code, body = await query_data_backend.execute(api_path, payload)
+    observe_upstream(api_path, status_code, started)
+
+    if status_code >= 400:
+        error_details = json_loads(body).get('error', 'Unknown error')
+        await dual_log(f"MCP Server: query-data call to {api_path} failed with status {status_code}: {error_details}", logger, ctx)
+        raise APIGatewayError(status_code, error_details)
+
+    return json_loads(body)
+
+async def call_query_data_api(api_path: str, payload: Dict[str, Any], ctx: Context) -> Dict[str, Any]:
     """
     Helper function to make a GET request to deployed API Gateway
     
@@ -405,19 +487,25 @@ async def call_api_gateway(api_path: str, payload: Dict[str, Any], ctx: Context)
     url = f"{API_GATEWAY_BASE_URL.rstrip('/')}{api_path}"
     await dual_log(f"MCP Server: API Gateway URL: {url}", logger, ctx)
 
-    headers = {"Content-Type": "application/json"}
+    # query-data gzips large bodies on request, httpx decodes them transparently
+    headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip"}
     if API_KEY:
         headers["x-api-key"] = API_KEY
 
     async with httpx.AsyncClient() as client:
         try:
-            response = await client.get(url, params=payload, headers=headers, timeout=30.0)
+            # Retried, hedged and circuit broken per endpoint within the tool call deadline
+            response = await resilience.send_with_retries(
+                api_path,
+                lambda timeout: client.get(url, params=payload, headers=headers, timeout=timeout)
+            )
+            observe_upstream_payload(api_path, response)
             
             await dual_log(f"MCP Server: API Gateway response: {response}", logger, ctx)
 
             response.raise_for_status()
             
-            response_json = response.json()
+            response_json = json_loads(response.content)
             await dual_log(f"MCP Server: API Gateway response json: {response_json}", logger, ctx)
 
             return response_json
@@ -442,9 +530,24 @@ async def call_api_gateway(api_path: str, payload: Dict[str, Any], ctx: Context)
             await dual_log(f"MCP Server: API Gateway call to {url} failed with status {e.response.status_code}: {error_details}", logger, ctx)
 
             raise APIGatewayError(e.response.status_code, error_details)
-        except httpx.RequestError as e:
-            await dual_log(f"MCP Server: Network error calling API Gateway {url}: {str(e)}", logger, ctx)
-            raise APIGatewayError(503, f"Network error calling API Gateway: {str(e)}")
+        except resilience.UpstreamError as e:
+            await dual_log(f"MCP Server: API Gateway call to {url} failed: {e.error_message}", logger, ctx)
+            raise APIGatewayError(e.status_code, e.error_message)
+
+async def call_api_gateway(api_path: str, payload: Dict[str, Any], ctx: Context) -> Dict[str, Any]:
+    """
+    Query the data API through the configured backend, within the upstream's admission limit
+
+    Raises APIGatewayError(503) right away when the upstream is saturated
+    """
+    try:
+        async with admission.upstream_limiter(QUERY_DATA_BACKEND).slot():
+            if QUERY_DATA_BACKEND == "direct":
+                return await call_query_data_direct(api_path, payload, ctx)
+            return await call_query_data_api(api_path, payload, ctx)
+    except admission.Overloaded as e:
+        await dual_log(f"MCP Server: {api_path} not called: {str(e)}", logger, ctx)
+        raise APIGatewayError(503, str(e))
 
 class APIGatewayError(Exception):
     """
@@ -463,16 +566,17 @@ if __name__ == "__main__":
     logger.info("Starting Transaction FastMCP server...")
     
     custom_middleware = [
+        Middleware(MetricsMiddleware),
+        Middleware(admission.AdmissionMiddleware, server=mcp_server),
         Middleware(CORSMiddleware, allow_origins=["*"]),
         Middleware(LoggingMiddleware)
     ]
     app = mcp_server.http_app(middleware=custom_middleware)
     app.router.redirect_slashes = False
 
-    mcp_server._http_app = ProxyHeadersMiddleware(app, trusted_hosts="*")
-    mcp_server.run(
-        transport="streamable-http", 
+    # mcp_server.run() would build another app without the middleware above, serve this one
+    uvicorn.run(
+        ProxyHeadersMiddleware(app, trusted_hosts="*"),
         host="0.0.0.0",     # nosec B104 # Otherwise will use "127.0.0.1"
-        port=8080, 
-        path="/mcp"
-    )
\ No newline at end of file
+        port=int(os.getenv("PORT", "8080"))
+    )
@@ -0,0 +1,197 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import asyncio
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware as MCPMiddleware, MiddlewareContext
+
+from metrics import CIRCUIT_OPEN, CIRCUIT_REJECTIONS, UPSTREAM_HEDGES, UPSTREAM_RETRIES, observe_upstream
+
+"""
+Resilience policies for call_api_gateway
+
+Every data API request is a GET, so failed attempts (network errors, 429 and 5xx) are
+retried with full-jitter exponential backoff, and a request still outstanding after
+UPSTREAM_HEDGE_DELAY gets a second, hedged attempt whose first response wins. A
+per-endpoint circuit breaker fails fast once an endpoint keeps failing. All attempts
+and backoff sleeps stay within the deadline of the MCP tool call: TOOL_TIMEOUT_SECONDS,
+shortened by the X-Request-Deadline header (unix epoch seconds) the agent sends.
+"""
+
+RETRY_ATTEMPTS = int(os.getenv("UPSTREAM_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "0.1"))
+RETRY_MAX_DELAY = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", "2.0"))
+# Hedge requests slower than about the p95 latency of the data API, 0 disables hedging
+HEDGE_DELAY = float(os.getenv("UPSTREAM_HEDGE_DELAY", "1.0"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("UPSTREAM_BREAKER_RESET_SECONDS", "30"))
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30"))
+
+DEADLINE_HEADER = "x-request-deadline"
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Deadline of the tool call being served, on the loop.time() clock
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+class UpstreamError(Exception):
+    """An upstream call that failed without a response to hand back to the caller"""
+    def __init__(self, status_code: int, error_message: str):
+        self.status_code = status_code
+        self.error_message = error_message
+        super().__init__(error_message)
+
+def remaining() -> float:
+    """Seconds left of the current tool call's deadline, TOOL_TIMEOUT outside a tool call"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return TOOL_TIMEOUT
+    return deadline - asyncio.get_running_loop().time()
+
+def request_budget() -> float:
+    """TOOL_TIMEOUT, or less when the caller's X-Request-Deadline is sooner"""
+    header = get_http_headers().get(DEADLINE_HEADER)
+    try:
+        return min(TOOL_TIMEOUT, float(header) - time.time()) if header else TOOL_TIMEOUT
+    except ValueError:
+        return TOOL_TIMEOUT
+
+class DeadlineMiddleware(MCPMiddleware):
+    """FastMCP middleware setting the deadline every upstream call of a tool call works within"""
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        token = _deadline.set(asyncio.get_running_loop().time() + request_budget())
+        try:
+            return await call_next(context)
+        finally:
+            _deadline.reset(token)
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Opens after `failure_threshold` failures in a row, rejects calls while open, and after
+    `reset_timeout` lets a single probe through (half-open) whose outcome closes or reopens it.
+    A probe without an outcome (cancelled, out of deadline) is replaced after another `reset_timeout`.
+    """
+    def __init__(self, endpoint: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - max(self.opened_at, self.probe_started or 0) < self.reset_timeout:
+            return False
+        self.probe_started = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+        CIRCUIT_OPEN.labels(self.endpoint).set(0)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.probe_started is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.probe_started = None
+            CIRCUIT_OPEN.labels(self.endpoint).set(1)
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+    return breaker
+
+def backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than a Retry-After the upstream sent"""
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get("retry-after", 0)))
+        except ValueError:
+            pass
+    return delay
+
+async def hedged(endpoint: str, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+    """Run `send`, starting a second attempt if the first is slower than HEDGE_DELAY"""
+    first = asyncio.ensure_future(send())
+    if HEDGE_DELAY <= 0 or HEDGE_DELAY >= remaining():
+        return await first
+
+    done, _ = await asyncio.wait({first}, timeout=HEDGE_DELAY)
+    if done:
+        return first.result()
+
+    UPSTREAM_HEDGES.labels(endpoint).inc()
+    pending = {first, asyncio.ensure_future(send())}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def send_with_retries(endpoint: str, send: Callable[[float], Awaitable[httpx.Response]]) -> httpx.Response:
+    """
+    Call `send(timeout)` under the endpoint's circuit breaker, retrying and hedging within the
+    tool call deadline. Returns the last response, which may still be an error response, or
+    raises UpstreamError when no response was received or the circuit is open.
+    """
+    breaker = get_breaker(endpoint)
+    if not breaker.allow():
+        CIRCUIT_REJECTIONS.labels(endpoint).inc()
+        raise UpstreamError(503, f"{endpoint} is failing repeatedly, not calling it for up to {breaker.reset_timeout:.0f}s")
+
+    attempt = 0
+    while True:
+        if remaining() <= 0:
+            raise UpstreamError(504, f"Deadline exceeded calling {endpoint}")
+
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await hedged(endpoint, lambda: send(max(remaining(), 0.001)))
+        except httpx.RequestError as e:
+            observe_upstream(endpoint, "network_error", started)
+            error = UpstreamError(504 if isinstance(e, httpx.TimeoutException) else 503, f"Network error calling {endpoint}: {str(e)}")
+        else:
+            observe_upstream(endpoint, response.status_code, started)
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                breaker.record_success()
+                return response
+
+        breaker.record_failure()
+        delay = backoff_delay(attempt, response)
+        attempt += 1
+        if attempt >= RETRY_ATTEMPTS or breaker.is_open or delay >= remaining():
+            if response is not None:
+                return response
+            raise error
+
+        UPSTREAM_RETRIES.labels(endpoint).inc()
+        await asyncio.sleep(delay)
@@ -1,6 +1,8 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import os
+
 class TransactionToolDescriptions:
     GET_AUTHORIZATION_TRANSACTION_BY_ID = '''
         - Description: Retrieves detailed authorization transaction information by transaction ID          
@@ -12,6 +14,7 @@ class TransactionToolDescriptions:
             * Supports fraud analysis with comprehensive transaction attributes
         - Parameters:
             * auth_transaction_id (required): Unique identifier for the authorization transaction
+            * fields (optional): List of columns to return, omit to return all columns
         - Returns:
             * id: Unique transaction identifier
             * merchant_number: Merchant identification code
@@ -38,6 +41,7 @@ class TransactionToolDescriptions:
             * Supports investigation of settlement discrepancies             
         - Parameters:
             * settlement_transaction_id (required): Unique identifier for the settlement transaction                
+            * fields (optional): List of columns to return, omit to return all columns
         - Returns:
             * id: Unique settlement identifier (int)
             * merchant_number: Merchant identification code (str)
@@ -72,8 +76,11 @@ class TransactionToolDescriptions:
             * transaction_type (optional): Type of transaction to retrieve - "authorization" or "settlement" (default: "authorization")
             * date_from (optional): Start date in YYYY-MM-DD format
             * date_to (optional): End date in YYYY-MM-DD format
+            * fields (optional): List of columns to return for each transaction, omit to return all columns
+            * response_format (optional): "records" (default) or "columnar" - columnar returns items as {columns: [...], rows: [[...], ...]} with column names sent once
         - Returns:
-            * item: Array of transaction objects containing all transaction details
+            * items: Array of transaction objects containing all transaction details, or {columns, rows} when response_format is "columnar"
+            * format: "columnar" when the compact encoding was requested
             * Each transaction object includes all fields from either AuthorizationTransactionResponse or SettlementTransactionResponse depending on transaction_type'''
     
     GET_RECENT_TRANSACTIONS = '''
@@ -88,11 +95,12 @@ class TransactionToolDescriptions:
             * merchant_number (required): Merchant identification number (format: MRCH####)
             * transaction_type (optional): Type of transaction - "authorization" or "settlement" (default: "authorization")
             * limit (optional): Maximum number of transactions to retrieve (range: 1-100, default: 5)
+            * fields (optional): List of columns to return for each transaction, omit to return all columns
+            * response_format (optional): "records" (default) or "columnar" - columnar returns items as {columns: [...], rows: [[...], ...]} with column names sent once
         - Returns:
-            * items: Array of recent transaction objects sorted by date (newest first)
+            * items: Array of recent transaction objects sorted by date (newest first), or {columns, rows} when response_format is "columnar"
             * summary: Object containing:
-                - total_returned: Number of transactions returned (int)
-                - total_available: Total number of transactions available (int)'''
+                - total_returned: Number of transactions returned (int)'''
     
     FILTER_TRANSACTIONS = '''
         - Description: Filters transactions based on specified criteria and field values
@@ -108,6 +116,39 @@ class TransactionToolDescriptions:
                 - card_issue_type, transaction_mode, card_country, card_class,
                 - amount, currency, auth_code, transaction_datetime, decline_reason
             * value (required): Value to filter by (1-100 characters)
+            * table (optional): "authorizations" (default) or "settlements"
+            * fields (optional): List of columns to return for each transaction, omit to return all columns
+            * response_format (optional): "records" (default) or "columnar" - columnar returns items as {columns: [...], rows: [[...], ...]} with column names sent once
         - Returns:
             * items: Array of AuthorizationTransactionResponse and SettlementTransactionResponse
-            * count: Total number of matching transactions (int)'''
\ No newline at end of file
+            * count: Total number of matching transactions (int)'''
+
+
+class CompactTransactionToolDescriptions(TransactionToolDescriptions):
+    """
+    Short variants of the tool descriptions, sent with TOOL_DESCRIPTION_STYLE=compact
+
+    Parameters are already described by each tool's input schema, so these keep what the
+    tool is for, when to prefer it and the column names `fields` accepts. A tool without a
+    compact variant here keeps its verbose description.
+    """
+    GET_AUTHORIZATION_TRANSACTION_BY_ID = '''One authorization transaction by id.
+Columns: id, merchant_number, account_number (masked), amount, currency, transaction_type, payment_method, card_expiry_date, auth_code, transaction_datetime, approval_status (Approved/Declined), decline_reason, created_at, updated_at'''
+
+    GET_SETTLEMENT_TRANSACTION_BY_ID = '''One settlement transaction by id.
+Columns: id, merchant_number, account_number (masked), same_card, transaction_date, processed_amount, auth_amount, tran_id, transaction_type, transaction_status, card_issue_type, transaction_mode, payment_method, auth_code, auth_date, card_country, card_class, created_at, updated_at'''
+
+    GET_TRANSACTIONS_BY_MERCHANT = '''Authorization or settlement transactions of a merchant, optionally between two dates (YYYY-MM-DD). response_format "columnar" returns items as {columns, rows}.'''
+
+    GET_RECENT_TRANSACTIONS = '''The latest authorization or settlement transactions of a merchant, newest first (limit 1-100, default 5). response_format "columnar" returns items as {columns, rows}.'''
+
+    FILTER_TRANSACTIONS = '''Transactions whose field equals a value, e.g. approval_status, decline_reason, payment_method, card_country or amount, with the match count. table "settlements" filters settlements instead of authorizations. response_format "columnar" returns items as {columns, rows}.'''
+
+TOOL_DESCRIPTION_STYLES = {"verbose": TransactionToolDescriptions, "compact": CompactTransactionToolDescriptions}
+TOOL_DESCRIPTION_STYLE = os.getenv("TOOL_DESCRIPTION_STYLE", "verbose")
+
+if TOOL_DESCRIPTION_STYLE not in TOOL_DESCRIPTION_STYLES:
+    raise ValueError(f"TOOL_DESCRIPTION_STYLE must be one of: {', '.join(TOOL_DESCRIPTION_STYLES)}")
+
+# Descriptions the tools are registered with
+ToolDescriptions = TOOL_DESCRIPTION_STYLES[TOOL_DESCRIPTION_STYLE]
@@ -45,16 +45,22 @@ def lambda_handler(event, context):
     s3_bucket = os.environ['S3_BUCKET']
     secret_name = os.environ['DB_SECRET_NAME']
 
-    ddl_object_key = event.get("ddl_object_key", "schema/ddl.sql")
+    ddl_object_key = event.get("ddl_object_key", os.environ.get("DDL_OBJECT_KEY", "schema/ddl.sql"))
     dml_object_key = event.get("dml_object_key", "schema/dml.sql")
+    # Apply a single migration or maintenance script (e.g. "schema/migrations/001_route_indexes.sql")
+    # to an existing database instead of recreating it from the DDL and DML
+    migration_object_key = event.get("migration_object_key")
     
     try:
         # Get database credentials
         secret = get_secret(secret_name)
         
         # Get SQL content from S3
-        ddl_sql_content = get_sql_from_s3(s3_bucket, ddl_object_key)
-        dml_sql_content = get_sql_from_s3(s3_bucket, dml_object_key)
+        if migration_object_key:
+            migration_sql_content = get_sql_from_s3(s3_bucket, migration_object_key)
+        else:
+            ddl_sql_content = get_sql_from_s3(s3_bucket, ddl_object_key)
+            dml_sql_content = get_sql_from_s3(s3_bucket, dml_object_key)
         
         # Connect to database
         conn = psycopg2.connect(
@@ -68,14 +74,29 @@ def lambda_handler(event, context):
         conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
         
         # Execute SQL
-        execute_sql(conn, ddl_sql_content)
-        print("DDL executed successfully")
+        if migration_object_key:
+            execute_sql(conn, migration_sql_content)
+            print(f"Migration {migration_object_key} executed successfully")
+        else:
+            execute_sql(conn, ddl_sql_content)
+            print("DDL executed successfully")
 
-        execute_sql(conn, dml_sql_content)
-        print("DML executed successfully")
+            execute_sql(conn, dml_sql_content)
+            print("DML executed successfully")
         
         # Close connection
         conn.close()
+
+        if migration_object_key:
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'message': 'Successfully executed migration',
+                    'details': {
+                        'migration_content': migration_object_key
+                    }
+                })
+            }
         
         return {
             'statusCode': 200,
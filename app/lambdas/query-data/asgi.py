@@ -0,0 +1,62 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+
+import dispatch
+import handler
+
+"""
+query-data as a long-lived ASGI service
+
+Serves the query-data routes with the same handler functions as the Lambda, behind an
+internal ALB on the MCP ECS cluster, so the MCP servers can call it directly over the VPC
+instead of going through API Gateway and a Lambda invocation per request. Connections
+stay open across requests on the pools of dispatch.py.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+"""
+
+# Checked against the x-api-key header when set, like the API Gateway usage plan
+API_KEY = os.environ.get('API_KEY')
+
+def to_response(response: Dict) -> Response:
+    """Convert a Lambda proxy response from the route handlers to a Starlette response"""
+    return Response(response['body'], status_code=response['statusCode'], headers=response['headers'])
+
+async def query(request: Request) -> Response:
+    if API_KEY and request.headers.get('x-api-key') != API_KEY:
+        return Response(json.dumps({"message": "Forbidden"}), status_code=403, media_type='application/json')
+
+    path = request.url.path.lower()
+    params = dict(request.query_params)
+    print(f"Processing request - Path: {path}, Params: {params}")
+
+    return to_response(await dispatch.execute(path, params))
+
+async def healthz(request: Request) -> Response:
+    return PlainTextResponse("OK")
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    yield
+    await dispatch.close()
+
+app = Starlette(
+    routes=[
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/api/{route:path}", query, methods=["GET"])
+    ],
+    middleware=[Middleware(GZipMiddleware, minimum_size=handler.COMPRESSION_MIN_BYTES)],
+    lifespan=lifespan
+)
@@ -0,0 +1,88 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import asyncio
+import os
+from typing import Dict, List, Sequence, Tuple
+
+"""
+Asyncio database path for query-data
+
+Routes whose sub-queries are independent run them concurrently on a small psycopg 3
+AsyncConnectionPool instead of one after the other on a single psycopg2 cursor.
+The pool and the event loop it is bound to live at module level, so warm Lambda
+invocations reuse open connections. DB_DRIVER=psycopg2, or psycopg 3 not being
+installed, keeps every route on the synchronous psycopg2 path.
+"""
+
+try:
+    import psycopg
+    from psycopg.types.string import TextLoader
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:
+    psycopg = None
+
+ENABLED = psycopg is not None and os.environ.get('DB_DRIVER', 'async') == 'async'
+
+# One connection per concurrent sub-query of a request, Lambda serves one request at a time
+POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '2'))
+
+_pool = None
+_loop = None
+
+async def configure_connection(conn) -> None:
+    """Match the psycopg2 connection: autocommit reads and NUMERIC returned as text"""
+    conn.adapters.register_loader("numeric", TextLoader)
+    await conn.set_autocommit(True)
+
+async def get_pool(secret: Dict) -> "AsyncConnectionPool":
+    """Open the pool on first use with the credentials of the query-data database secret"""
+    global _pool
+    if _pool is None:
+        conninfo = psycopg.conninfo.make_conninfo(
+            host=secret['host'],
+            dbname=secret['database_name'],
+            user=secret['database_username'],
+            password=secret['database_password'],
+            port=secret['port']
+        )
+        _pool = AsyncConnectionPool(
+            conninfo,
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            configure=configure_connection,
+            # Connections can be dropped while the Lambda environment is frozen
+            check=AsyncConnectionPool.check_connection,
+            open=False
+        )
+        await _pool.open()
+    return _pool
+
+async def close() -> None:
+    """Close the pool, used by the query-data service on shutdown"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+async def fetch(pool, query: str, values: Sequence, one: bool = False) -> Tuple[List[str], object]:
+    """Run one query on its own pooled connection and return (column names, row or rows)"""
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, values)
+            columns = [desc.name.lower() for desc in cursor.description]
+            rows = await cursor.fetchone() if one else await cursor.fetchall()
+            return columns, rows
+
+async def fetch_concurrently(secret: Dict, queries: List[Tuple[str, Sequence, bool]]) -> List[Tuple[List[str], object]]:
+    """Run (query, values, fetch_one) queries concurrently, results are returned in the same order"""
+    pool = await get_pool(secret)
+    return await asyncio.gather(*(fetch(pool, query, values, one) for query, values, one in queries))
+
+def run(coroutine):
+    """Run a coroutine from the synchronous Lambda handler on the loop the pool is bound to"""
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coroutine)
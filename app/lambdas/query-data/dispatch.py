@@ -0,0 +1,89 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+from typing import Dict
+
+import anyio
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+import async_db
+import handler
+import routing
+from serialization import register_numeric_as_str
+
+"""
+In-process execution of query-data routes on persistent connection pools
+
+Used by long-lived processes instead of lambda_handler: the query-data ASGI service
+(asgi.py) and the MCP servers' direct database backend. Synchronous routes borrow a
+psycopg2 connection from a ThreadedConnectionPool and run on a worker thread, so they
+never block the event loop; async routes run on the async_db pool.
+"""
+
+POOL_MIN_SIZE = int(os.environ.get('SERVICE_POOL_MIN_SIZE', '2'))
+POOL_MAX_SIZE = int(os.environ.get('SERVICE_POOL_MAX_SIZE', '10'))
+
+_pool = None
+# Requests wait here for a worker thread instead of failing on an exhausted connection pool
+_limiter = anyio.CapacityLimiter(POOL_MAX_SIZE)
+
+class PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection set up once when the pool opens it, then reused across requests"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        register_numeric_as_str(self)
+        # Pooled connections must not sit idle in a transaction between requests
+        self.autocommit = True
+
+def get_pool() -> ThreadedConnectionPool:
+    """Open the psycopg2 pool on first use with the credentials of the query-data database secret"""
+    global _pool
+    if _pool is None:
+        secret = handler.get_db_secret()
+        _pool = ThreadedConnectionPool(
+            POOL_MIN_SIZE,
+            POOL_MAX_SIZE,
+            host=secret['host'],
+            database=secret['database_name'],
+            user=secret['database_username'],
+            password=secret['database_password'],
+            port=secret['port'],
+            connection_factory=PooledConnection
+        )
+    return _pool
+
+def run_route(route: routing.Route, args: Dict) -> Dict:
+    """Run a synchronous route on a pooled connection, dropped connections are discarded"""
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        return handler.route_request(conn, route, args)
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
+
+async def execute(path: str, params: Dict) -> Dict:
+    """Serve one query-data request and return its Lambda proxy style response"""
+    route = handler.ROUTES.get(path.lower())
+    if route is None:
+        return handler.create_response(404, {"error": f"Path not found: {path}"})
+
+    try:
+        args = route.parse(params)
+        if async_db.ENABLED and route.async_handler:
+            return await handler.run_route_async(route, args)
+        return await anyio.to_thread.run_sync(run_route, route, args, limiter=_limiter)
+    except routing.RequestError as e:
+        return handler.create_response(e.status_code, {"error": e.message})
+    except Exception as e:
+        print(f"Error processing request: {str(e)}")
+        return handler.create_response(500, {"error": f"Internal server error: {str(e)}"})
+
+async def close() -> None:
+    """Close both pools"""
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+    await async_db.close()
@@ -1,17 +1,100 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import base64
 import boto3
+import gzip
 import os
 import json
 import psycopg2
 from psycopg2.extensions import AsIs
-from typing import Dict
+from typing import Dict, List, Tuple
+from serialization import dumps, register_numeric_as_str
+from routing import Param, RequestError, Route, fetch_all, fetch_one, int_between, probe_columns, registry
+import async_db
 
-def get_db_connection():
+MERCHANT_DETAILS_COLUMNS = [
+    'merchant_number', 'merchant_name', 'address_line1', 'address_line2', 
+    'county', 'city', 'state', 'billing_address_line1', 'billing_address_line2',
+    'billing_city', 'billing_county', 'billing_name', 'billing_phone',
+    'billing_state', 'billing_zip_code', 'business_contact_name',
+    'business_email', 'business_phone', 'business_name', 'business_zip_code',
+    'business_address_line1', 'business_address_line2', 'business_city',
+    'business_state', 'legal_contact_name', 'legal_phone_line1', 'legal_name',
+    'country_code', 'merchant_category_code', 'merchant_category_description',
+    'merchant_website', 'merchant_phone', 'merchant_zip_code',
+    'standard_industrial_classification', 'sic_code', 'account_status',
+    'signature_amount', 'signature_volume', 'terminated_indicator',
+    'first_post_date', 'installation_date', 'last_cancel_date',
+    'last_post_date', 'last_status_date', 'last_settlement_date',
+    'business_address_change_date', 'business_phone_change_date',
+    'business_email_change_date', 'created_at', 'updated_at'
+]
+
+MERCHANT_STATS_COLUMNS = [
+    'id', 'merchant_number', 'bucket_date',
+    'credit_sales_count', 'credit_sales_volume', 'credit_sales_average_ticket',
+    'credit_refunds_count', 'credit_refunds_volume', 'credit_refunds_average_ticket', 'credit_refunds_percent',
+    'credit_disputes_count', 'credit_disputes_volume', 'credit_disputes_average_ticket', 'credit_disputes_percent',
+    'credit_reversals_count', 'credit_reversals_volume', 'credit_reversals_percent',
+    'entry_method_keyed_percent', 'entry_method_ecomm_percent',
+    'entry_method_chipped_percent', 'entry_method_swiped_percent',
+    'authorizations_count', 'authorizations_volume', 'authorizations_declines_count',
+    'authorizations_declines_volume', 'authorizations_declines_percent',
+    'debit_sales_count', 'debit_sales_volume', 'debit_sales_average_ticket',
+    'debit_refunds_count', 'debit_refunds_volume', 'debit_refunds_average_ticket',
+    'debit_disputes_count', 'debit_disputes_volume', 'debit_disputes_percent',
+    'created_at', 'updated_at'
+]
+
+MERCHANT_RISK_SUMMARY_COLUMNS = [
+    'merchant_number', 'business_name', 'merchant_category_code', 'account_status',
+    'terminated_indicator', 'authorizations_count', 'authorizations_volume',
+    'declines_count', 'declines_percent', 'decline_reasons', 'last_authorization_at',
+    'settlements_count', 'settlements_volume', 'reversals_count', 'reversals_volume',
+    'last_settlement_at', 'period_stats', 'refreshed_at'
+]
+
+TRANSACTION_COLUMNS = {
+    'authorizations': [
+        'id', 'merchant_number', 'account_number', 'amount', 'currency',
+        'transaction_type', 'payment_method', 'card_expiry_date',
+        'auth_code', 'transaction_datetime', 'approval_status',
+        'decline_reason', 'created_at', 'updated_at'
+    ],
+    'settlements': [
+        'id', 'merchant_number', 'account_number', 'same_card',
+        'transaction_date', 'processed_amount', 'auth_amount',
+        'tran_id', 'transaction_type', 'transaction_status',
+        'card_issue_type', 'transaction_mode', 'payment_method',
+        'auth_code', 'auth_date', 'card_class', 'created_at', 'updated_at'
+    ]
+}
+
+# Bodies smaller than this are returned uncompressed, gzip framing and base64 would outweigh the savings
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+
+# Upper bound and default for the number of rows returned by the merchant transaction routes
+MAX_TRANSACTION_LIMIT = 100
+
+# "records" returns one object per row, "columnar" sends the column names once followed by row arrays
+RESPONSE_FORMATS = ['records', 'columnar']
+
+_db_secret = None
+
+def get_db_secret() -> Dict:
     """
-    Get database connection parameters from Secrets Manager and establish connection
+    Get database connection parameters from Secrets Manager, cached for the lifetime of the container
     """
+    global _db_secret
+    if _db_secret is not None:
+        return _db_secret
+
+    # The query-data service gets the secret JSON injected by ECS instead of reading Secrets Manager
+    if os.environ.get('DB_SECRET'):
+        _db_secret = json.loads(os.environ['DB_SECRET'])
+        return _db_secret
+
     secret_name = os.environ.get('DB_SECRET_NAME')
     region_name = os.environ.get('AWS_REGION')
 
@@ -30,7 +113,14 @@ def get_db_connection():
         print(f"Error getting secret: {str(e)}")
         raise e
 
-    secret = json.loads(get_secret_value_response['SecretString'])
+    _db_secret = json.loads(get_secret_value_response['SecretString'])
+    return _db_secret
+
+def get_db_connection():
+    """
+    Establish a psycopg2 connection to the database
+    """
+    secret = get_db_secret()
     
     # Connect to the database
     conn = psycopg2.connect(
@@ -40,9 +130,74 @@ def get_db_connection():
         password=secret['database_password'],
         port=secret['port']
     )
+    register_numeric_as_str(conn)
     
     return conn
 
+def select_columns(fields: str, allowed_columns: List[str]) -> str:
+    """
+    Parameter type of the optional comma separated `fields` parameter, parsed to a SELECT column list.
+    Returns "*" when no fields are requested and raises ValueError on unknown column names.
+    """
+    requested = list(dict.fromkeys(f.strip().lower() for f in fields.split(',') if f.strip()))
+    invalid = [f for f in requested if f not in allowed_columns]
+    if invalid:
+        raise ValueError(f"Invalid fields: {', '.join(invalid)}. Allowed fields: {', '.join(allowed_columns)}")
+
+    return ", ".join(requested) if requested else "*"
+
+def fields_param(allowed_columns: List[str]) -> Param:
+    return Param('fields', type=lambda fields: select_columns(fields, allowed_columns), default="*")
+
+def filter_field(filter_str: str) -> str:
+    """Parameter type of the filter-data `filter` parameter, a JSON object naming a merchant_details field"""
+    try:
+        field = json.loads(filter_str.replace("'", '"')).get('field')
+    except (json.JSONDecodeError, AttributeError):
+        raise ValueError("Invalid filter format")
+
+    if not field:
+        raise ValueError("field parameter is required")
+    if field.lower() not in MERCHANT_DETAILS_COLUMNS:
+        raise ValueError(f"Invalid field name. Allowed fields: {', '.join(MERCHANT_DETAILS_COLUMNS)}")
+    return field.lower()
+
+MERCHANT_NUMBER = Param('merchant_number', required=True)
+
+RESPONSE_FORMAT = Param(
+    'format',
+    default='records',
+    choices=RESPONSE_FORMATS,
+    error=f"Invalid format. Allowed values: {', '.join(RESPONSE_FORMATS)}"
+)
+
+METRIC_COLUMN_PREFIXES = {
+    'sales': ['credit_sales_', 'debit_sales_'],
+    'refunds': ['credit_refunds_', 'debit_refunds_'],
+    'disputes': ['credit_disputes_', 'debit_disputes_'],
+    'reversals': ['credit_reversals_'],
+    'authorizations': ['authorizations_'],
+    'entry_method': ['entry_method_']
+}
+
+FILTER_FIELDS = {
+    'authorizations': [
+        'merchant_number', 'account_number', 'amount', 'currency',
+        'transaction_type', 'payment_method', 'card_expiry_date',
+        'auth_code', 'transaction_datetime', 'approval_status',
+        'decline_reason'
+    ],
+    'settlements': [
+        'merchant_number', 'account_number', 'same_card',
+        'transaction_date', 'processed_amount', 'auth_amount',
+        'tran_id', 'transaction_type', 'transaction_status',
+        'card_issue_type', 'transaction_mode', 'payment_method',
+        'auth_code', 'auth_date', 'card_class'
+    ]
+}
+
+DATE_FIELDS = {'authorizations': 'transaction_datetime', 'settlements': 'transaction_date'}
+
 def lambda_handler(event, context):
     """
     Lambda handler that queries PostgreSQL database based on API path and filters
@@ -53,406 +208,404 @@ def lambda_handler(event, context):
         path = event.get('path', '').lower()
         params = event.get('queryStringParameters', {}) or {}
         print(f"Processing request - Path: {path}, Params: {params}")
-        
+
+        route = ROUTES.get(path)
+        if route is None:
+            return create_response(404, {"error": f"Path not found: {path}"})
+
+        # Invalid parameters are rejected before a database connection is opened
+        try:
+            args = route.parse(params)
+        except RequestError as e:
+            return create_response(e.status_code, {"error": e.message})
+
+        # Routes with independent sub-queries run them concurrently on the async pool
+        if async_db.ENABLED and route.async_handler:
+            response = async_db.run(run_route_async(route, args))
+            return compress_response(response, event.get('headers'))
+
         # Get database connection
         conn = get_db_connection()
-        cursor = conn.cursor()
-            
         try:
-            # Route the request to the appropriate handler based on path
-            if path == "/api/merchant/details":
-                return get_merchant_details(cursor, params)
-            elif path == "/api/merchant/stats":
-                return get_merchant_stats(cursor, params)
-            elif path == "/api/merchant/filter-stats":
-                return filter_merchant_stats(cursor, params)
-            elif path == "/api/merchant/filter-data":
-                return filter_merchant_data(cursor, params)
-            elif path == "/api/merchant/search":
-                return search_merchants(cursor, params)
-            elif path == "/api/transaction/authorization":
-                return get_transactions_by_merchant(cursor, params, "authorizations")
-            elif path == "/api/transaction/settlement":
-                return get_transactions_by_merchant(cursor, params, "settlements")
-            elif path == "/api/transaction/filter":
-                return filter_transactions(cursor, params)
-            else:
-                return create_response(404, {"error": f"Path not found: {path}"})
-                
+            response = route_request(conn, route, args)
         finally:
-            cursor.close()
             conn.close()
+
+        return compress_response(response, event.get('headers'))
             
     except Exception as e:
         print(f"Error processing request: {str(e)}")
         return create_response(500, {"error": f"Internal server error: {str(e)}"})
 
-def get_merchant_details(cursor, params: Dict) -> Dict:
+def get_merchant_details(cursor, args: Dict) -> Dict:
     """Get merchant details by merchant number"""
-    merchant_number = params.get('merchant_number')
-    if not merchant_number:
-        return create_response(400, {"error": "merchant_number parameter is required"})
-    
+    merchant_number = args['merchant_number']
     print(f"Getting details for merchant: {merchant_number}")
-    
-    try:
-        query = "SELECT * FROM merchant_details WHERE merchant_number = %s"
-        cursor.execute(query, (merchant_number,))
-        result = cursor.fetchone()
-        
-        if result:
-            columns = [desc[0].lower() for desc in cursor.description]
-            merchant = dict(zip(columns, result))
-            return create_response(200, {"item": merchant})
-        else:
-            return create_response(404, {"error": f"Merchant {merchant_number} not found"})
-    
-    except Exception as e:
-        print(f"Database error in get_merchant_details: {str(e)}")
-        return create_response(500, {"error": f"Database error: {str(e)}"})
 
-def get_merchant_stats(cursor, params: Dict) -> Dict:
+    merchant = fetch_one(cursor, f"SELECT {args['fields']} FROM merchant_details WHERE merchant_number = %s", (merchant_number,))
+    if not merchant:
+        raise RequestError(404, f"Merchant {merchant_number} not found")
+    return {"item": merchant}
+
+def get_merchant_stats(cursor, args: Dict) -> Dict:
     """Get merchant statistics by merchant number and bucket date"""
-    merchant_number = params.get('merchant_number')
-    bucket_date = params.get('stat_date') 
-    
-    if not merchant_number:
-        return create_response(400, {"error": "merchant_number parameter is required"})
-    if not bucket_date:
-        return create_response(400, {"error": "bucket_date parameter is required"})
-    
+    merchant_number, bucket_date = args['merchant_number'], args['stat_date']
     print(f"Getting stats for merchant: {merchant_number}, bucket_date: {bucket_date}")
-    
-    try:
-        query = "SELECT * FROM merchant_stats WHERE merchant_number = %s AND bucket_date = %s"
-        cursor.execute(query, (merchant_number, bucket_date))
-        result = cursor.fetchone()
-        
-        if result:
-            columns = [desc[0].lower() for desc in cursor.description]
-            stats = dict(zip(columns, result))
-            return create_response(200, {"item": stats})
-        else:
-            return create_response(404, {"error": f"Stats not found for merchant {merchant_number} on date {bucket_date}"})
-    
-    except Exception as e:
-        print(f"Database error in get_merchant_stats: {str(e)}")
-        return create_response(500, {"error": f"Database error: {str(e)}"})
-    
-def filter_merchant_stats(cursor, params: Dict) -> Dict:
+
+    query = f"SELECT {args['fields']} FROM merchant_stats WHERE merchant_number = %s AND bucket_date = %s"
+    stats = fetch_one(cursor, query, (merchant_number, bucket_date))
+    if not stats:
+        raise RequestError(404, f"Stats not found for merchant {merchant_number} on date {bucket_date}")
+    return {"item": stats}
+
+def filter_merchant_stats(cursor, args: Dict) -> Dict:
     """Filter merchant statistics by period and metric type"""
-    merchant_number = params.get('merchant_number')
-    bucket_date = params.get('stat_date')
-    metric_type = params.get('metric_type')
-    
-    if not merchant_number:
-        return create_response(400, {"error": "merchant_number parameter is required"})
-    
+    merchant_number, bucket_date, metric_type = args['merchant_number'], args['stat_date'], args['metric_type']
     print(f"Filtering stats for merchant: {merchant_number}, bucket_date: {bucket_date}, metric: {metric_type}")
-    
-    try:
-        query = "SELECT * FROM merchant_stats WHERE merchant_number = %s AND bucket_date = %s"
-        
-        if metric_type and metric_type.lower() != 'all':
-            metric_map = {
-                'sales': ['credit_sales_', 'debit_sales_'],
-                'refunds': ['credit_refunds_', 'debit_refunds_'],
-                'disputes': ['credit_disputes_', 'debit_disputes_'],
-                'reversals': ['credit_reversals_'],
-                'authorizations': ['authorizations_'],
-                'entry_method': ['entry_method_']
-            }
-            
-            if metric_type not in metric_map:
-                return create_response(400, {"error": f"Invalid metric type. Allowed values: {', '.join(metric_map.keys())}"})
-            
-            # Get column names that match the metric type
-            cursor.execute("SELECT * FROM merchant_stats LIMIT 0")
-            all_columns = [desc[0].lower() for desc in cursor.description]
-            
-            selected_columns = []
-            for prefix in metric_map[metric_type]:
-                selected_columns.extend([col for col in all_columns if col.startswith(prefix)])
-            
-            if not selected_columns:
-                return create_response(400, {"error": f"No columns found for metric type: {metric_type}"})
-            
-            query = f"""
-                SELECT merchant_number, bucket_date, {', '.join(selected_columns)}
-                FROM merchant_stats 
-                WHERE merchant_number = %s AND bucket_date = %s
-            """
-        
-        cursor.execute(query, (merchant_number, bucket_date))
-        result = cursor.fetchone()
-        
-        
-        if not result:
-            return create_response(404, {"error": f"Stats not found for merchant {merchant_number} with period {bucket_date}"})
-            
-        columns = [desc[0].lower() for desc in cursor.description]
-        stats = dict(zip(columns, result))
-        
-        return create_response(200, {"item": stats})
-    
-    except Exception as e:
-        print(f"Database error in filter_merchant_stats: {str(e)}")
-        return create_response(500, {"error": f"Database error: {str(e)}"})
 
-def filter_merchant_data(cursor, params: Dict) -> Dict:
-    """Filter merchant data by field"""
-    merchant_number = params.get('merchant_number')
-    filter_str = params.get('filter') ###### CHANGE
+    query = "SELECT * FROM merchant_stats WHERE merchant_number = %s AND bucket_date = %s"
 
-    try:
-        filter_str = filter_str.replace("'", '"')
-        filter_params = json.loads(filter_str)
-        field = filter_params.get('field')
-    except (json.JSONDecodeError, AttributeError):
-        return create_response(400, {"error": "Invalid filter format"})
-    
-    if not merchant_number:
-        return create_response(400, {"error": "merchant_number parameter is required"})
-    if not field:
-        return create_response(400, {"error": "field parameter is required"})
-    
-    # Validate field name
-    valid_fields = [
-        'merchant_number', 'merchant_name', 'address_line1', 'address_line2', 
-        'county', 'city', 'state', 'billing_address_line1', 'billing_address_line2',
-        'billing_city', 'billing_county', 'billing_name', 'billing_phone',
-        'billing_state', 'billing_zip_code', 'business_contact_name',
-        'business_email', 'business_phone', 'business_name', 'business_zip_code',
-        'business_address_line1', 'business_address_line2', 'business_city',
-        'business_state', 'legal_contact_name', 'legal_phone_line1', 'legal_name',
-        'country_code', 'merchant_category_code', 'merchant_category_description',
-        'merchant_website', 'merchant_phone', 'merchant_zip_code',
-        'standard_industrial_classification', 'sic_code', 'account_status',
-        'signature_amount', 'signature_volume', 'terminated_indicator',
-        'first_post_date', 'installation_date', 'last_cancel_date',
-        'last_post_date', 'last_status_date', 'last_settlement_date',
-        'business_address_change_date', 'business_phone_change_date',
-        'business_email_change_date'
-    ]
-    
-    if field.lower() not in [f.lower() for f in valid_fields]:
-        return create_response(400, {"error": f"Invalid field name. Allowed fields: {', '.join(valid_fields)}"})
-    
+    if metric_type != 'all':
+        # Get column names that match the metric type, the table's columns are read once per container
+        all_columns = probe_columns(cursor, "SELECT * FROM merchant_stats LIMIT 0")
+
+        selected_columns = [
+            col for prefix in METRIC_COLUMN_PREFIXES[metric_type] for col in all_columns if col.startswith(prefix)
+        ]
+        if not selected_columns:
+            raise RequestError(400, f"No columns found for metric type: {metric_type}")
+
+        query = f"""
+            SELECT merchant_number, bucket_date, {', '.join(selected_columns)}
+            FROM merchant_stats 
+            WHERE merchant_number = %s AND bucket_date = %s
+        """
+
+    stats = fetch_one(cursor, query, (merchant_number, bucket_date))
+    if not stats:
+        raise RequestError(404, f"Stats not found for merchant {merchant_number} with period {bucket_date}")
+    return {"item": stats}
+
+def filter_merchant_data(cursor, args: Dict) -> Dict:
+    """Filter merchant data by field"""
+    merchant_number, field = args['merchant_number'], args['filter']
     print(f"Filtering merchant data: {merchant_number}, field: {field}")
-    
-    try:
-        cursor.execute(
-            "SELECT %s FROM merchant_details WHERE merchant_number = %s",
-            (AsIs(field), merchant_number)
-        )
-        result = cursor.fetchone()
-        
-        if result:
-            return create_response(200, {"item": {field.lower(): result[0]}})
-        else:
-            return create_response(404, {"error": f"Merchant {merchant_number} not found"})
-    
-    except Exception as e:
-        print(f"Database error in filter_merchant_data: {str(e)}")
-        return create_response(500, {"error": f"Database error: {str(e)}"})
 
-def search_merchants(cursor, params: Dict) -> Dict:
-    """Search merchants by business name, category code, and status"""
-    business_name = params.get('business_name')
-    category_code = params.get('category_code')
-    status        = params.get('status')
-    page          = int(params.get('page', 1))
-    page_size     = int(params.get('page_size', 10))
+    cursor.execute(
+        "SELECT %s FROM merchant_details WHERE merchant_number = %s",
+        (AsIs(field), merchant_number)
+    )
+    result = cursor.fetchone()
+    if not result:
+        raise RequestError(404, f"Merchant {merchant_number} not found")
+    return {"item": {field: result[0]}}
+
+def build_merchant_search(args: Dict) -> Dict:
+    """Build the page and total count queries of a merchant search"""
+    business_name = args['business_name']
+    category_code = args['category_code']
+    status        = args['status']
+    page          = args['page']
+    page_size     = args['page_size']
     
     print(f"Searching merchants - Business name: {business_name}, Category: {category_code}, Status: {status}")
     
-    try:
-        query = "SELECT * FROM merchant_details WHERE 1=1"
-        conditions = []
-        values = []
-        
-        if business_name:
-            conditions.append("business_name ILIKE %s")
-            values.append(f'%{business_name}%')
-        
-        if category_code:
-            conditions.append("merchant_category_code = %s")
-            values.append(category_code)
-        
-        if status:
-            conditions.append("merchant_id_status = %s")
-            values.append(status)
-        
-        if conditions:
-            query += " AND " + " AND ".join(conditions)
-        
-        # Add pagination
-        offset = (page - 1) * page_size
-        query += " LIMIT %s OFFSET %s"
-        values.extend([page_size, offset])
-        
-        cursor.execute(query, tuple(values))
-        results = cursor.fetchall()
-        
-        # Get total count
-        count_query = "SELECT COUNT(*) FROM merchant_details WHERE 1=1"
-        if conditions:
-            count_query += " AND " + " AND ".join(conditions)
-        cursor.execute(count_query, tuple(values[:-2]) if values else ())
-        total_count = cursor.fetchone()[0]
-        
-        if results:
-            columns = [desc[0].lower() for desc in cursor.description]
-            merchants = [dict(zip(columns, row)) for row in results]
-            
-            return create_response(200, {
-                "item": {
-                    "merchants": merchants,
-                    "pagination": {
-                        "total": total_count,
-                        "page": page,
-                        "page_size": page_size,
-                        "pages": (total_count + page_size - 1) // page_size
-                    }
-                }
-            })
-        else:
-            return create_response(200, {
-                "item": {
-                    "merchants": [],
-                    "pagination": {
-                        "total": 0,
-                        "page": page,
-                        "page_size": page_size,
-                        "pages": 0
-                    }
-                }
-            })
+    query = f"SELECT {args['fields']} FROM merchant_details WHERE 1=1"
+    conditions = []
+    values = []
     
-    except Exception as e:
-        print(f"Database error in search_merchants: {str(e)}")
-        return create_response(500, {"error": f"Database error: {str(e)}"})
+    if business_name:
+        conditions.append("business_name ILIKE %s")
+        values.append(f'%{business_name}%')
     
-def filter_transactions(cursor, params: Dict) -> Dict:
-    """Filter transactions by field and value"""
-    table = params.get('table', 'authorizations')
-    field = params.get('field')
-    value = params.get('value')
+    if category_code:
+        conditions.append("merchant_category_code = %s")
+        values.append(category_code)
     
-    if not field or value is None:
-        return create_response(400, {"error": "field and value parameters are required"})
+    if status:
+        conditions.append("merchant_id_status = %s")
+        values.append(status)
     
-    valid_tables = ['authorizations', 'settlements']
-    if table not in valid_tables:
-        return create_response(400, {"error": f"Invalid table name: {table}"})
+    if conditions:
+        query += " AND " + " AND ".join(conditions)
     
-    valid_fields = {
-        'authorizations': [
-            'merchant_number', 'account_number', 'amount', 'currency',
-            'transaction_type', 'payment_method', 'card_expiry_date',
-            'auth_code', 'transaction_datetime', 'approval_status',
-            'decline_reason'
-        ],
-        'settlements': [
-            'merchant_number', 'account_number', 'same_card',
-            'transaction_date', 'processed_amount', 'auth_amount',
-            'tran_id', 'transaction_type', 'transaction_status',
-            'card_issue_type', 'transaction_mode', 'payment_method',
-            'auth_code', 'auth_date', 'card_class'
-        ]
+    count_query = "SELECT COUNT(*) FROM merchant_details WHERE 1=1"
+    if conditions:
+        count_query += " AND " + " AND ".join(conditions)
+
+    # Add pagination
+    offset = (page - 1) * page_size
+    query += " LIMIT %s OFFSET %s"
+
+    return {
+        "page": page,
+        "page_size": page_size,
+        "query": query,
+        "values": tuple(values + [page_size, offset]),
+        "count_query": count_query,
+        "count_values": tuple(values)
     }
-    
-    if field not in valid_fields[table]:
-        return create_response(400, {
-            "error": f"Invalid field name for {table}. Allowed fields: {', '.join(valid_fields[table])}"
-        })
-    
+
+def merchant_search_response(search: Dict, merchants: List[Dict], total_count: int) -> Dict:
+    """Build the paginated search response body from the page rows and the total count"""
+    page, page_size = search["page"], search["page_size"]
+
+    return {
+        "item": {
+            "merchants": merchants,
+            "pagination": {
+                "total": total_count if merchants else 0,
+                "page": page,
+                "page_size": page_size,
+                "pages": (total_count + page_size - 1) // page_size if merchants else 0
+            }
+        }
+    }
+
+def search_merchants(cursor, args: Dict) -> Dict:
+    """Search merchants by business name, category code, and status"""
+    search = build_merchant_search(args)
+    merchants = fetch_all(cursor, search["query"], search["values"])
+
+    # Get total count
+    cursor.execute(search["count_query"], search["count_values"])
+    total_count = cursor.fetchone()[0]
+
+    return merchant_search_response(search, merchants, total_count)
+
+async def search_merchants_async(args: Dict) -> Dict:
+    """search_merchants with the page and total count queries running concurrently"""
+    search = build_merchant_search(args)
+    (columns, results), (_, count_row) = await async_db.fetch_concurrently(get_db_secret(), [
+        (search["query"], search["values"], False),
+        (search["count_query"], search["count_values"], True)
+    ])
+
+    return merchant_search_response(search, [dict(zip(columns, row)) for row in results], count_row[0])
+
+def get_merchant_risk_summary(cursor, args: Dict) -> Dict:
+    """Get the precomputed risk summary of a merchant by merchant number"""
+    merchant_number = args['merchant_number']
+    print(f"Getting risk summary for merchant: {merchant_number}")
+
+    query = f"SELECT {args['fields']} FROM merchant_risk_summary WHERE merchant_number = %s"
+    summary = fetch_one(cursor, query, (merchant_number,))
+    if not summary:
+        raise RequestError(404, f"Risk summary not found for merchant {merchant_number}")
+    return {"item": summary}
+
+def filter_transactions(cursor, args: Dict) -> Dict:
+    """Filter transactions by field and value"""
+    table, field, value = args['table'], args['field'], args['value']
+
+    if field not in FILTER_FIELDS[table]:
+        raise RequestError(400, f"Invalid field name for {table}. Allowed fields: {', '.join(FILTER_FIELDS[table])}")
+
+    # The selectable columns depend on the table, so `fields` is validated here
+    try:
+        columns = select_columns(args['fields'] or '', TRANSACTION_COLUMNS[table])
+    except ValueError as e:
+        raise RequestError(400, str(e))
+
     print(f"Filtering {table} where {field} = {value}")
-    
+
+    # Order by the plain date column so a (<field>, <date> DESC) index can serve the top-N read,
+    # a CASE expression can't use any index and names a column settlements doesn't have
+    date_field = DATE_FIELDS[table]
+    query = f"""
+        SELECT {columns} FROM {table} 
+        WHERE {field} = %s 
+        ORDER BY {date_field} DESC 
+        LIMIT 100
+    """
+    transactions = fetch_all(cursor, query, (value,))
+    if not transactions:
+        raise RequestError(404, f"No transactions found with {field}={value}")
+    return {"items": transactions, "count": len(transactions)}
+
+def get_transactions_by_merchant(cursor, args: Dict, table: str) -> Dict:
+    """Get the most recent transactions for a merchant with optional date range and limit"""
+    merchant_number, date_from, date_to, limit = args['merchant_number'], args['date_from'], args['date_to'], args['limit']
+    print(f"Getting {limit} most recent {table} transactions for merchant: {merchant_number}")
+
+    date_field = DATE_FIELDS[table]
+    query = f"SELECT {args['fields']} FROM {table} WHERE merchant_number = %s"
+    values = [merchant_number]
+
+    if date_from and date_to:
+        query += f" AND {date_field} BETWEEN %s AND %s"
+        values.extend([date_from, date_to])
+    elif date_from:
+        query += f" AND {date_field} >= %s"
+        values.append(date_from)
+    elif date_to:
+        query += f" AND {date_field} <= %s"
+        values.append(date_to)
+
+    # Top-N read of the (merchant_number, date DESC) index, stops after `limit` rows
+    query += f" ORDER BY {date_field} DESC LIMIT %s"
+    values.append(limit)
+
+    transactions = fetch_all(cursor, query, tuple(values))
+    if not transactions:
+        raise RequestError(404, f"No transactions found for merchant {merchant_number}")
+    return {"items": transactions}
+
+def get_authorizations(cursor, args: Dict) -> Dict:
+    return get_transactions_by_merchant(cursor, args, "authorizations")
+
+def get_settlements(cursor, args: Dict) -> Dict:
+    return get_transactions_by_merchant(cursor, args, "settlements")
+
+def transaction_params(table: str) -> Tuple[Param, ...]:
+    return (
+        MERCHANT_NUMBER,
+        Param('date_from'),
+        Param('date_to'),
+        Param(
+            'limit',
+            type=int_between(1, MAX_TRANSACTION_LIMIT),
+            default=MAX_TRANSACTION_LIMIT,
+            error=f"limit must be an integer between 1 and {MAX_TRANSACTION_LIMIT}"
+        ),
+        fields_param(TRANSACTION_COLUMNS[table]),
+        RESPONSE_FORMAT
+    )
+
+# Route table shared by lambda_handler and the query-data service (asgi.py)
+ROUTES = registry(
+    Route("/api/merchant/details", get_merchant_details, (
+        MERCHANT_NUMBER,
+        fields_param(MERCHANT_DETAILS_COLUMNS)
+    )),
+    Route("/api/merchant/stats", get_merchant_stats, (
+        MERCHANT_NUMBER,
+        Param('stat_date', required=True),
+        fields_param(MERCHANT_STATS_COLUMNS)
+    )),
+    Route("/api/merchant/filter-stats", filter_merchant_stats, (
+        MERCHANT_NUMBER,
+        Param('stat_date'),
+        Param(
+            'metric_type',
+            type=str.lower,
+            default='all',
+            choices=['all', *METRIC_COLUMN_PREFIXES],
+            error=f"Invalid metric type. Allowed values: {', '.join(METRIC_COLUMN_PREFIXES)}"
+        )
+    )),
+    Route("/api/merchant/filter-data", filter_merchant_data, (
+        MERCHANT_NUMBER,
+        Param('filter', type=filter_field, required=True)
+    )),
+    Route("/api/merchant/search", search_merchants, (
+        Param('business_name'),
+        Param('category_code'),
+        Param('status'),
+        Param('page', type=int_between(1), default=1, error="page must be a positive integer"),
+        Param('page_size', type=int_between(1), default=10, error="page_size must be a positive integer"),
+        fields_param(MERCHANT_DETAILS_COLUMNS)
+    ), async_handler=search_merchants_async),
+    Route("/api/merchant/risk-summary", get_merchant_risk_summary, (
+        MERCHANT_NUMBER,
+        fields_param(MERCHANT_RISK_SUMMARY_COLUMNS)
+    )),
+    Route("/api/transaction/authorization", get_authorizations, transaction_params('authorizations')),
+    Route("/api/transaction/settlement", get_settlements, transaction_params('settlements')),
+    Route("/api/transaction/filter", filter_transactions, (
+        Param(
+            'table',
+            default='authorizations',
+            choices=list(FILTER_FIELDS),
+            error=f"Invalid table name. Allowed values: {', '.join(FILTER_FIELDS)}"
+        ),
+        Param('field', required=True),
+        Param('value', required=True),
+        Param('fields'),
+        RESPONSE_FORMAT
+    ))
+)
+
+def run_route(route: Route, cursor, args: Dict) -> Dict:
+    """Run a route with parsed arguments and build its response"""
     try:
-        query = f"""
-            SELECT * FROM {table} 
-            WHERE {field} = %s 
-            ORDER BY 
-                CASE 
-                    WHEN '{table}' = 'authorizations' THEN transaction_datetime 
-                    ELSE transaction_date 
-                END DESC 
-            LIMIT 100
-        """
-        cursor.execute(query, (value,))
-        results = cursor.fetchall()
-        
-        if results:
-            columns = [desc[0].lower() for desc in cursor.description]
-            transactions = [dict(zip(columns, row)) for row in results]
-            return create_response(200, {
-                "items": transactions,
-                "count": len(transactions)
-            })
-        else:
-            return create_response(404, {"error": f"No transactions found with {field}={value}"})
-    
+        body = route.handler(cursor, args)
+    except RequestError as e:
+        return create_response(e.status_code, {"error": e.message})
     except Exception as e:
-        print(f"Database error in filter_transactions: {str(e)}")
+        print(f"Database error in {route.handler.__name__}: {str(e)}")
         return create_response(500, {"error": f"Database error: {str(e)}"})
+    return create_response(200, body, args.get('format') or 'records')
 
-def get_transactions_by_merchant(cursor, params: Dict, table: str) -> Dict:
-    """Get transactions for a merchant with optional date range"""
-    merchant_number = params.get('merchant_number')
-    date_from = params.get('date_from')
-    date_to = params.get('date_to')
-    
-    if not merchant_number:
-        return create_response(400, {"error": "merchant_number parameter is required"})
-    
-    valid_tables = ['authorizations', 'settlements']
-    if table not in valid_tables:
-        return create_response(400, {"error": f"Invalid table name: {table}"})
-    
-    print(f"Getting {table} transactions for merchant: {merchant_number}")
-    
+def route_request(conn, route: Route, args: Dict) -> Dict:
+    """Run a route on a cursor of the given connection"""
+    cursor = conn.cursor()
     try:
-        date_field = "transaction_datetime" if table == "authorizations" else "transaction_date"
-        
-        query = f"SELECT * FROM {table} WHERE merchant_number = %s"
-        values = [merchant_number]
-        
-        if date_from and date_to:
-            query += f" AND {date_field} BETWEEN %s AND %s"
-            values.extend([date_from, date_to])
-        elif date_from:
-            query += f" AND {date_field} >= %s"
-            values.append(date_from)
-        elif date_to:
-            query += f" AND {date_field} <= %s"
-            values.append(date_to)
-        
-        query += f" ORDER BY {date_field} DESC LIMIT 100"
-        
-        cursor.execute(query, tuple(values))
-        results = cursor.fetchall()
-        
-        if results:
-            columns = [desc[0].lower() for desc in cursor.description]
-            transactions = [dict(zip(columns, row)) for row in results]
-            return create_response(200, {"items": transactions})
-        else:
-            return create_response(404, {"error": f"No transactions found for merchant {merchant_number}"})
-    
+        return run_route(route, cursor, args)
+    finally:
+        cursor.close()
+
+async def run_route_async(route: Route, args: Dict) -> Dict:
+    """Run the async variant of a route on the async_db pool"""
+    try:
+        body = await route.async_handler(args)
+    except RequestError as e:
+        return create_response(e.status_code, {"error": e.message})
     except Exception as e:
-        print(f"Database error in get_transactions_by_merchant: {str(e)}")
+        print(f"Database error in {route.async_handler.__name__}: {str(e)}")
         return create_response(500, {"error": f"Database error: {str(e)}"})
+    return create_response(200, body, args.get('format') or 'records')
+
+def accepts_gzip(headers: Dict) -> bool:
+    """Check the request Accept-Encoding header for gzip (or *) without a zero q-value"""
+    accept_encoding = next((value for name, value in (headers or {}).items() if name.lower() == 'accept-encoding'), '')
+    for coding in accept_encoding.lower().replace(' ', '').split(','):
+        name, _, quality = coding.partition(';q=')
+        try:
+            weight = float(quality) if quality else 1.0
+        except ValueError:
+            weight = 1.0
+        if name in ('gzip', '*') and weight > 0:
+            return True
+    return False
+
+def compress_response(response: Dict, headers: Dict) -> Dict:
+    """
+    Gzip the response body when the client accepts it and the body is large enough.
+    The compressed body is base64 encoded for API Gateway, which returns it as binary.
+    """
+    body = response.get('body')
+    if not body or len(body) < COMPRESSION_MIN_BYTES or not accepts_gzip(headers):
+        return response
+
+    compressed = gzip.compress(body.encode('utf-8'), compresslevel=6)
+    return {
+        **response,
+        'headers': {**response['headers'], 'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'},
+        'body': base64.b64encode(compressed).decode('ascii'),
+        'isBase64Encoded': True
+    }
+
+def to_columnar(items: List[Dict]) -> Dict:
+    """Encode a list of row dicts as a column header plus row arrays"""
+    columns = list(items[0].keys()) if items else []
+    return {"columns": columns, "rows": [list(item.values()) for item in items]}
 
-def create_response(status_code: int, body: Dict) -> Dict:
+def create_response(status_code: int, body: Dict, response_format: str = 'records') -> Dict:
     """
     Create a formatted response for API Gateway.
+
+    With the columnar format a list of rows under "items" is sent as
+    {"columns": [...], "rows": [[...], ...]} and the body is tagged with "format": "columnar".
     """
+    if response_format == 'columnar' and isinstance(body.get('items'), list):
+        body = {**body, "items": to_columnar(body["items"]), "format": "columnar"}
+
     return {
         'statusCode': status_code,
         'headers': {
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*'
         },
-        'body': json.dumps(body, default=str)
+        'body': dumps(body)
     }
\ No newline at end of file
@@ -0,0 +1,145 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+"""
+Declarative route registry for query-data
+
+Each Route names its API path, its handler and a typed schema of its query string
+parameters. Parameters are parsed and validated before the handler runs (and before a
+database connection is opened), so handlers receive typed arguments and only build and
+run their query. Handlers return the response body and raise RequestError for 4xx
+outcomes; handler.py turns both into API Gateway responses.
+
+Result rows are mapped to dicts with the column names of their query shape, read from
+cursor.description the first time a query text runs and reused while the query returns as
+many columns. Long-lived processes (the query-data service, the MCP servers' direct backend)
+thereby pick up columns a migration adds to or drops from a SELECT * without a restart.
+"""
+
+class RequestError(Exception):
+    """
+    A request the route can't serve, returned to the caller as {"error": message}
+
+    Attributes:
+        status_code: HTTP status code of the response
+        message: Descriptive error message
+    """
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(message)
+
+@dataclass(frozen=True)
+class Param:
+    """
+    A query string parameter of a route
+
+    `type` converts the raw string and raises ValueError on invalid input, its message is
+    returned unless `error` is set. Raw values that aren't strings (e.g. from a JSON body)
+    and make `type` raise TypeError or AttributeError are rejected the same way. Missing or
+    empty parameters take `default`.
+    """
+    name: str
+    type: Callable[[str], Any] = str
+    required: bool = False
+    default: Any = None
+    choices: Optional[Sequence] = None
+    error: Optional[str] = None
+
+    def parse(self, params: Dict) -> Any:
+        raw = params.get(self.name)
+        if raw is None or raw == '':
+            if self.required:
+                raise RequestError(400, f"{self.name} parameter is required")
+            return self.default
+
+        try:
+            value = self.type(raw)
+        except ValueError as e:
+            raise RequestError(400, self.error or str(e))
+        except (TypeError, AttributeError):
+            raise RequestError(400, self.error or f"Invalid {self.name}")
+
+        if self.choices is not None and value not in self.choices:
+            raise RequestError(400, self.error or f"Invalid {self.name}. Allowed values: {', '.join(self.choices)}")
+        return value
+
+@dataclass(frozen=True)
+class Route:
+    """
+    An API path served by `handler(cursor, args)`, or by `async_handler(args)` on the
+    async_db pool when it is enabled. Both return the response body.
+    """
+    path: str
+    handler: Callable[[Any, Dict], Dict]
+    params: Tuple[Param, ...] = ()
+    async_handler: Optional[Callable] = None
+
+    def parse(self, params: Dict) -> Dict:
+        """Typed arguments of the handler, raises RequestError(400) on invalid parameters"""
+        return {param.name: param.parse(params) for param in self.params}
+
+def registry(*routes: Route) -> Dict[str, Route]:
+    """Index routes by lowercase path for a single dict lookup per request"""
+    table = {}
+    for route in routes:
+        path = route.path.lower()
+        if path in table:
+            raise ValueError(f"Duplicate route: {path}")
+        table[path] = route
+    return table
+
+def int_between(low: int, high: Optional[int] = None) -> Callable[[str], int]:
+    """Parameter type for an integer in [low, high]"""
+    def parse(raw: str) -> int:
+        value = int(raw)
+        if value < low or (high is not None and value > high):
+            raise ValueError(f"{value} out of range")
+        return value
+    return parse
+
+# Column names by query text; bounded because `fields` selections make the texts open-ended
+MAX_QUERY_SHAPES = 1024
+_columns_by_query: Dict[str, Tuple[str, ...]] = {}
+# LIMIT 0 probes are re-run after this long, they have no result to check the cached columns against
+PROBE_TTL_SECONDS = float(os.environ.get('COLUMN_PROBE_TTL_SECONDS', '300'))
+_probed_at: Dict[str, float] = {}
+
+def columns_of(cursor, query: str) -> Tuple[str, ...]:
+    """Lowercase column names of the query just executed on `cursor`"""
+    columns = _columns_by_query.get(query)
+    # A different column count means the table changed since the names were cached
+    if columns is None or len(columns) != len(cursor.description):
+        if len(_columns_by_query) >= MAX_QUERY_SHAPES:
+            _columns_by_query.clear()
+        columns = _columns_by_query[query] = tuple(desc[0].lower() for desc in cursor.description)
+    return columns
+
+def probe_columns(cursor, query: str) -> Tuple[str, ...]:
+    """Column names of a LIMIT 0 probe query, executed at most every PROBE_TTL_SECONDS"""
+    now = time.monotonic()
+    if query not in _columns_by_query or now - _probed_at.get(query, 0.0) >= PROBE_TTL_SECONDS:
+        cursor.execute(query)
+        _probed_at[query] = now
+        _columns_by_query.pop(query, None)
+    return columns_of(cursor, query)
+
+def fetch_one(cursor, query: str, values: Sequence = ()) -> Optional[Dict]:
+    """Run a query and return its first row as a dict, None without rows"""
+    cursor.execute(query, values)
+    row = cursor.fetchone()
+    return dict(zip(columns_of(cursor, query), row)) if row else None
+
+def fetch_all(cursor, query: str, values: Sequence = ()) -> List[Dict]:
+    """Run a query and return its rows as dicts"""
+    cursor.execute(query, values)
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+    columns = columns_of(cursor, query)
+    return [dict(zip(columns, row)) for row in rows]
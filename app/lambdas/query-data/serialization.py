@@ -0,0 +1,62 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import psycopg2.extensions
+
+"""
+Response serialization for query-data
+
+dumps() encodes response bodies with orjson when it is installed and falls back to the
+standard library otherwise. JSON_SERIALIZER=json forces the standard library backend.
+Both backends produce the same compact JSON: dates and timestamps as ISO 8601 strings
+and NUMERIC values as strings so amounts keep their exact database precision.
+"""
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SERIALIZER = os.environ.get('JSON_SERIALIZER', 'orjson' if orjson else 'json')
+
+# Return NUMERIC columns as their text representation instead of decimal.Decimal,
+# so no Decimal objects are created on fetch and no fallback callback runs on dump
+NUMERIC_AS_STR = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    'NUMERIC_AS_STR',
+    lambda value, cursor: value
+)
+
+def register_numeric_as_str(conn) -> None:
+    """Register the NUMERIC-as-text typecaster on a psycopg2 connection"""
+    psycopg2.extensions.register_type(NUMERIC_AS_STR, conn)
+
+def default(value):
+    """Encode values neither backend handles natively"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+def dumps_json(body) -> str:
+    """Standard library backend"""
+    return json.dumps(body, default=default, separators=(',', ':'))
+
+def dumps_orjson(body) -> str:
+    """orjson backend: datetime/date/time are encoded natively in C"""
+    return orjson.dumps(body, default=default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+SERIALIZERS = {'json': dumps_json}
+if orjson:
+    SERIALIZERS['orjson'] = dumps_orjson
+
+if SERIALIZER not in SERIALIZERS:
+    raise ValueError(f"JSON_SERIALIZER must be one of: {', '.join(SERIALIZERS)}")
+
+dumps = SERIALIZERS[SERIALIZER]
@@ -0,0 +1,141 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from strands.hooks import BeforeModelCallEvent, BeforeToolCallEvent, HookProvider, HookRegistry
+
+"""
+Model turn, tool call and deadline budgets of sub-agents
+
+An unbounded agent loop is the largest source of tail latency and cost, so every sub-agent
+runs under a budget of model turns, tool calls and wall-clock time (the Lambda's remaining
+time). Budgets end the loop gracefully: once a budget is spent further tool calls are
+cancelled with a message asking the model to answer with what it has, and only if it keeps
+going is the run cancelled, returning the best answer available at that point.
+
+Defaults come from AGENT_MAX_MODEL_TURNS and AGENT_MAX_TOOL_CALLS, per action group from
+the "budget" of ACTION_GROUP_DETAIL and AGENT_BUDGETS, e.g.
+AGENT_BUDGETS='{"internet_agent": {"max_model_turns": 4, "max_tool_calls": 6}}'.
+"""
+
+logger = logging.getLogger()
+
+MAX_MODEL_TURNS = int(os.getenv('AGENT_MAX_MODEL_TURNS', '8'))
+MAX_TOOL_CALLS = int(os.getenv('AGENT_MAX_TOOL_CALLS', '10'))
+# Seconds before the deadline from which tools are no longer called, leaving time to answer
+WRAP_UP_SECONDS = float(os.getenv('AGENT_WRAP_UP_SECONDS', '10'))
+BUDGET_OVERRIDES = json.loads(os.getenv('AGENT_BUDGETS', '{}'))
+
+WRAP_UP_MESSAGE = "The {budget} budget of this task is spent. Do not call any more tools: answer now with the information gathered so far, and say what could not be checked."
+
+def budget_limits(action_group: str, budget: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Effective limits of an action group: defaults, its ACTION_GROUP_DETAIL budget, then AGENT_BUDGETS"""
+    return {
+        'max_model_turns': MAX_MODEL_TURNS,
+        'max_tool_calls': MAX_TOOL_CALLS,
+        **(budget or {}),
+        **BUDGET_OVERRIDES.get(action_group, {})
+    }
+
+class AgentBudget(HookProvider):
+    """
+    Hook provider enforcing the budget of one sub-agent run
+
+    Attributes:
+        exhausted: The first budget spent ("model_turns", "tool_calls" or "deadline"), None if none was
+        model_turns, tool_calls: Model turns started and tool calls allowed so far
+        answered_messages: Length of the conversation when the run was cancelled, the messages
+            added afterwards only record the cancellation
+    """
+    def __init__(self, max_model_turns: int = MAX_MODEL_TURNS, max_tool_calls: int = MAX_TOOL_CALLS, deadline: Optional[float] = None):
+        self.max_model_turns = max_model_turns
+        self.max_tool_calls = max_tool_calls
+        self.deadline = deadline
+        self.model_turns = 0
+        self.tool_calls = 0
+        self.exhausted: Optional[str] = None
+        self.answered_messages: Optional[int] = None
+        self._timer: Optional[threading.Timer] = None
+
+    def register_hooks(self, registry: HookRegistry, **kwargs) -> None:
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+        registry.add_callback(BeforeToolCallEvent, self.before_tool_call)
+
+    def spend(self, budget: str) -> None:
+        if self.exhausted is None:
+            self.exhausted = budget
+            logger.info(f"Agent {budget} budget spent after {self.model_turns} model turns and {self.tool_calls} tool calls")
+
+    def cancel(self, agent, budget: str) -> None:
+        self.spend(budget)
+        # Agent.cancel() is only available in recent strands releases
+        if hasattr(agent, 'cancel'):
+            if self.answered_messages is None:
+                self.answered_messages = len(agent.messages)
+            agent.cancel()
+
+    def before_model_call(self, event: BeforeModelCallEvent) -> None:
+        self.model_turns += 1
+        if self.model_turns > self.max_model_turns:
+            # The model already had its last turn to answer
+            self.cancel(event.agent, 'model_turns')
+
+    def before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        if self.tool_calls >= self.max_tool_calls:
+            budget = 'tool_calls'
+        elif self.model_turns >= self.max_model_turns - 1:
+            # Only the last turn is left, to answer from the results gathered so far
+            budget = 'model_turns'
+        elif self.deadline and time.time() >= self.deadline - WRAP_UP_SECONDS:
+            budget = 'deadline'
+        else:
+            self.tool_calls += 1
+            return
+
+        self.spend(budget)
+        event.cancel_tool = WRAP_UP_MESSAGE.format(budget=budget.replace('_', ' '))
+
+    def start(self, agent) -> None:
+        """Cancel the run at the deadline if it is still going"""
+        if self.deadline:
+            self._timer = threading.Timer(max(self.deadline - time.time(), 0), self.cancel, (agent, 'deadline'))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+
+def best_available(messages: List[Dict[str, Any]], budget: Optional[AgentBudget] = None) -> str:
+    """
+    Best answer of a run stopped early: the latest assistant text, or the text of the tool
+    results gathered so far when they are newer
+    """
+    if budget is not None and budget.answered_messages is not None:
+        messages = messages[:budget.answered_messages]
+    for message in reversed(messages):
+        if any('toolResult' in block for block in message.get('content', [])):
+            # Tool results are newer than any text the model wrote
+            break
+        if message.get('role') == 'assistant':
+            text = '\n'.join(block['text'] for block in message.get('content', []) if block.get('text'))
+            if text:
+                return text
+
+    results = []
+    for message in messages:
+        for block in message.get('content', []):
+            if block.get('toolResult', {}).get('status') != 'success':
+                continue
+            for content in block['toolResult'].get('content', []):
+                if content.get('text'):
+                    results.append(content['text'])
+                elif 'json' in content:
+                    results.append(json.dumps(content['json'], default=str))
+    return '\n'.join(results)
@@ -4,14 +4,23 @@
 import os
 import json
 import logging
-from typing import Dict, Any
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Any, Iterator, Optional
+# Every invocation builds an Agent on an MCPClient, so these load during the Lambda's init;
+# the model provider and MCP transports are imported where they are used, only the ones an
+# invocation needs are loaded (see test/perf/cold-start-profile.txt)
 from strands import Agent
-from strands.models import BedrockModel
 from strands.tools.mcp import MCPClient
-from mcp.client.streamable_http import streamablehttp_client
-from mcp.client.sse import sse_client
 from pydantic import ValidationError
 
+import budgets
+import response_cache
+import timing
+import tool_selection
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -23,72 +32,188 @@ FETCH_ALB_DNS = os.getenv('FETCH_ALB_DNS')
 MCP_PATH = os.getenv('MCP_PATH')
 
 MODEL_ID =  os.getenv('AGENT_MODEL') 
+# AGENT_MODEL=stub://scripted replays scripted tool calls and answers instead of calling Bedrock, see stub_model.py
+STUB_MODEL_SCHEME = 'stub://'
+# Bedrock prompt caching of the prefix every sub-agent turn resends (tool specs, then system prompt):
+# auto caches it for the model families below, on forces tools and system prompt caching, off disables it
+PROMPT_CACHING = os.getenv('AGENT_PROMPT_CACHING', 'auto')
+# Model family -> whether it accepts a cache point on the tool specs as well as on the system prompt
+PROMPT_CACHING_MODELS = {'anthropic.claude': True, 'amazon.nova': False}
+# Seconds of the Lambda's remaining time kept back to format and return the response
+DEADLINE_MARGIN_SECONDS = float(os.getenv('DEADLINE_MARGIN_SECONDS', '2'))
 ACTION_GROUP_DETAIL = {
     "merchant_portfolio_agent": {
         "prompt": "This agent can answer questions related to merchants portfolio and fetch data such as the merchant name, address, website, phone number and other merchant metadata",
-        "endpoint": f"http://{MERCH_ALB_DNS}{MCP_PATH}"
+        "endpoint": f"http://{MERCH_ALB_DNS}{MCP_PATH}",
+        "budget": {"max_model_turns": 4, "max_tool_calls": 4}
     },
     "merchant_stats_agent": {
         "prompt": "This agent can answer questions related to merchants aggregated data such as total sales for the last 12 month (year), month, daily. and average chargeback, total decline transactions",
-        "endpoint": f"http://{MERCH_ALB_DNS}{MCP_PATH}"
+        "endpoint": f"http://{MERCH_ALB_DNS}{MCP_PATH}",
+        "budget": {"max_model_turns": 6, "max_tool_calls": 6}
     },
     "transaction_agent": {
         "prompt": "This agent can answer questions related to raw transactions that the merchant process such as authorizations and settlements data but it can't answer questions about merchant aggregated data such average, total , min, max transactions",
-        "endpoint": f"http://{TRANS_ALB_DNS}{MCP_PATH}"
+        "endpoint": f"http://{TRANS_ALB_DNS}{MCP_PATH}",
+        "budget": {"max_model_turns": 6, "max_tool_calls": 8}
     },
     "internet_agent": {
         "prompt": "This agent answer questions about online data related to the merchant such as- perform online searches and fetch different website sites content. for online search use the brave_web_search tool, for fetching a specific web page use the fetch tool",
         "endpoint": [
             f"http://{SEARCH_ALB_DNS}/sse",
             f"http://{FETCH_ALB_DNS}/sse"
-        ]
+        ],
+        "budget": {"max_model_turns": 6, "max_tool_calls": 8}
     }
 }
 
-def call_agent(endpoint, system_prompt, query):
-    # Bedrock model configuration
-    bedrock_model = BedrockModel(
+# investigate request body properties and the action group each one queries
+INVESTIGATION_QUERIES = {
+    "merchant_portfolio_query": "merchant_portfolio_agent",
+    "merchant_stats_query": "merchant_stats_agent",
+    "transaction_query": "transaction_agent",
+    "internet_query": "internet_agent"
+}
+MAX_PARALLEL_AGENTS = int(os.getenv('MAX_PARALLEL_AGENTS', '4'))
+
+class StreamingCallbackHandler:
+    """
+    Agent callback handler passing model tokens and tool calls on as they stream in
+
+    Replaces the strands default handler, which prints every token to stdout. Logs the time
+    to the first token and every tool call, and hands {"type": "token" | "tool", ...} events
+    to `on_event` when set.
+    """
+    def __init__(self, action_group: str, on_event: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.action_group = action_group
+        self.on_event = on_event
+        self.started = time.perf_counter()
+        self.first_token_ms = None
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        if self.on_event:
+            self.on_event({'action_group': self.action_group, **event})
+
+    def __call__(self, **kwargs):
+        data = kwargs.get('data')
+        tool_use = kwargs.get('event', {}).get('contentBlockStart', {}).get('start', {}).get('toolUse')
+
+        if data:
+            if self.first_token_ms is None:
+                self.first_token_ms = round((time.perf_counter() - self.started) * 1000, 1)
+                logger.info(f"{self.action_group} first token after {self.first_token_ms:.0f} ms")
+            self.emit({'type': 'token', 'text': data})
+
+        if tool_use:
+            logger.info(f"{self.action_group} calling tool {tool_use['name']}")
+            self.emit({'type': 'tool', 'name': tool_use['name']})
+
+def prompt_caching_config(model_id):
+    """BedrockModel settings caching the tool specs and system prompt, empty when caching is off or unsupported"""
+    if PROMPT_CACHING == 'off':
+        return {}
+    cache_tools = PROMPT_CACHING == 'on' or next(
+        (tools for family, tools in PROMPT_CACHING_MODELS.items() if family in (model_id or '')), None
+    )
+    if cache_tools is None:
+        return {}
+    try:
+        from strands.models import CacheConfig
+        # Support was checked above, so place the cache points without strands' own model check,
+        # which also caches the conversation so far for the agent loop's next turn
+        return {'cache_config': CacheConfig(strategy='anthropic', system_prompt_ttl=True, tools_ttl=cache_tools)}
+    except (ImportError, TypeError):
+        # strands releases without CacheConfig place the cache points from these settings
+        return {'cache_prompt': 'default', **({'cache_tools': 'default'} if cache_tools else {})}
+
+def create_model():
+    """The model of a sub-agent: Bedrock, or the scripted stub for offline performance tests"""
+    if MODEL_ID and MODEL_ID.startswith(STUB_MODEL_SCHEME):
+        import stub_model
+        return stub_model.from_uri(MODEL_ID)
+
+    from strands.models import BedrockModel
+    return BedrockModel(
         model_id=MODEL_ID,
         temperature=0.3,
         streaming=True,
+        **prompt_caching_config(MODEL_ID)
     )
 
+def run_agent(agent, query, budget):
+    budget.start(agent)
+    try:
+        return agent(query)
+    finally:
+        budget.stop()
+
+def call_agent(endpoint, system_prompt, query, deadline=None, callback_handler=None, trace=None, budget=None):
+    trace = trace or timing.AgentTrace('unknown')
+    budget = budget or budgets.AgentBudget(deadline=deadline)
+
+    # Bedrock model configuration
+    bedrock_model = create_model()
+
+    # MCP servers bound their upstream retries by the invocation's deadline (unix epoch seconds)
+    headers = {"X-Request-Deadline": f"{deadline:.3f}"} if deadline else None
+
     # Connect to MCP client
     try:
         if isinstance(endpoint, str):
-            mcp_client = MCPClient(lambda: streamablehttp_client(endpoint))
+            from mcp.client.streamable_http import streamablehttp_client
+            mcp_client = MCPClient(lambda: streamablehttp_client(endpoint, headers=headers))
+            connect_started = time.perf_counter()
             with mcp_client:
-                tools = mcp_client.list_tools_sync()
+                trace.phases['connect'] = timing.elapsed_ms(connect_started)
+                with trace.phase('list_tools'):
+                    tools = mcp_client.list_tools_sync()
+                tools = tool_selection.select_tools(trace.action_group, query, tools)
+                trace.tools_offered = len(tools)
                 agent = Agent(
                     model=bedrock_model,
                     tools=tools,
-                    system_prompt=system_prompt
+                    system_prompt=system_prompt,
+                    callback_handler=callback_handler,
+                    hooks=[budget]
                 )
-                response = agent(query)
+                response = run_agent(agent, query, budget)
+                trace.record_result(response)
 
         else:
             # Multiple endpoints
+            from mcp.client.sse import sse_client
             # mcp_client_search = MCPClient(lambda: streamablehttp_client(endpoint[0]))
             mcp_client_search = MCPClient(lambda: sse_client(endpoint[0]))
             # mcp_client_fetch = MCPClient(lambda: streamablehttp_client(endpoint[1]))
             mcp_client_fetch = MCPClient(lambda: sse_client(endpoint[1]))
             # Use both clients in a single with statement
+            connect_started = time.perf_counter()
             with mcp_client_search, mcp_client_fetch:
+                trace.phases['connect'] = timing.elapsed_ms(connect_started)
                 # Get tools from both clients
-                search_tools = mcp_client_search.list_tools_sync()
-                fetch_tools = mcp_client_fetch.list_tools_sync()
+                with trace.phase('list_tools'):
+                    search_tools = mcp_client_search.list_tools_sync()
+                    fetch_tools = mcp_client_fetch.list_tools_sync()
                 
                 # Combine tools
-                all_tools = search_tools + fetch_tools
+                all_tools = tool_selection.select_tools(trace.action_group, query, search_tools + fetch_tools)
+                trace.tools_offered = len(all_tools)
                 print("following prompt: {0}".format(system_prompt))
                 # Create agent with combined tools
                 agent = Agent(
                     model=bedrock_model,
                     tools=all_tools,
-                    system_prompt=system_prompt
+                    system_prompt=system_prompt,
+                    callback_handler=callback_handler,
+                    hooks=[budget]
                 )
-                response = agent(query)
-                
+                response = run_agent(agent, query, budget)
+                trace.record_result(response)
+
+        if budget.answered_messages is not None:
+            # The run was cancelled, its final message is missing or partial
+            return f"Stopped early, {budget.exhausted.replace('_', ' ')} budget spent. Best available answer:\n{budgets.best_available(agent.messages, budget)}"
+
         if hasattr(response, 'content'):
             return response.content
         elif hasattr(response, 'text'):
@@ -105,8 +230,121 @@ def call_agent(endpoint, system_prompt, query):
         logger.warning(f"Error occurred: {str(e)}")
         raise e
 
-def format_response(event: Dict[str, Any], status_code: int, body: Any) -> Dict[str, Any]:
-    """Helper function to format Lambda response"""
+def record_trace(trace: timing.AgentTrace, traces=None) -> None:
+    trace.finish().emit()
+    if traces is not None:
+        traces.append(trace.summary())
+
+def ask_agent(action_group: str, query: str, deadline=None, bypass_cache: bool = False, on_event=None, traces=None):
+    """
+    Answer a query with the action group's sub-agent, from the response cache when possible
+
+    With bypass_cache the sub-agent always runs, and its fresh answer replaces the cached one.
+    `on_event` receives the sub-agent's token and tool events while it runs. The call's
+    timing trace is logged as EMF and appended to `traces` when given.
+    """
+    trace = timing.AgentTrace(action_group)
+    if not bypass_cache:
+        cached = response_cache.cache.get(action_group, query)
+        if cached is not None:
+            trace.cached = True
+            record_trace(trace, traces)
+            return cached
+
+    details = ACTION_GROUP_DETAIL[action_group]
+    callback_handler = StreamingCallbackHandler(action_group, on_event)
+    budget = budgets.AgentBudget(**budgets.budget_limits(action_group, details.get('budget')), deadline=deadline)
+    try:
+        response = call_agent(details['endpoint'], details['prompt'], query, deadline, callback_handler, trace, budget)
+    finally:
+        trace.first_token_ms = callback_handler.first_token_ms
+        trace.budget_exhausted = budget.exhausted
+        record_trace(trace, traces)
+    # Answers cut short by a budget aren't worth reusing
+    if not budget.exhausted:
+        response_cache.cache.put(action_group, query, response)
+    return response
+
+def investigation_queries(properties: Dict[str, Any]) -> Dict[str, str]:
+    """Sub-agent queries of an investigate request by action group"""
+    return {
+        agent: properties[name]
+        for name, agent in INVESTIGATION_QUERIES.items() if properties.get(name)
+    }
+
+def investigate(sub_queries: Dict[str, str], deadline=None, bypass_cache: bool = False, on_event=None, traces=None) -> Dict[str, Any]:
+    """
+    Run the sub-agents of an investigation concurrently and merge their answers
+
+    Every sub-agent is a full agent loop waiting on Bedrock and its MCP servers, so running
+    them in threads brings the wall time down to the slowest one instead of the sum. A
+    sub-agent that fails or misses the deadline is reported under "errors" without failing
+    the others.
+
+    Args:
+        sub_queries: Query per action group, e.g. {"transaction_agent": "..."}
+        deadline: Unix epoch seconds the answers are needed by
+        bypass_cache: Run every sub-agent even when a cached answer exists
+        on_event: Receives the token and tool events of all sub-agents as they run
+        traces: Collects the timing trace of every sub-agent call
+
+    Returns:
+        {"results": {action group: answer}, "errors": {action group: message}}
+    """
+    results, errors = {}, {}
+    executor = ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_AGENTS, len(sub_queries)))
+    futures = {}
+    for action_group, query in sub_queries.items():
+        logger.info(f"Investigation calling {action_group} with query: {query}")
+        futures[executor.submit(ask_agent, action_group, query, deadline, bypass_cache, on_event, traces)] = action_group
+
+    done, _ = wait(futures, timeout=max(deadline - time.time(), 0) if deadline else None)
+    for future, action_group in futures.items():
+        if future not in done:
+            errors[action_group] = 'No answer before the deadline'
+            continue
+        try:
+            results[action_group] = future.result()
+        except Exception as e:
+            errors[action_group] = str(e)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(f"Investigation answered by {sorted(results)}, failed for {sorted(errors)}")
+    return {'results': results, 'errors': errors}
+
+def stream(operation: str, properties: Dict[str, Any], deadline=None, bypass_cache: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Run an operation and yield its events as they happen: the token and tool events of its
+    sub-agents, then {"type": "result", "body": ...} or {"type": "error", "error": ...}
+
+    Only used by local runs (__main__). The deployed Lambda answers the Bedrock action group
+    with one buffered response from lambda_handler.
+    """
+    if operation != 'investigate' and operation not in ACTION_GROUP_DETAIL:
+        yield {'type': 'error', 'error': f'Unknown operation: {operation}'}
+        return
+
+    events = queue.Queue()
+
+    def run():
+        try:
+            if operation == 'investigate':
+                body = investigate(investigation_queries(properties), deadline, bypass_cache, events.put)
+            else:
+                body = ask_agent(operation, properties['query'], deadline, bypass_cache, events.put)
+            events.put({'type': 'result', 'body': body})
+        except Exception as e:
+            events.put({'type': 'error', 'error': str(e)})
+
+    threading.Thread(target=run, daemon=True).start()
+    while True:
+        event = events.get()
+        yield event
+        if event['type'] in ('result', 'error'):
+            return
+
+def format_response(event: Dict[str, Any], status_code: int, body: Any, traces=None) -> Dict[str, Any]:
+    """Helper function to format Lambda response, with the sub-agent timing traces in sessionAttributes"""
     
     # Ensure body is JSON serializable
     if isinstance(body, str):
@@ -129,6 +367,8 @@ def format_response(event: Dict[str, Any], status_code: int, body: Any) -> Dict[
     }
 
     session_attributes = event.get('sessionAttributes', {})
+    if traces:
+        session_attributes = {**session_attributes, 'agent_timing': json.dumps(traces)}
     prompt_session_attributes = event.get('promptSessionAttributes', {})
     api_response = {
         'messageVersion': '1.0', 
@@ -165,11 +405,30 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         operation = event.get('apiPath')
         properties = parse_properties(event)
 
+        deadline = None
+        if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+            deadline = time.time() + context.get_remaining_time_in_millis() / 1000 - DEADLINE_MARGIN_SECONDS
+
+        # Timing traces of the sub-agent calls, returned in sessionAttributes
+        traces = []
+
+        # Set by the orchestrator when the investigator asks for fresh data, or by the UI for the session
+        bypass_cache = any(
+            str(flag).lower() == 'true'
+            for flag in (properties.get('bypass_cache'), event.get('sessionAttributes', {}).get('bypass_cache'))
+        )
+
+        if operation == 'investigate':
+            sub_queries = investigation_queries(properties)
+            if not sub_queries:
+                return format_response(event, 400, {'error': f"At least one of {', '.join(INVESTIGATION_QUERIES)} is required"})
+            body = investigate(sub_queries, deadline, bypass_cache, traces=traces)
+            return format_response(event, 200, body, traces)
+
         ag_details = ACTION_GROUP_DETAIL.get(operation)
         if not ag_details:
             return format_response(event, 400, {'error': f'Unknown operation: {operation}'})
             
-        system_prompt = ag_details.get('prompt')
         endpoint = ag_details.get('endpoint')
         query = properties.get('query')
         
@@ -177,10 +436,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             return format_response(event, 400, {'error': 'Query parameter is required'})
 
         logger.info(f"Calling agent with endpoint: {endpoint}, query: {query}")
-        response = call_agent(endpoint, system_prompt, query)
+        response = ask_agent(operation, query, deadline, bypass_cache, traces=traces)
         logger.info(f"Agent response type: {type(response)}")
         
-        return format_response(event, 200, response)
+        return format_response(event, 200, response, traces)
 
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error: {str(e)}")
@@ -188,4 +447,14 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
-        return format_response(event, 500, {'error': f'Internal server error: {str(e)}'})
\ No newline at end of file
+        return format_response(event, 500, {'error': f'Internal server error: {str(e)}'})
+
+if __name__ == "__main__":
+    # Stream an operation's events as JSON lines as they arrive, e.g.
+    #   python handler.py merchant_portfolio_agent "What is the address of MRCH0001?"
+    #   python handler.py investigate '{"merchant_portfolio_query": "...", "transaction_query": "..."}'
+    import sys
+    operation, query = sys.argv[1], sys.argv[2]
+    properties = json.loads(query) if operation == 'investigate' else {'query': query}
+    for event in stream(operation, properties):
+        print(json.dumps(event, default=str), flush=True)
@@ -0,0 +1,136 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, FrozenSet, Optional, Tuple
+
+"""
+Response cache for sub-agent answers
+
+The same questions recur across sessions ("what is the address of MRCH0001"), and each one
+re-runs a full agent loop with its MCP calls. Answers are cached in the Lambda execution
+environment, keyed on (action group, normalized query, freshness token):
+
+- the normalized query is lowercased with punctuation and extra whitespace removed
+- the freshness token changes every RESPONSE_CACHE_FRESHNESS_SECONDS (default 900, the
+  refresh interval of merchant_risk_summary) and with DATA_VERSION, so no answer outlives
+  the data it was built from; entries also expire after RESPONSE_CACHE_TTL_SECONDS
+
+With RESPONSE_CACHE_SIMILARITY set (0 < threshold <= 1), a miss falls back to the cached
+query of the same action group with the most similar character trigrams, as long as it
+names exactly the same identifiers (MRCH0001, transaction ids, dates, amounts), so
+rephrasings hit and questions about another merchant never do.
+"""
+
+logger = logging.getLogger()
+
+CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '900'))
+FRESHNESS_WINDOW = float(os.getenv('RESPONSE_CACHE_FRESHNESS_SECONDS', '900'))
+DATA_VERSION = os.getenv('DATA_VERSION', '')
+MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+SIMILARITY_THRESHOLD = float(os.getenv('RESPONSE_CACHE_SIMILARITY', '0'))
+# Answers of the internet agent depend on live web content and aren't cached by default
+CACHEABLE_ACTION_GROUPS = frozenset(filter(None, os.getenv(
+    'RESPONSE_CACHE_ACTION_GROUPS', 'merchant_portfolio_agent,merchant_stats_agent,transaction_agent'
+).split(',')))
+
+def normalize(query: str) -> str:
+    return ' '.join(re.sub(r'[^\w\s]', ' ', query.lower()).split())
+
+def identifiers(normalized: str) -> FrozenSet[str]:
+    """Words containing a digit: merchant and transaction ids, dates, amounts, limits"""
+    return frozenset(re.findall(r'\w*\d\w*', normalized))
+
+def trigrams(normalized: str) -> FrozenSet[str]:
+    padded = f' {normalized} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two trigram sets"""
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def freshness_token() -> str:
+    return f"{DATA_VERSION}:{int(time.time() // FRESHNESS_WINDOW)}"
+
+class ResponseCache:
+    """
+    LRU cache of agent answers with TTL and optional near-duplicate lookup
+
+    Thread-safe: investigate runs its sub-agents, and their lookups, on pool threads.
+    """
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = CACHE_TTL, similarity_threshold: float = SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        # (action group, normalized query, freshness token) -> (expires at, identifiers, trigrams, response)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, action_group: str, query: str) -> Optional[Any]:
+        """The cached answer for the query, None on a miss"""
+        if action_group not in CACHEABLE_ACTION_GROUPS:
+            return None
+
+        normalized = normalize(query)
+        token = freshness_token()
+        key = (action_group, normalized, token)
+        with self._lock:
+            entry = self._live(key)
+            if entry is not None:
+                logger.info(f"Response cache hit for {action_group}: {normalized}")
+                return entry[3]
+
+            if self.similarity_threshold > 0:
+                key = self._nearest(action_group, normalized, token)
+                if key is not None:
+                    logger.info(f"Response cache near-duplicate hit for {action_group}: {normalized} ~ {key[1]}")
+                    return self._entries[key][3]
+
+        logger.info(f"Response cache miss for {action_group}: {normalized}")
+        return None
+
+    def put(self, action_group: str, query: str, response: Any) -> None:
+        if action_group not in CACHEABLE_ACTION_GROUPS or self.max_entries <= 0:
+            return
+
+        normalized = normalize(query)
+        key = (action_group, normalized, freshness_token())
+        entry = (time.monotonic() + self.ttl, identifiers(normalized), trigrams(normalized), response)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # _live and _nearest are called with the lock held
+    def _live(self, key: Tuple) -> Optional[Tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, action_group: str, normalized: str, token: str) -> Optional[Tuple]:
+        """Key of the most similar live entry naming the same identifiers, if above the threshold"""
+        query_identifiers = identifiers(normalized)
+        query_trigrams = trigrams(normalized)
+        best_key, best_score = None, self.similarity_threshold
+        for key, (expires_at, entry_identifiers, entry_trigrams, _) in self._entries.items():
+            if key[0] != action_group or key[2] != token or entry_identifiers != query_identifiers or expires_at <= time.monotonic():
+                continue
+            score = similarity(query_trigrams, entry_trigrams)
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is not None:
+            self._entries.move_to_end(best_key)
+        return best_key
+
+cache = ResponseCache()
@@ -0,0 +1,176 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import asyncio
+import json
+import os
+import re
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from strands.models.model import Model
+from strands.tools import convert_pydantic_to_tool_spec
+
+"""
+Scripted stand-in for Bedrock, selected with AGENT_MODEL=stub://scripted
+
+Replays tool calls and answers without calling a model, so the Lambda, strands and MCP
+overhead around the model can be measured and load-tested offline. Every model turn
+waits `latency_ms` before its first event and `token_ms` per streamed word of text.
+
+A script (AGENT_STUB_SCRIPT, a JSON file) lists scenarios; the first one whose "match"
+regex is found in the query is replayed, one step per model turn:
+
+    {"scenarios": [{
+        "match": "risk",
+        "steps": [
+            {"tool": "get_merchant_risk_summary", "input": {"merchant_number": "{merchant_number}"}},
+            {"tools": [{"tool": "get_merchant_details", "input": {"merchant_number": "{merchant_number}"}},
+                       {"tool": "get_refund_summary", "input": {"merchant_number": "{merchant_number}", "stat_date": "Month"}}]},
+            {"text": "Risk picture of {merchant_number}: {results}", "latency_ms": 800}
+        ]
+    }]}
+
+{merchant_number} is the first MRCH id of the query, {query} the query and {results} the
+text of the tool results so far. Steps calling a tool the agent wasn't given are skipped.
+Without a matching scenario the model calls the first tool that only needs a merchant
+number, then answers with its result. Structured output (Agent.structured_output) returns
+the input of the scenario's first call of a tool named after the output model, e.g.
+{"tool": "RiskVerdict", "input": {"merchant_number": "{merchant_number}", "risky": true}}.
+URI parameters override the environment, e.g.
+stub://scripted?latency_ms=500&token_ms=5&script=/tmp/script.json
+"""
+
+SCRIPT_PATH = os.getenv('AGENT_STUB_SCRIPT', '')
+LATENCY_MS = float(os.getenv('AGENT_STUB_LATENCY_MS', '0'))
+TOKEN_MS = float(os.getenv('AGENT_STUB_TOKEN_MS', '0'))
+# Characters per token of the usage the stub reports
+CHARS_PER_TOKEN = 4
+
+def load_script(path: str) -> List[Dict[str, Any]]:
+    if not path:
+        return []
+    with open(path) as f:
+        return json.load(f).get('scenarios', [])
+
+def message_text(message: Dict[str, Any]) -> str:
+    """Text of a message's text blocks and tool results"""
+    parts = []
+    for block in message.get('content', []):
+        if 'text' in block:
+            parts.append(block['text'])
+        for item in block.get('toolResult', {}).get('content', []):
+            parts.append(item['text'] if 'text' in item else json.dumps(item.get('json')))
+    return '\n'.join(parts)
+
+def fill(value: Any, variables: Dict[str, str]) -> Any:
+    """Replace {name} placeholders in the strings of a step"""
+    if isinstance(value, str):
+        for name, text in variables.items():
+            value = value.replace(f'{{{name}}}', text)
+        return value
+    if isinstance(value, dict):
+        return {key: fill(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill(item, variables) for item in value]
+    return value
+
+class ScriptedModel(Model):
+    """strands model provider replaying scripted tool calls and answers"""
+    def __init__(self, script: Optional[List[Dict[str, Any]]] = None, latency_ms: float = LATENCY_MS, token_ms: float = TOKEN_MS):
+        self.config = {'model_id': 'stub://scripted', 'latency_ms': latency_ms, 'token_ms': token_ms}
+        self.script = script if script is not None else load_script(SCRIPT_PATH)
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Yield {"output": output_model(...)} built from the scripted call of the output model's tool"""
+        tool_spec = convert_pydantic_to_tool_spec(output_model)
+        query = message_text(prompt[0])
+        merchant = re.search(r'MRCH\d+', query)
+        variables = {'merchant_number': merchant.group(0) if merchant else '', 'query': query, 'results': ''}
+
+        await asyncio.sleep(self.config['latency_ms'] / 1000)
+        for step in self.steps(query, [tool_spec]):
+            for call in step.get('tools', []):
+                if call['tool'] == tool_spec['name']:
+                    yield {'output': output_model(**fill(call.get('input', {}), variables))}
+                    return
+        raise ValueError(f"No scripted {tool_spec['name']} call for: {query}")
+
+    def steps(self, query: str, tool_specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Steps of the scenario matching the query, without calls of tools the agent wasn't given"""
+        offered = {spec['name'] for spec in tool_specs}
+        for scenario in self.script:
+            if re.search(scenario.get('match', ''), query, re.IGNORECASE):
+                steps = []
+                for step in scenario.get('steps', []):
+                    calls = [call for call in step.get('tools', [step] if 'tool' in step else []) if call['tool'] in offered]
+                    if calls:
+                        steps.append({**step, 'tools': calls})
+                    elif 'text' in step:
+                        steps.append(step)
+                return steps
+
+        # Default scenario: one lookup by merchant number, then the answer
+        for spec in tool_specs:
+            if spec['inputSchema']['json'].get('required') == ['merchant_number']:
+                return [{'tools': [{'tool': spec['name'], 'input': {'merchant_number': '{merchant_number}'}}]}, {'text': '{results}'}]
+        return [{'text': 'No scripted answer for: {query}'}]
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        query = message_text(messages[0])
+        turn = sum(1 for message in messages if message['role'] == 'assistant')
+        steps = self.steps(query, tool_specs or [])
+        step = steps[turn] if turn < len(steps) else {'text': '{results}'}
+
+        merchant = re.search(r'MRCH\d+', query)
+        results = '\n'.join(message_text(message) for message in messages[1:] if message['role'] == 'user')
+        step = fill(step, {'merchant_number': merchant.group(0) if merchant else '', 'query': query, 'results': results})
+
+        await asyncio.sleep(step.get('latency_ms', self.config['latency_ms']) / 1000)
+        yield {'messageStart': {'role': 'assistant'}}
+
+        output = ''
+        if step.get('tools'):
+            for call in step['tools']:
+                tool_input = json.dumps(call.get('input', {}))
+                output += tool_input
+                yield {'contentBlockStart': {'start': {'toolUse': {'toolUseId': f"tooluse_{uuid.uuid4().hex[:22]}", 'name': call['tool']}}}}
+                yield {'contentBlockDelta': {'delta': {'toolUse': {'input': tool_input}}}}
+                yield {'contentBlockStop': {}}
+            stop_reason = 'tool_use'
+        else:
+            yield {'contentBlockStart': {'start': {}}}
+            for word in re.findall(r'\S+\s*', step.get('text', '')):
+                if self.config['token_ms']:
+                    await asyncio.sleep(self.config['token_ms'] / 1000)
+                output += word
+                yield {'contentBlockDelta': {'delta': {'text': word}}}
+            yield {'contentBlockStop': {}}
+            stop_reason = 'end_turn'
+
+        yield {'messageStop': {'stopReason': stop_reason}}
+        input_tokens = len(json.dumps([messages, tool_specs, system_prompt], default=str)) // CHARS_PER_TOKEN
+        output_tokens = len(output) // CHARS_PER_TOKEN
+        yield {'metadata': {
+            'usage': {'inputTokens': input_tokens, 'outputTokens': output_tokens, 'totalTokens': input_tokens + output_tokens},
+            'metrics': {'latencyMs': int(step.get('latency_ms', self.config['latency_ms']))}
+        }}
+
+def from_uri(uri: str) -> ScriptedModel:
+    """The model for a stub://scripted[?latency_ms=..&token_ms=..&script=..] AGENT_MODEL"""
+    parsed = urlparse(uri)
+    if parsed.netloc != 'scripted':
+        raise ValueError(f"Unknown stub model {uri}, only stub://scripted is available")
+    params = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+    return ScriptedModel(
+        script=load_script(params.get('script', SCRIPT_PATH)),
+        latency_ms=float(params.get('latency_ms', LATENCY_MS)),
+        token_ms=float(params.get('token_ms', TOKEN_MS))
+    )
@@ -0,0 +1,160 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+"""
+Timing and token accounting of sub-agent calls
+
+An AgentTrace records where a call_agent() run spent its time: MCP connect, tool listing,
+every model turn and every tool call (measured from the agent, so it includes the MCP
+server and its data API call, broken down further by the MCP servers' upstream metrics),
+plus the input and output tokens of the run, and the prompt cache reads and writes.
+
+Each trace is logged in CloudWatch Embedded Metric Format, one record for the sub-agent
+call and one per tool call, which turns them into metrics by action group and tool and
+keeps every field queryable with CloudWatch Logs Insights across invocations.
+"""
+
+EMF_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'FraudInvestigator/SupportAgents')
+
+def elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+class AgentTrace:
+    """Timing trace and token usage of one sub-agent call"""
+    def __init__(self, action_group: str):
+        self.action_group = action_group
+        self.started = time.perf_counter()
+        self.cached = False
+        self.phases: Dict[str, float] = {}
+        self.first_token_ms: Optional[float] = None
+        self.model_turns_ms: List[float] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.input_tokens = 0
+        self.output_tokens = 0
+        # Prompt caching of the tool specs and system prompt, counted apart from input_tokens by Bedrock
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.total_ms: Optional[float] = None
+        # Tools given to the agent after allowlist and relevance selection, see tool_selection.py
+        self.tools_offered: Optional[int] = None
+        # The budget that cut the run short, see budgets.py
+        self.budget_exhausted: Optional[str] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase of the call, e.g. connect or list_tools"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = elapsed_ms(started)
+
+    def record_result(self, result: Any) -> None:
+        """Collect model turns, tool calls and token usage from a strands AgentResult"""
+        metrics = getattr(result, 'metrics', None)
+        if metrics is None:
+            return
+
+        usage = getattr(metrics, 'accumulated_usage', None) or {}
+        self.input_tokens += usage.get('inputTokens', 0)
+        self.output_tokens += usage.get('outputTokens', 0)
+        self.cache_read_tokens += usage.get('cacheReadInputTokens', 0)
+        self.cache_write_tokens += usage.get('cacheWriteInputTokens', 0)
+
+        # Every event loop cycle traces its model turn (stream_messages) and tool calls
+        pending = [trace.to_dict() for trace in getattr(metrics, 'traces', [])]
+        while pending:
+            trace = pending.pop(0)
+            duration = trace.get('duration')
+            if trace.get('name') == 'stream_messages' and duration is not None:
+                self.model_turns_ms.append(round(duration * 1000, 1))
+            elif trace.get('name', '').startswith('Tool: ') and duration is not None:
+                # raw_name is "<tool> - <toolUseId>", one value per call, so not a metric dimension
+                tool = (trace.get('metadata') or {}).get('tool_name') or trace['name'][len('Tool: '):]
+                self.tool_calls.append({'tool': tool, 'ms': round(duration * 1000, 1)})
+            pending.extend(trace.get('children', []))
+
+    def finish(self) -> 'AgentTrace':
+        self.total_ms = elapsed_ms(self.started)
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact trace returned in the response's sessionAttributes"""
+        return {
+            'action_group': self.action_group,
+            'cached': self.cached,
+            'total_ms': self.total_ms,
+            **{f'{name}_ms': ms for name, ms in self.phases.items()},
+            'first_token_ms': self.first_token_ms,
+            'tools_offered': self.tools_offered,
+            'model_turns': len(self.model_turns_ms),
+            'model_ms': round(sum(self.model_turns_ms), 1),
+            'tool_calls': len(self.tool_calls),
+            'tool_ms': round(sum(call['ms'] for call in self.tool_calls), 1),
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'cache_read_tokens': self.cache_read_tokens,
+            'cache_write_tokens': self.cache_write_tokens,
+            'budget_exhausted': self.budget_exhausted
+        }
+
+    def emit(self) -> None:
+        """Log the trace as EMF records: one for the call, one per tool call and one for an exhausted budget"""
+        summary = self.summary()
+        print(json.dumps(emf_record(
+            {'ActionGroup': self.action_group},
+            {
+                'TotalLatency': (summary['total_ms'], 'Milliseconds'),
+                'ConnectLatency': (summary.get('connect_ms'), 'Milliseconds'),
+                'ListToolsLatency': (summary.get('list_tools_ms'), 'Milliseconds'),
+                'FirstTokenLatency': (summary['first_token_ms'], 'Milliseconds'),
+                'ModelLatency': (summary['model_ms'], 'Milliseconds'),
+                'ToolLatency': (summary['tool_ms'], 'Milliseconds'),
+                'ToolsOffered': (summary['tools_offered'], 'Count'),
+                'ModelTurns': (summary['model_turns'], 'Count'),
+                'ToolCalls': (summary['tool_calls'], 'Count'),
+                'InputTokens': (summary['input_tokens'], 'Count'),
+                'OutputTokens': (summary['output_tokens'], 'Count'),
+                'CacheReadInputTokens': (summary['cache_read_tokens'], 'Count'),
+                'CacheWriteInputTokens': (summary['cache_write_tokens'], 'Count'),
+                'CacheHits': (int(self.cached), 'Count'),
+                'BudgetExhausted': (int(self.budget_exhausted is not None), 'Count')
+            },
+            {'Cached': self.cached, 'ModelTurnsMs': self.model_turns_ms, 'ToolCallsMs': self.tool_calls}
+        )))
+        if self.budget_exhausted:
+            print(json.dumps(emf_record(
+                {'ActionGroup': self.action_group, 'Budget': self.budget_exhausted},
+                # Its own name, so sum(BudgetExhausted) over the per-call records counts each hit once
+                {'BudgetExhaustedByType': (1, 'Count')},
+                {}
+            )))
+        for call in self.tool_calls:
+            print(json.dumps(emf_record(
+                {'ActionGroup': self.action_group, 'Tool': call['tool']},
+                {'ToolCallLatency': (call['ms'], 'Milliseconds')},
+                {}
+            )))
+
+def emf_record(dimensions: Dict[str, str], metrics: Dict[str, tuple], properties: Dict[str, Any]) -> Dict[str, Any]:
+    """A CloudWatch Embedded Metric Format record, metrics without a value are left out"""
+    values = {name: value for name, (value, _) in metrics.items() if value is not None}
+    return {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': EMF_NAMESPACE,
+                'Dimensions': [list(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, (value, unit) in metrics.items() if value is not None]
+            }]
+        },
+        **properties,
+        **dimensions,
+        **values
+    }
@@ -0,0 +1,100 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import logging
+import math
+import os
+import re
+from typing import Any, List, Sequence
+
+"""
+Tool subset selection for sub-agents
+
+Every tool an agent is given goes into the prompt of every model turn with its full
+description and input schema, and the merchant MCP server's descriptions alone are several
+thousand tokens. Two steps cut the tool list down before the agent is built:
+
+- an allowlist per action group: merchant_portfolio_agent and merchant_stats_agent share
+  the merchant MCP server but each only needs its own tools (TOOL_ALLOWLISTS, overridden
+  with AGENT_TOOL_ALLOWLISTS, e.g. '{"transaction_agent": ["get_recent_transactions"]}');
+  action groups without one get every tool of their MCP servers
+- an opt-in relevance ranker keeping the AGENT_TOOL_TOP_K (default 0, off) allowed tools
+  that best match the query: query terms are weighted by their inverse document frequency
+  over the tool descriptions, and count extra when they appear in the tool name; tools
+  scoring less than AGENT_TOOL_MIN_RELEVANCE (default 0.3) of the best one are dropped
+
+A query that matches no tool (e.g. "list your tools") keeps every allowed tool. The ranker
+is off by default because word overlap can drop a tool the query needs: with top-k 4,
+test/perf/tool_selection_benchmark.py finds the needed tools in 13 of 15 test cases, the
+"list all available ... tools" cases lose tools, against 15 of 15 with the allowlists alone.
+"""
+
+logger = logging.getLogger()
+
+TOP_K = int(os.getenv('AGENT_TOOL_TOP_K', '0'))
+TOOL_ALLOWLISTS = {
+    "merchant_portfolio_agent": ["search_merchants", "get_merchant_details", "filter_data", "get_merchant_risk_summary"],
+    "merchant_stats_agent": [
+        "get_merchant_stats", "filter_merchant_stats", "get_recent_chargebacks", "get_refund_summary",
+        "get_decline_analysis", "get_merchant_risk_summary"
+    ],
+    **json.loads(os.getenv('AGENT_TOOL_ALLOWLISTS') or '{}')
+}
+MIN_RELEVANCE = float(os.getenv('AGENT_TOOL_MIN_RELEVANCE', '0.3'))
+# A query term found in the tool name counts this many times a description match
+NAME_WEIGHT = 3.0
+
+STOP_WORDS = frozenset(
+    'a an and any are as at be by can for from get give has have i in is it me my '
+    'number of on or show tell that the this to what when which with'.split()
+)
+
+def terms(text: str) -> List[str]:
+    """Lowercased words of `text` without stop words or identifiers, plurals folded"""
+    words = re.findall(r'[a-z]+', text.lower().replace('_', ' '))
+    return [
+        word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+        for word in words if word not in STOP_WORDS
+    ]
+
+def tool_name(tool: Any) -> str:
+    return tool.tool_spec['name']
+
+def allowed_tools(action_group: str, tools: Sequence[Any]) -> List[Any]:
+    """The tools of the action group's allowlist, all of them without one"""
+    allowlist = TOOL_ALLOWLISTS.get(action_group)
+    if not allowlist:
+        return list(tools)
+    allowed = set(allowlist)
+    return [tool for tool in tools if tool_name(tool) in allowed]
+
+def rank_tools(query: str, tools: Sequence[Any]) -> List[tuple]:
+    """(score, tool) pairs of the tools matching the query, best first"""
+    query_terms = set(terms(query))
+    documents = [(set(terms(tool_name(tool))), set(terms(tool.tool_spec.get('description') or ''))) for tool in tools]
+    scored = []
+    for tool, (name_terms, description_terms) in zip(tools, documents):
+        score = 0.0
+        for term in query_terms:
+            frequency = sum(1 for names, description in documents if term in names or term in description)
+            if not frequency:
+                continue
+            idf = math.log(1 + len(tools) / frequency)
+            score += idf * (NAME_WEIGHT if term in name_terms else 1.0 if term in description_terms else 0.0)
+        if score > 0:
+            scored.append((score, tool))
+    # sorted() is stable, ties keep the server's tool order
+    return sorted(scored, key=lambda pair: -pair[0])
+
+def select_tools(action_group: str, query: str, tools: Sequence[Any], top_k: int = TOP_K) -> List[Any]:
+    """The allowed tools of the action group, cut down to the top_k most relevant to the query"""
+    allowed = allowed_tools(action_group, tools)
+    selected = allowed
+    if 0 < top_k < len(allowed):
+        ranked = rank_tools(query, allowed)
+        if ranked:
+            best = ranked[0][0]
+            selected = [tool for score, tool in ranked[:top_k] if score >= best * MIN_RELEVANCE]
+    logger.info(f"{action_group} using {len(selected)} of {len(tools)} tools: {', '.join(tool_name(tool) for tool in selected)}")
+    return selected
@@ -37,6 +37,14 @@ for lambda in */ ; do
     echo "Built ${lambda} successfully."
 done
 
+# Copy the query-data modules into the MCP servers for their direct database backend
+for mcp in merchant_mcp transaction_mcp; do
+    echo "Copying query-data modules to ${mcp}"
+    rm -rf "../containers/${mcp}/query_data"
+    mkdir -p "../containers/${mcp}/query_data"
+    cp query-data/*.py "../containers/${mcp}/query_data/"
+done
+
 # Move back to the original starting directory
 cd ..
 
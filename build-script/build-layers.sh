@@ -5,6 +5,32 @@
 
 PYTHON="/usr/bin/arch -x86_64 /usr/local/bin/python3.13"
 TARGET_DIR="python/lib/python3.13/site-packages"
+# full installs the requirements as is, slim also removes the paths listed in the layer's
+# strip.txt and precompiles the layer for the runtime, e.g. LAYER_MODE=slim make build-layers
+LAYER_MODE="${LAYER_MODE:-full}"
+
+# Remove the site-packages paths matching the patterns of strip.txt, except those matching
+# a pattern starting with `!`
+strip_layer() {
+    local patterns keep path pattern
+    mapfile -t patterns < <(grep -v -e '^[[:space:]]*#' -e '^[[:space:]]*$' strip.txt)
+    shopt -s nullglob
+    keep=()
+    for pattern in "${patterns[@]}"; do
+        if [[ "$pattern" == !* ]]; then
+            keep+=($TARGET_DIR/${pattern#!})
+        fi
+    done
+    for pattern in "${patterns[@]}"; do
+        [[ "$pattern" == !* ]] && continue
+        for path in $TARGET_DIR/$pattern; do
+            if [[ " ${keep[*]} " != *" $path "* ]]; then
+                rm -rf "$path"
+            fi
+        done
+    done
+    shopt -u nullglob
+}
 
 # Get the layers path from command line argument
 LAYERS_PATH="$1"
@@ -30,7 +56,16 @@ for layer in */ ; do
     # arch -x86_64 python3.13 -m pip install -r requirements.txt -t python/lib/python3.13/site-packages
     $PYTHON -m pip install -r requirements.txt -t "$TARGET_DIR"
     # /usr/bin/arch -x86_64 $ARCH_PYTHON -m pip install -r requirements.txt -t python/lib/python3.13/site-packages
-    zip -r9 layer.zip * -x requirements.txt || 7z a -tzip -mx=9 layer.zip * -xr!requirements.txt
+    if [ "$LAYER_MODE" == "slim" ]; then
+        if [ -f strip.txt ]; then
+            strip_layer
+        fi
+        # The layer is mounted read-only, so bytecode invalidated by the sources' timestamps
+        # after zipping is recompiled on every cold start; unchecked hash-based bytecode is
+        # used as is
+        $PYTHON -m compileall -q -f -j 0 --invalidation-mode unchecked-hash "$TARGET_DIR"
+    fi
+    zip -r9 layer.zip * -x requirements.txt strip.txt || 7z a -tzip -mx=9 layer.zip * -xr!requirements.txt -xr!strip.txt
 
     cd ..
 
@@ -13,8 +13,11 @@ DROP FUNCTION IF EXISTS update_merchant_details_updated_at();
 DROP FUNCTION IF EXISTS update_authorizations_updated_at();
 DROP FUNCTION IF EXISTS update_settlements_updated_at();
 DROP FUNCTION IF EXISTS update_merchant_stats_updated_at();
+DROP FUNCTION IF EXISTS refresh_merchant_risk_summary(boolean);
 
 -- Drop existing tables (in reverse order of creation to avoid foreign key conflicts)
+DROP TABLE IF EXISTS merchant_risk_summary_refresh;
+DROP TABLE IF EXISTS merchant_risk_summary;
 DROP TABLE IF EXISTS merchant_stats;
 DROP TABLE IF EXISTS settlements;
 DROP TABLE IF EXISTS authorizations;
@@ -24,16 +27,31 @@ DROP TABLE IF EXISTS merchant_details;
 DROP INDEX IF EXISTS idx_merchant_business_name;
 DROP INDEX IF EXISTS idx_merchant_aff_name;
 DROP INDEX IF EXISTS idx_merchant_category_code;
+DROP INDEX IF EXISTS idx_merchant_business_name_trgm;
 DROP INDEX IF EXISTS idx_auth_merchant_number;
 DROP INDEX IF EXISTS idx_auth_account_number;
 DROP INDEX IF EXISTS idx_auth_transaction_datetime;
 DROP INDEX IF EXISTS idx_auth_approval_status;
 DROP INDEX IF EXISTS idx_auth_account_datetime;
+DROP INDEX IF EXISTS idx_auth_merchant_datetime;
+DROP INDEX IF EXISTS idx_auth_approval_status_datetime;
+DROP INDEX IF EXISTS idx_auth_transaction_type_datetime;
+DROP INDEX IF EXISTS idx_auth_payment_method_datetime;
+DROP INDEX IF EXISTS idx_auth_decline_reason_datetime;
+DROP INDEX IF EXISTS idx_auth_auth_code_datetime;
+DROP INDEX IF EXISTS idx_auth_currency_datetime;
+DROP INDEX IF EXISTS idx_auth_amount_datetime;
+DROP INDEX IF EXISTS idx_auth_card_expiry_date_datetime;
 DROP INDEX IF EXISTS idx_settlements_account_number;
 DROP INDEX IF EXISTS idx_settlements_transaction_date;
 DROP INDEX IF EXISTS idx_settlements_merchant_number;
 DROP INDEX IF EXISTS idx_settlements_auth_code;
 DROP INDEX IF EXISTS idx_settlements_account_date;
+DROP INDEX IF EXISTS idx_settlements_merchant_date;
+DROP INDEX IF EXISTS idx_settlements_status_date;
+DROP INDEX IF EXISTS idx_settlements_transaction_type_date;
+DROP INDEX IF EXISTS idx_settlements_payment_method_date;
+DROP INDEX IF EXISTS idx_settlements_auth_code_date;
 DROP INDEX IF EXISTS idx_merchant_stats_merchant_number;
 DROP INDEX IF EXISTS idx_merchant_stats_bucket_date;
 DROP INDEX IF EXISTS idx_merchant_stats_merchant_bucket;
@@ -92,7 +110,10 @@ CREATE TABLE merchant_details (
 );
 
 -- Create indexes
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 CREATE INDEX idx_merchant_business_name ON merchant_details(Business_Name);
+-- Serves substring search (Business_Name ILIKE '%...%')
+CREATE INDEX idx_merchant_business_name_trgm ON merchant_details USING GIN (Business_Name gin_trgm_ops);
 CREATE INDEX idx_merchant_aff_name ON merchant_details(Merchant_Name);
 CREATE INDEX idx_merchant_category_code ON merchant_details(Merchant_Category_Code);
 
@@ -132,10 +153,19 @@ CREATE TABLE authorizations (
         REFERENCES merchant_details(Merchant_Number)
 );
 
-CREATE INDEX idx_auth_merchant_number ON authorizations(Merchant_Number);
+-- Serves merchant lookups and top-N "most recent" reads (ORDER BY transaction_datetime DESC LIMIT n)
+CREATE INDEX idx_auth_merchant_datetime ON authorizations(Merchant_Number, transaction_datetime DESC);
 CREATE INDEX idx_auth_account_number ON authorizations(account_number);
 CREATE INDEX idx_auth_transaction_datetime ON authorizations(transaction_datetime);
-CREATE INDEX idx_auth_approval_status ON authorizations(approval_status);
+-- Serve field filters sorted by recency (<field> = ? ORDER BY transaction_datetime DESC LIMIT n)
+CREATE INDEX idx_auth_approval_status_datetime ON authorizations(approval_status, transaction_datetime DESC);
+CREATE INDEX idx_auth_transaction_type_datetime ON authorizations(transaction_type, transaction_datetime DESC);
+CREATE INDEX idx_auth_payment_method_datetime ON authorizations(payment_method, transaction_datetime DESC);
+CREATE INDEX idx_auth_decline_reason_datetime ON authorizations(decline_reason, transaction_datetime DESC);
+CREATE INDEX idx_auth_auth_code_datetime ON authorizations(auth_code, transaction_datetime DESC);
+CREATE INDEX idx_auth_currency_datetime ON authorizations(currency, transaction_datetime DESC);
+CREATE INDEX idx_auth_amount_datetime ON authorizations(amount, transaction_datetime DESC);
+CREATE INDEX idx_auth_card_expiry_date_datetime ON authorizations(card_expiry_date, transaction_datetime DESC);
 CREATE INDEX idx_auth_account_datetime ON authorizations(account_number, transaction_datetime);
 
 CREATE OR REPLACE FUNCTION update_authorizations_updated_at()
@@ -181,8 +211,13 @@ CREATE TABLE settlements (
 
 CREATE INDEX idx_settlements_account_number ON settlements(account_number);
 CREATE INDEX idx_settlements_transaction_date ON settlements(transaction_date);
-CREATE INDEX idx_settlements_merchant_number ON settlements(merchant_number);
-CREATE INDEX idx_settlements_auth_code ON settlements(auth_code);
+-- Serves merchant lookups and top-N "most recent" reads (ORDER BY transaction_date DESC LIMIT n)
+CREATE INDEX idx_settlements_merchant_date ON settlements(merchant_number, transaction_date DESC);
+-- Serve field filters sorted by recency (<field> = ? ORDER BY transaction_date DESC LIMIT n)
+CREATE INDEX idx_settlements_status_date ON settlements(transaction_status, transaction_date DESC);
+CREATE INDEX idx_settlements_transaction_type_date ON settlements(transaction_type, transaction_date DESC);
+CREATE INDEX idx_settlements_payment_method_date ON settlements(payment_method, transaction_date DESC);
+CREATE INDEX idx_settlements_auth_code_date ON settlements(auth_code, transaction_date DESC);
 CREATE INDEX idx_settlements_account_date ON settlements(account_number, transaction_date);
 
 CREATE OR REPLACE FUNCTION update_settlements_updated_at()
@@ -252,7 +287,6 @@ CREATE TABLE merchant_stats (
         UNIQUE (merchant_number, bucket_date)
 );
 
-CREATE INDEX idx_merchant_stats_merchant_number ON merchant_stats(merchant_number);
 CREATE INDEX idx_merchant_stats_bucket_date ON merchant_stats(bucket_date);
 CREATE INDEX idx_merchant_stats_merchant_bucket ON merchant_stats(merchant_number, bucket_date);
 
@@ -267,4 +301,173 @@ $$ language 'plpgsql';
 CREATE TRIGGER update_merchant_stats_updated_at
     BEFORE UPDATE ON merchant_stats
     FOR EACH ROW
-    EXECUTE FUNCTION update_merchant_stats_updated_at();
\ No newline at end of file
+    EXECUTE FUNCTION update_merchant_stats_updated_at();
+
+
+
+-- Per-merchant fraud picture (details, refunds, chargebacks, declines, reversals) in one row, so the
+-- common "risk summary for merchant X" question is a primary key lookup instead of five queries.
+-- Maintained incrementally by refresh_merchant_risk_summary() rather than a MATERIALIZED VIEW,
+-- whose REFRESH always recomputes every merchant
+CREATE TABLE merchant_risk_summary (
+    merchant_number VARCHAR(20) PRIMARY KEY,
+    business_name VARCHAR(100),
+    merchant_category_code VARCHAR(4),
+    account_status VARCHAR(10),
+    terminated_indicator VARCHAR(10),
+
+    authorizations_count INTEGER NOT NULL DEFAULT 0,
+    authorizations_volume NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    declines_count INTEGER NOT NULL DEFAULT 0,
+    declines_percent NUMERIC(5, 2),
+    decline_reasons JSONB NOT NULL DEFAULT '{}',   -- {"<decline reason>": count}
+    last_authorization_at TIMESTAMP WITH TIME ZONE,
+
+    settlements_count INTEGER NOT NULL DEFAULT 0,
+    settlements_volume NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    reversals_count INTEGER NOT NULL DEFAULT 0,
+    reversals_volume NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    last_settlement_at TIMESTAMP WITH TIME ZONE,
+
+    period_stats JSONB NOT NULL DEFAULT '{}',      -- {"Day" | "Month" | "Year": refund, dispute, decline and entry method stats}
+
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_merchant
+        FOREIGN KEY (merchant_number)
+        REFERENCES merchant_details(Merchant_Number)
+        ON DELETE CASCADE
+);
+
+-- Single row holding the refresh watermark
+CREATE TABLE merchant_risk_summary_refresh (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    last_refreshed_at TIMESTAMP WITH TIME ZONE
+);
+INSERT INTO merchant_risk_summary_refresh (last_refreshed_at) VALUES (NULL);
+
+-- Find the rows changed since the last refresh without scanning the transaction tables
+CREATE INDEX idx_auth_updated_at ON authorizations(updated_at);
+CREATE INDEX idx_settlements_updated_at ON settlements(updated_at);
+CREATE INDEX idx_merchant_stats_updated_at ON merchant_stats(updated_at);
+
+-- Recompute the summary of every merchant with rows inserted or updated since the last refresh
+-- (every merchant when full_refresh or on the first run) and return the number of merchants refreshed.
+-- Deleted transactions are only picked up by a full refresh
+CREATE OR REPLACE FUNCTION refresh_merchant_risk_summary(full_refresh BOOLEAN DEFAULT FALSE)
+RETURNS integer AS $$
+DECLARE
+    since TIMESTAMP WITH TIME ZONE;
+    refreshed integer;
+BEGIN
+    -- Serialize refreshes so a scheduled and a manual run don't interleave watermarks
+    PERFORM pg_advisory_xact_lock(hashtext('merchant_risk_summary'));
+
+    IF NOT full_refresh THEN
+        -- updated_at is the writer's transaction start time, the overlap covers transactions
+        -- that started before the last refresh but committed after it
+        SELECT last_refreshed_at - interval '5 minutes' INTO since FROM merchant_risk_summary_refresh;
+    END IF;
+
+    WITH changed AS (
+        SELECT merchant_number FROM merchant_details WHERE since IS NULL OR updated_at >= since
+        UNION SELECT merchant_number FROM authorizations WHERE updated_at >= since
+        UNION SELECT merchant_number FROM settlements WHERE updated_at >= since
+        UNION SELECT merchant_number FROM merchant_stats WHERE updated_at >= since
+    ),
+    auths AS (
+        SELECT
+            a.merchant_number,
+            COUNT(*) AS authorizations_count,
+            SUM(a.amount) AS authorizations_volume,
+            COUNT(*) FILTER (WHERE a.approval_status = 'Declined') AS declines_count,
+            MAX(a.transaction_datetime) AS last_authorization_at
+        FROM authorizations a JOIN changed c ON c.merchant_number = a.merchant_number
+        GROUP BY a.merchant_number
+    ),
+    reasons AS (
+        SELECT merchant_number, jsonb_object_agg(reason, reason_count) AS decline_reasons
+        FROM (
+            SELECT a.merchant_number, COALESCE(a.decline_reason, 'Unknown') AS reason, COUNT(*) AS reason_count
+            FROM authorizations a JOIN changed c ON c.merchant_number = a.merchant_number
+            WHERE a.approval_status = 'Declined'
+            GROUP BY a.merchant_number, COALESCE(a.decline_reason, 'Unknown')
+        ) per_reason
+        GROUP BY merchant_number
+    ),
+    settles AS (
+        SELECT
+            s.merchant_number,
+            COUNT(*) AS settlements_count,
+            SUM(s.processed_amount) AS settlements_volume,
+            COUNT(*) FILTER (WHERE s.transaction_type = 'Reversal') AS reversals_count,
+            COALESCE(SUM(s.processed_amount) FILTER (WHERE s.transaction_type = 'Reversal'), 0) AS reversals_volume,
+            MAX(s.transaction_date) AS last_settlement_at
+        FROM settlements s JOIN changed c ON c.merchant_number = s.merchant_number
+        GROUP BY s.merchant_number
+    ),
+    stats AS (
+        SELECT
+            m.merchant_number,
+            jsonb_object_agg(m.bucket_date, jsonb_build_object(
+                'refunds_count', COALESCE(m.credit_refunds_count, 0) + COALESCE(m.debit_refunds_count, 0),
+                'refunds_volume', COALESCE(m.credit_refunds_volume, 0) + COALESCE(m.debit_refunds_volume, 0),
+                'credit_refunds_percent', m.credit_refunds_percent,
+                'disputes_count', COALESCE(m.credit_disputes_count, 0) + COALESCE(m.debit_disputes_count, 0),
+                'disputes_volume', COALESCE(m.credit_disputes_volume, 0) + COALESCE(m.debit_disputes_volume, 0),
+                'credit_disputes_percent', m.credit_disputes_percent,
+                'debit_disputes_percent', m.debit_disputes_percent,
+                'reversals_count', m.credit_reversals_count,
+                'declines_percent', m.authorizations_declines_percent,
+                'entry_method_keyed_percent', m.entry_method_keyed_percent,
+                'entry_method_ecomm_percent', m.entry_method_ecomm_percent
+            )) AS period_stats
+        FROM merchant_stats m JOIN changed c ON c.merchant_number = m.merchant_number
+        GROUP BY m.merchant_number
+    )
+    INSERT INTO merchant_risk_summary (
+        merchant_number, business_name, merchant_category_code, account_status, terminated_indicator,
+        authorizations_count, authorizations_volume, declines_count, declines_percent, decline_reasons, last_authorization_at,
+        settlements_count, settlements_volume, reversals_count, reversals_volume, last_settlement_at,
+        period_stats, refreshed_at
+    )
+    SELECT
+        d.merchant_number, d.business_name, d.merchant_category_code, d.account_status, d.terminated_indicator,
+        COALESCE(a.authorizations_count, 0), COALESCE(a.authorizations_volume, 0), COALESCE(a.declines_count, 0),
+        ROUND(100.0 * a.declines_count / NULLIF(a.authorizations_count, 0), 2),
+        COALESCE(r.decline_reasons, '{}'), a.last_authorization_at,
+        COALESCE(s.settlements_count, 0), COALESCE(s.settlements_volume, 0),
+        COALESCE(s.reversals_count, 0), COALESCE(s.reversals_volume, 0), s.last_settlement_at,
+        COALESCE(st.period_stats, '{}'), now()
+    FROM merchant_details d
+    JOIN changed c ON c.merchant_number = d.merchant_number
+    LEFT JOIN auths a ON a.merchant_number = d.merchant_number
+    LEFT JOIN reasons r ON r.merchant_number = d.merchant_number
+    LEFT JOIN settles s ON s.merchant_number = d.merchant_number
+    LEFT JOIN stats st ON st.merchant_number = d.merchant_number
+    ON CONFLICT (merchant_number) DO UPDATE SET
+        business_name = EXCLUDED.business_name,
+        merchant_category_code = EXCLUDED.merchant_category_code,
+        account_status = EXCLUDED.account_status,
+        terminated_indicator = EXCLUDED.terminated_indicator,
+        authorizations_count = EXCLUDED.authorizations_count,
+        authorizations_volume = EXCLUDED.authorizations_volume,
+        declines_count = EXCLUDED.declines_count,
+        declines_percent = EXCLUDED.declines_percent,
+        decline_reasons = EXCLUDED.decline_reasons,
+        last_authorization_at = EXCLUDED.last_authorization_at,
+        settlements_count = EXCLUDED.settlements_count,
+        settlements_volume = EXCLUDED.settlements_volume,
+        reversals_count = EXCLUDED.reversals_count,
+        reversals_volume = EXCLUDED.reversals_volume,
+        last_settlement_at = EXCLUDED.last_settlement_at,
+        period_stats = EXCLUDED.period_stats,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+
+    UPDATE merchant_risk_summary_refresh SET last_refreshed_at = now();
+
+    RETURN refreshed;
+END;
+$$ language 'plpgsql';
\ No newline at end of file
@@ -3320,3 +3320,6 @@ INSERT INTO merchant_stats (
 1440, 86400.00, 60.00,
 360, 25200.00, 0.86
 );
+
+-- Build the risk summary for the seeded merchants
+SELECT refresh_merchant_risk_summary(TRUE);
@@ -0,0 +1,6 @@
+-- Copyright 2025 Amazon.com and its affiliates; all rights reserved.
+-- This file is Amazon Web Services Content and may not be duplicated or distributed without permission.
+
+-- Scheduled partition maintenance for databases deployed from ddl_partitioned.sql:
+-- creates the monthly partitions of authorizations and settlements for the next 3 months
+SELECT ensure_transaction_partitions(3);
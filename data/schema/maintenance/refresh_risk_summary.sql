@@ -0,0 +1,13 @@
+-- Copyright 2025 Amazon.com and its affiliates; all rights reserved.
+-- This file is Amazon Web Services Content and may not be duplicated or distributed without permission.
+
+-- Scheduled incremental refresh of merchant_risk_summary for merchants changed since the last run.
+-- The schedule exists on every deployment, a no-op until migrations/002_merchant_risk_summary.sql
+-- has been applied to a database created from an older ddl.sql
+DO $$
+BEGIN
+    IF to_regproc('refresh_merchant_risk_summary') IS NOT NULL THEN
+        PERFORM refresh_merchant_risk_summary();
+    END IF;
+END
+$$;
@@ -0,0 +1,42 @@
+-- Copyright 2025 Amazon.com and its affiliates; all rights reserved.
+-- This file is Amazon Web Services Content and may not be duplicated or distributed without permission.
+
+-- Composite indexes matched to the query-data routes, for databases created from an older ddl.sql.
+-- Every statement is idempotent. On large live tables run each CREATE INDEX on its own with
+-- CONCURRENTLY to avoid blocking writes while the index builds.
+-- Check plans with test/perf/index_advisor.py after applying.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- /api/merchant/search: business_name ILIKE '%...%'
+CREATE INDEX IF NOT EXISTS idx_merchant_business_name_trgm ON merchant_details USING GIN (Business_Name gin_trgm_ops);
+
+-- /api/transaction/authorization: merchant_number = ? [AND transaction_datetime range] ORDER BY transaction_datetime DESC LIMIT n
+CREATE INDEX IF NOT EXISTS idx_auth_merchant_datetime ON authorizations(Merchant_Number, transaction_datetime DESC);
+DROP INDEX IF EXISTS idx_auth_merchant_number;
+
+-- /api/transaction/settlement: merchant_number = ? [AND transaction_date range] ORDER BY transaction_date DESC LIMIT n
+CREATE INDEX IF NOT EXISTS idx_settlements_merchant_date ON settlements(merchant_number, transaction_date DESC);
+DROP INDEX IF EXISTS idx_settlements_merchant_number;
+
+-- /api/transaction/filter: <field> = ? ORDER BY <date> DESC LIMIT 100
+CREATE INDEX IF NOT EXISTS idx_auth_approval_status_datetime ON authorizations(approval_status, transaction_datetime DESC);
+CREATE INDEX IF NOT EXISTS idx_auth_transaction_type_datetime ON authorizations(transaction_type, transaction_datetime DESC);
+CREATE INDEX IF NOT EXISTS idx_auth_payment_method_datetime ON authorizations(payment_method, transaction_datetime DESC);
+CREATE INDEX IF NOT EXISTS idx_auth_decline_reason_datetime ON authorizations(decline_reason, transaction_datetime DESC);
+CREATE INDEX IF NOT EXISTS idx_auth_auth_code_datetime ON authorizations(auth_code, transaction_datetime DESC);
+DROP INDEX IF EXISTS idx_auth_approval_status;
+
+CREATE INDEX IF NOT EXISTS idx_settlements_status_date ON settlements(transaction_status, transaction_date DESC);
+CREATE INDEX IF NOT EXISTS idx_settlements_transaction_type_date ON settlements(transaction_type, transaction_date DESC);
+CREATE INDEX IF NOT EXISTS idx_settlements_payment_method_date ON settlements(payment_method, transaction_date DESC);
+CREATE INDEX IF NOT EXISTS idx_settlements_auth_code_date ON settlements(auth_code, transaction_date DESC);
+DROP INDEX IF EXISTS idx_settlements_auth_code;
+
+-- merchant_number alone is a prefix of idx_merchant_stats_merchant_bucket and of the unique_merchant_date constraint
+DROP INDEX IF EXISTS idx_merchant_stats_merchant_number;
+
+ANALYZE merchant_details;
+ANALYZE authorizations;
+ANALYZE settlements;
+ANALYZE merchant_stats;
@@ -0,0 +1,175 @@
+-- Copyright 2025 Amazon.com and its affiliates; all rights reserved.
+-- This file is Amazon Web Services Content and may not be duplicated or distributed without permission.
+
+-- Adds merchant_risk_summary and its incremental refresh to databases created from an older ddl.sql.
+-- Every statement is idempotent.
+
+-- Per-merchant fraud picture (details, refunds, chargebacks, declines, reversals) in one row, so the
+-- common "risk summary for merchant X" question is a primary key lookup instead of five queries.
+-- Maintained incrementally by refresh_merchant_risk_summary() rather than a MATERIALIZED VIEW,
+-- whose REFRESH always recomputes every merchant
+CREATE TABLE IF NOT EXISTS merchant_risk_summary (
+    merchant_number VARCHAR(20) PRIMARY KEY,
+    business_name VARCHAR(100),
+    merchant_category_code VARCHAR(4),
+    account_status VARCHAR(10),
+    terminated_indicator VARCHAR(10),
+
+    authorizations_count INTEGER NOT NULL DEFAULT 0,
+    authorizations_volume NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    declines_count INTEGER NOT NULL DEFAULT 0,
+    declines_percent NUMERIC(5, 2),
+    decline_reasons JSONB NOT NULL DEFAULT '{}',   -- {"<decline reason>": count}
+    last_authorization_at TIMESTAMP WITH TIME ZONE,
+
+    settlements_count INTEGER NOT NULL DEFAULT 0,
+    settlements_volume NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    reversals_count INTEGER NOT NULL DEFAULT 0,
+    reversals_volume NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    last_settlement_at TIMESTAMP WITH TIME ZONE,
+
+    period_stats JSONB NOT NULL DEFAULT '{}',      -- {"Day" | "Month" | "Year": refund, dispute, decline and entry method stats}
+
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_merchant
+        FOREIGN KEY (merchant_number)
+        REFERENCES merchant_details(Merchant_Number)
+        ON DELETE CASCADE
+);
+
+-- Single row holding the refresh watermark
+CREATE TABLE IF NOT EXISTS merchant_risk_summary_refresh (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    last_refreshed_at TIMESTAMP WITH TIME ZONE
+);
+INSERT INTO merchant_risk_summary_refresh (last_refreshed_at) VALUES (NULL) ON CONFLICT DO NOTHING;
+
+-- Find the rows changed since the last refresh without scanning the transaction tables
+CREATE INDEX IF NOT EXISTS idx_auth_updated_at ON authorizations(updated_at);
+CREATE INDEX IF NOT EXISTS idx_settlements_updated_at ON settlements(updated_at);
+CREATE INDEX IF NOT EXISTS idx_merchant_stats_updated_at ON merchant_stats(updated_at);
+
+-- Recompute the summary of every merchant with rows inserted or updated since the last refresh
+-- (every merchant when full_refresh or on the first run) and return the number of merchants refreshed.
+-- Deleted transactions are only picked up by a full refresh
+CREATE OR REPLACE FUNCTION refresh_merchant_risk_summary(full_refresh BOOLEAN DEFAULT FALSE)
+RETURNS integer AS $$
+DECLARE
+    since TIMESTAMP WITH TIME ZONE;
+    refreshed integer;
+BEGIN
+    -- Serialize refreshes so a scheduled and a manual run don't interleave watermarks
+    PERFORM pg_advisory_xact_lock(hashtext('merchant_risk_summary'));
+
+    IF NOT full_refresh THEN
+        -- updated_at is the writer's transaction start time, the overlap covers transactions
+        -- that started before the last refresh but committed after it
+        SELECT last_refreshed_at - interval '5 minutes' INTO since FROM merchant_risk_summary_refresh;
+    END IF;
+
+    WITH changed AS (
+        SELECT merchant_number FROM merchant_details WHERE since IS NULL OR updated_at >= since
+        UNION SELECT merchant_number FROM authorizations WHERE updated_at >= since
+        UNION SELECT merchant_number FROM settlements WHERE updated_at >= since
+        UNION SELECT merchant_number FROM merchant_stats WHERE updated_at >= since
+    ),
+    auths AS (
+        SELECT
+            a.merchant_number,
+            COUNT(*) AS authorizations_count,
+            SUM(a.amount) AS authorizations_volume,
+            COUNT(*) FILTER (WHERE a.approval_status = 'Declined') AS declines_count,
+            MAX(a.transaction_datetime) AS last_authorization_at
+        FROM authorizations a JOIN changed c ON c.merchant_number = a.merchant_number
+        GROUP BY a.merchant_number
+    ),
+    reasons AS (
+        SELECT merchant_number, jsonb_object_agg(reason, reason_count) AS decline_reasons
+        FROM (
+            SELECT a.merchant_number, COALESCE(a.decline_reason, 'Unknown') AS reason, COUNT(*) AS reason_count
+            FROM authorizations a JOIN changed c ON c.merchant_number = a.merchant_number
+            WHERE a.approval_status = 'Declined'
+            GROUP BY a.merchant_number, COALESCE(a.decline_reason, 'Unknown')
+        ) per_reason
+        GROUP BY merchant_number
+    ),
+    settles AS (
+        SELECT
+            s.merchant_number,
+            COUNT(*) AS settlements_count,
+            SUM(s.processed_amount) AS settlements_volume,
+            COUNT(*) FILTER (WHERE s.transaction_type = 'Reversal') AS reversals_count,
+            COALESCE(SUM(s.processed_amount) FILTER (WHERE s.transaction_type = 'Reversal'), 0) AS reversals_volume,
+            MAX(s.transaction_date) AS last_settlement_at
+        FROM settlements s JOIN changed c ON c.merchant_number = s.merchant_number
+        GROUP BY s.merchant_number
+    ),
+    stats AS (
+        SELECT
+            m.merchant_number,
+            jsonb_object_agg(m.bucket_date, jsonb_build_object(
+                'refunds_count', COALESCE(m.credit_refunds_count, 0) + COALESCE(m.debit_refunds_count, 0),
+                'refunds_volume', COALESCE(m.credit_refunds_volume, 0) + COALESCE(m.debit_refunds_volume, 0),
+                'credit_refunds_percent', m.credit_refunds_percent,
+                'disputes_count', COALESCE(m.credit_disputes_count, 0) + COALESCE(m.debit_disputes_count, 0),
+                'disputes_volume', COALESCE(m.credit_disputes_volume, 0) + COALESCE(m.debit_disputes_volume, 0),
+                'credit_disputes_percent', m.credit_disputes_percent,
+                'debit_disputes_percent', m.debit_disputes_percent,
+                'reversals_count', m.credit_reversals_count,
+                'declines_percent', m.authorizations_declines_percent,
+                'entry_method_keyed_percent', m.entry_method_keyed_percent,
+                'entry_method_ecomm_percent', m.entry_method_ecomm_percent
+            )) AS period_stats
+        FROM merchant_stats m JOIN changed c ON c.merchant_number = m.merchant_number
+        GROUP BY m.merchant_number
+    )
+    INSERT INTO merchant_risk_summary (
+        merchant_number, business_name, merchant_category_code, account_status, terminated_indicator,
+        authorizations_count, authorizations_volume, declines_count, declines_percent, decline_reasons, last_authorization_at,
+        settlements_count, settlements_volume, reversals_count, reversals_volume, last_settlement_at,
+        period_stats, refreshed_at
+    )
+    SELECT
+        d.merchant_number, d.business_name, d.merchant_category_code, d.account_status, d.terminated_indicator,
+        COALESCE(a.authorizations_count, 0), COALESCE(a.authorizations_volume, 0), COALESCE(a.declines_count, 0),
+        ROUND(100.0 * a.declines_count / NULLIF(a.authorizations_count, 0), 2),
+        COALESCE(r.decline_reasons, '{}'), a.last_authorization_at,
+        COALESCE(s.settlements_count, 0), COALESCE(s.settlements_volume, 0),
+        COALESCE(s.reversals_count, 0), COALESCE(s.reversals_volume, 0), s.last_settlement_at,
+        COALESCE(st.period_stats, '{}'), now()
+    FROM merchant_details d
+    JOIN changed c ON c.merchant_number = d.merchant_number
+    LEFT JOIN auths a ON a.merchant_number = d.merchant_number
+    LEFT JOIN reasons r ON r.merchant_number = d.merchant_number
+    LEFT JOIN settles s ON s.merchant_number = d.merchant_number
+    LEFT JOIN stats st ON st.merchant_number = d.merchant_number
+    ON CONFLICT (merchant_number) DO UPDATE SET
+        business_name = EXCLUDED.business_name,
+        merchant_category_code = EXCLUDED.merchant_category_code,
+        account_status = EXCLUDED.account_status,
+        terminated_indicator = EXCLUDED.terminated_indicator,
+        authorizations_count = EXCLUDED.authorizations_count,
+        authorizations_volume = EXCLUDED.authorizations_volume,
+        declines_count = EXCLUDED.declines_count,
+        declines_percent = EXCLUDED.declines_percent,
+        decline_reasons = EXCLUDED.decline_reasons,
+        last_authorization_at = EXCLUDED.last_authorization_at,
+        settlements_count = EXCLUDED.settlements_count,
+        settlements_volume = EXCLUDED.settlements_volume,
+        reversals_count = EXCLUDED.reversals_count,
+        reversals_volume = EXCLUDED.reversals_volume,
+        last_settlement_at = EXCLUDED.last_settlement_at,
+        period_stats = EXCLUDED.period_stats,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+
+    UPDATE merchant_risk_summary_refresh SET last_refreshed_at = now();
+
+    RETURN refreshed;
+END;
+$$ language 'plpgsql';
+
+-- Initial population, later runs of refresh_merchant_risk_summary() only touch changed merchants
+SELECT refresh_merchant_risk_summary(TRUE);
@@ -0,0 +1,14 @@
+-- Copyright 2025 Amazon.com and its affiliates; all rights reserved.
+-- This file is Amazon Web Services Content and may not be duplicated or distributed without permission.
+
+-- /api/transaction/filter indexes for the remaining authorizations filter fields, for databases
+-- created from an older ddl.sql. Every statement is idempotent. On large live tables run each
+-- CREATE INDEX on its own with CONCURRENTLY to avoid blocking writes while the index builds.
+-- Check plans with test/perf/index_advisor.py after applying.
+
+-- /api/transaction/filter: <field> = ? ORDER BY transaction_datetime DESC LIMIT 100
+CREATE INDEX IF NOT EXISTS idx_auth_currency_datetime ON authorizations(currency, transaction_datetime DESC);
+CREATE INDEX IF NOT EXISTS idx_auth_amount_datetime ON authorizations(amount, transaction_datetime DESC);
+CREATE INDEX IF NOT EXISTS idx_auth_card_expiry_date_datetime ON authorizations(card_expiry_date, transaction_datetime DESC);
+
+ANALYZE authorizations;
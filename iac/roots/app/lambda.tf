@@ -23,9 +23,59 @@ module "deploy_db_function" {
   environment_variables = {
     DB_SECRET_NAME = "${local.id_path}/db-secret"
     S3_BUCKET      = module.s3_db_data.name
+    DDL_OBJECT_KEY = var.partitioned_transactions ? "schema/ddl_partitioned.sql" : "schema/ddl.sql"
   }
 }
 
+# Fold changed merchants into merchant_risk_summary
+resource "aws_cloudwatch_event_rule" "risk_summary_refresh" {
+  name                = "${local.id}-risk-summary-refresh"
+  description         = "Incrementally refresh merchant_risk_summary"
+  schedule_expression = "rate(15 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "risk_summary_refresh" {
+  rule  = aws_cloudwatch_event_rule.risk_summary_refresh.name
+  arn   = module.deploy_db_function.arn
+  input = jsonencode({
+    migration_object_key = "schema/maintenance/refresh_risk_summary.sql"
+  })
+}
+
+resource "aws_lambda_permission" "risk_summary_refresh" {
+  statement_id  = "AllowEventBridgeRiskSummaryRefresh"
+  action        = "lambda:InvokeFunction"
+  function_name = module.deploy_db_function.name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.risk_summary_refresh.arn
+}
+
+# Keep monthly partitions created ahead of inserts when the partitioned schema is deployed
+resource "aws_cloudwatch_event_rule" "partition_maintenance" {
+  count               = var.partitioned_transactions ? 1 : 0
+  name                = "${local.id}-partition-maintenance"
+  description         = "Create upcoming monthly partitions of authorizations and settlements"
+  schedule_expression = "cron(0 3 1 * ? *)"
+}
+
+resource "aws_cloudwatch_event_target" "partition_maintenance" {
+  count = var.partitioned_transactions ? 1 : 0
+  rule  = aws_cloudwatch_event_rule.partition_maintenance[0].name
+  arn   = module.deploy_db_function.arn
+  input = jsonencode({
+    migration_object_key = "schema/maintenance/ensure_partitions.sql"
+  })
+}
+
+resource "aws_lambda_permission" "partition_maintenance" {
+  count         = var.partitioned_transactions ? 1 : 0
+  statement_id  = "AllowEventBridgePartitionMaintenance"
+  action        = "lambda:InvokeFunction"
+  function_name = module.deploy_db_function.name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.partition_maintenance[0].arn
+}
+
 
 module "query_data_function" {
   source            = "../../templates/modules/lambda"
@@ -145,6 +195,16 @@ resource "aws_lambda_permission" "lambda_permission_merchant_search" {
   source_arn = "${module.data_api.execution_arn}/*/GET/api/merchant/search"
 }
 
+resource "aws_lambda_permission" "lambda_permission_merchant_risk_summary" {
+  statement_id  = "AllowAPIInvokeMerchantRiskSummary"
+  action        = "lambda:InvokeFunction"
+  function_name = module.query_data_function.name
+  principal     = "apigateway.amazonaws.com"
+
+  # The /* part allows invocation from any stage, method and resource path
+  source_arn = "${module.data_api.execution_arn}/*/GET/api/merchant/risk-summary"
+}
+
 resource "aws_lambda_permission" "lambda_permission_merchant_filter_stats" {
   statement_id  = "AllowAPIInvokeMerchantFilterStats"
   action        = "lambda:InvokeFunction"
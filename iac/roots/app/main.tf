@@ -91,6 +91,8 @@ module "data_api" {
       title   = "Fraud Agent Assistant API"
       version = "1.0"
     },
+    # Return base64 encoded (gzip) lambda proxy bodies as binary
+    x-amazon-apigateway-binary-media-types = ["*/*"],
     security = [{
       api_key = []
     }],
@@ -174,6 +176,20 @@ module "data_api" {
           }
         }
       }
+      "/api/merchant/risk-summary" = {
+        get = {
+          security = [{
+            api_key = []
+          }],
+          produces = ["application/json"]
+          x-amazon-apigateway-integration = {
+            httpMethod           = "POST"
+            payloadFormatVersion = "1.0"
+            type                 = "AWS_PROXY"
+            uri                  = "arn:aws:apigateway:${data.aws_region.current.name}:lambda:path/2015-03-31/functions/${module.query_data_function.arn}/invocations"
+          }
+        }
+      }
       "/api/merchant/filter-stats" = {
         get = {
           security = [{
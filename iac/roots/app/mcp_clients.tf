@@ -39,4 +39,33 @@ resource "aws_lambda_permission" "allow_bedrock_strands_agent_access" {
   function_name = module.strands_agent.lambda_function_name
   principal     = "bedrock.amazonaws.com"
   source_arn    = aws_bedrockagent_agent.fraud_investigator_assistant.agent_arn
-}
\ No newline at end of file
+}
+resource "aws_cloudwatch_query_definition" "strands_agent_hot_spots" {
+  name            = "${local.id}/strands-agent-hot-spots"
+  log_group_names = ["/aws/lambda/${module.strands_agent.lambda_function_name}"]
+
+  query_string = <<-EOT
+    fields ActionGroup, Tool
+    | filter ispresent(TotalLatency) or ispresent(ToolCallLatency)
+    | stats count(TotalLatency) as calls, pct(TotalLatency, 95) as p95_total_ms, avg(ConnectLatency) as avg_connect_ms,
+        avg(ListToolsLatency) as avg_list_tools_ms, avg(FirstTokenLatency) as avg_first_token_ms, avg(ModelLatency) as avg_model_ms,
+        avg(InputTokens) as avg_input_tokens, avg(OutputTokens) as avg_output_tokens, avg(CacheReadInputTokens) as avg_cache_read_tokens,
+        avg(CacheWriteInputTokens) as avg_cache_write_tokens, sum(BudgetExhausted) as budgets_exhausted,
+        count(ToolCallLatency) as tool_calls, pct(ToolCallLatency, 95) as p95_tool_ms
+      by ActionGroup, Tool
+    | sort p95_total_ms desc, p95_tool_ms desc
+  EOT
+}
+
+resource "aws_cloudwatch_query_definition" "strands_agent_cold_starts" {
+  name            = "${local.id}/strands-agent-cold-starts"
+  log_group_names = ["/aws/lambda/${module.strands_agent.lambda_function_name}"]
+
+  query_string = <<-EOT
+    filter @type = "REPORT"
+    | stats count(*) as invocations, count(@initDuration) as cold_starts, avg(@initDuration) as avg_init_ms,
+        pct(@initDuration, 95) as p95_init_ms, max(@initDuration) as max_init_ms, avg(@duration) as avg_duration_ms
+      by bin(1h)
+    | sort bin(1h) desc
+  EOT
+}
@@ -2,13 +2,29 @@
 // This file is Amazon Web Services Content and may not be duplicated or distributed without permission.
 
 
-module "merchant_mcp" {
+locals {
+  # MCP servers call the query-data service over the VPC unless routed through API Gateway + Lambda
+  query_data_base_url = var.query_data_direct ? "http://${module.query_data_service[0].alb_dns_name}" : module.data_api.endpoint_url
+  # QUERY_DATA_BACKEND=direct runs the query-data routes inside the MCP servers, which then need the DB secret
+  query_data_direct_secrets = var.mcp_query_data_backend == "direct" ? { DB_SECRET = module.db_secret.arn } : {}
+  # Concurrent query-data calls of each MCP server (admission.py UPSTREAM_MAX_IN_FLIGHT). With the direct
+  # backend the in-process query-data pools get as many connections, async_db's Lambda default is 2
+  mcp_upstream_max_in_flight = 10
+  query_data_direct_environment = var.mcp_query_data_backend == "direct" ? {
+    SERVICE_POOL_MAX_SIZE = tostring(local.mcp_upstream_max_in_flight)
+    DB_POOL_MAX_SIZE = tostring(local.mcp_upstream_max_in_flight)
+  } : {}
+}
+
+# query-data routes served by a long-lived ASGI app (app/lambdas/query-data/asgi.py), deployed with query_data_direct
+module "query_data_service" {
   source = "../../templates/components/mcp_server"
+  count  = var.query_data_direct ? 1 : 0
 
-  id = "${local.id}-merchant"
+  id = "${local.id}-query-data"
   tags = local.tags
-  container_path = "${var.appPath}/containers/merchant_mcp"
-  file_trigger = "handler.py"
+  container_path = "${var.appPath}/lambdas/query-data"
+  file_trigger = "asgi.py"
   alb_health_check = "/healthz"
   vpc_id = module.vpc.vpc_id
   alb_subnet_ids = module.vpc.vpc_private_subnet_ids
@@ -19,13 +35,48 @@ module "merchant_mcp" {
   ecs_task_role_arn = aws_iam_role.ecs_task_role.arn
   ecs_execution_policies = [aws_iam_policy.secrets_access_policy.arn]
   environment_variables = {
-    API_GATEWAY_BASE_URL = module.data_api.endpoint_url
+    SERVICE_POOL_MAX_SIZE = "10"
+    DB_POOL_MAX_SIZE = "10"
   }
   secrets_variables = {
+    DB_SECRET = module.db_secret.arn
     API_KEY = aws_secretsmanager_secret.api_key.arn
   }
 }
 
+module "merchant_mcp" {
+  source = "../../templates/components/mcp_server"
+
+  id = "${local.id}-merchant"
+  tags = local.tags
+  container_path = "${var.appPath}/containers/merchant_mcp"
+  file_trigger = "handler.py"
+  # query-data modules of the direct backend, COPY'd from ./query_data by the Dockerfile
+  pre_build_command = "rm -rf ${var.appPath}/containers/merchant_mcp/query_data && mkdir -p ${var.appPath}/containers/merchant_mcp/query_data && cp ${var.appPath}/lambdas/query-data/*.py ${var.appPath}/containers/merchant_mcp/query_data/"
+  alb_health_check = "/healthz"
+  vpc_id = module.vpc.vpc_id
+  alb_subnet_ids = module.vpc.vpc_private_subnet_ids
+  alb_sg_id = aws_security_group.alb_sg.id
+  health_check = "curl -f http://localhost:8080/healthz >> /proc/1/fd/1 2>&1 || exit 1"
+  ecs_subnet_ids = module.vpc.vpc_private_subnet_ids
+  ecs_sg_id = aws_security_group.ecs_tasks_sg.id
+  ecs_task_role_arn = aws_iam_role.ecs_task_role.arn
+  ecs_execution_policies = [aws_iam_policy.secrets_access_policy.arn]
+  environment_variables = merge(
+    {
+      API_GATEWAY_BASE_URL = local.query_data_base_url
+      QUERY_DATA_BACKEND = var.mcp_query_data_backend
+      TOOL_DESCRIPTION_STYLE = var.mcp_tool_description_style
+      UPSTREAM_MAX_IN_FLIGHT = tostring(local.mcp_upstream_max_in_flight)
+    },
+    local.query_data_direct_environment
+  )
+  secrets_variables = merge(
+    { API_KEY = aws_secretsmanager_secret.api_key.arn },
+    local.query_data_direct_secrets
+  )
+}
+
 module "transaction_mcp" {
   source = "../../templates/components/mcp_server"
 
@@ -33,6 +84,8 @@ module "transaction_mcp" {
   tags = local.tags
   container_path = "${var.appPath}/containers/transaction_mcp"
   file_trigger = "handler.py"
+  # query-data modules of the direct backend, COPY'd from ./query_data by the Dockerfile
+  pre_build_command = "rm -rf ${var.appPath}/containers/transaction_mcp/query_data && mkdir -p ${var.appPath}/containers/transaction_mcp/query_data && cp ${var.appPath}/lambdas/query-data/*.py ${var.appPath}/containers/transaction_mcp/query_data/"
   health_check = "curl -f http://localhost:8080/healthz >> /proc/1/fd/1 2>&1 || exit 1"
   vpc_id = module.vpc.vpc_id
   alb_subnet_ids = module.vpc.vpc_private_subnet_ids
@@ -42,12 +95,19 @@ module "transaction_mcp" {
   ecs_sg_id = aws_security_group.ecs_tasks_sg.id
   ecs_task_role_arn = aws_iam_role.ecs_task_role.arn
   ecs_execution_policies = [aws_iam_policy.secrets_access_policy.arn]
-  environment_variables = {
-    API_GATEWAY_BASE_URL = module.data_api.endpoint_url
-  }
-  secrets_variables = {
-    API_KEY = aws_secretsmanager_secret.api_key.arn
-  }
+  environment_variables = merge(
+    {
+      API_GATEWAY_BASE_URL = local.query_data_base_url
+      QUERY_DATA_BACKEND = var.mcp_query_data_backend
+      TOOL_DESCRIPTION_STYLE = var.mcp_tool_description_style
+      UPSTREAM_MAX_IN_FLIGHT = tostring(local.mcp_upstream_max_in_flight)
+    },
+    local.query_data_direct_environment
+  )
+  secrets_variables = merge(
+    { API_KEY = aws_secretsmanager_secret.api_key.arn },
+    local.query_data_direct_secrets
+  )
 }
 
 module "brave_secret" {
@@ -19,6 +19,7 @@ resource "aws_bedrockagent_agent" "fraud_investigator_assistant" {
     Even if you do not believe the knowledge base will have helpful information or the right policy, you must always query it first before querying any support agents.
     If there is no relevant procedure, use your best judgement of which support agents to utilize.
     Consider the support agents you have available and send relevant queries to them. They are also agents to word your request carefully and reword if required.
+    When a request needs several support agents and their queries don't depend on each other's answers, use the investigate operation to query them all at once instead of one after another.
     If there's no clear execution plan or the intent is not clear, respond back with qualifying question or reject the request politely. 
 
     Note: merchant identifier's are formatted as 'MRCH1234' and transaction identifiers are formmatted as 'XXXXXXXXXXXX1234'.
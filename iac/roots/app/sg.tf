@@ -62,6 +62,30 @@ resource "aws_security_group" "db_sg" {
   }
 }
 
+# MCP servers reach the query-data service ALB, which is itself an ECS task reaching the DB
+resource "aws_security_group_rule" "alb_from_ecs_tasks" {
+  count                    = var.query_data_direct ? 1 : 0
+  description              = "MCP servers calling the query-data service ALB"
+  type                     = "ingress"
+  from_port                = 80
+  to_port                  = 80
+  protocol                 = "tcp"
+  security_group_id        = aws_security_group.alb_sg.id
+  source_security_group_id = aws_security_group.ecs_tasks_sg.id
+}
+
+# Only ECS tasks that open database connections: the query-data service or MCP servers with the direct backend
+resource "aws_security_group_rule" "db_from_ecs_tasks" {
+  count                    = var.query_data_direct || var.mcp_query_data_backend == "direct" ? 1 : 0
+  description              = "query-data connection pools of ECS tasks on DB port"
+  type                     = "ingress"
+  from_port                = 5533
+  to_port                  = 5533
+  protocol                 = "tcp"
+  security_group_id        = aws_security_group.db_sg.id
+  source_security_group_id = aws_security_group.ecs_tasks_sg.id
+}
+
 # Lambda security group
 resource "aws_security_group" "db_lambda_sg" {
   name        = "${local.id}-db-lambda-sg"
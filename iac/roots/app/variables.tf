@@ -47,4 +47,38 @@ variable "dataPath" {
   type = string
   description = "Path to data level code"
   default = "../../../data"
-}
\ No newline at end of file
+}
+
+variable "partitioned_transactions" {
+  type        = bool
+  description = "Deploy authorizations and settlements range-partitioned by month (data/schema/ddl_partitioned.sql)"
+  default     = false
+}
+
+variable "query_data_direct" {
+  type        = bool
+  description = "Deploy the query-data ECS service and have the MCP servers call it over the VPC instead of API Gateway + the query-data Lambda"
+  default     = false
+}
+
+variable "mcp_query_data_backend" {
+  type        = string
+  description = "How the merchant and transaction MCP servers run query-data routes: api (HTTP call) or direct (in-process against the database)"
+  default     = "api"
+
+  validation {
+    condition     = contains(["api", "direct"], var.mcp_query_data_backend)
+    error_message = "mcp_query_data_backend must be api or direct."
+  }
+}
+
+variable "mcp_tool_description_style" {
+  type        = string
+  description = "Tool descriptions the merchant and transaction MCP servers send to the agents: verbose or compact (tools_description.py)"
+  default     = "verbose"
+
+  validation {
+    condition     = contains(["verbose", "compact"], var.mcp_tool_description_style)
+    error_message = "mcp_tool_description_style must be verbose or compact."
+  }
+}
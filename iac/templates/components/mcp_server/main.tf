@@ -25,6 +25,7 @@ module "ecr" {
   id = var.id
   container_path = var.container_path
   file_trigger = var.file_trigger
+  pre_build_command = var.pre_build_command
   tags = var.tags
 }
 
@@ -54,6 +54,12 @@ variable "file_trigger" {
 }
 
 
+variable "pre_build_command" {
+  description = "Shell command run before the container image is built"
+  type        = string
+  default     = ""
+}
+
 variable "ecs_task_role_arn" {
   description = "Description of the variable"
   type        = string
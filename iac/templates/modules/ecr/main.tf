@@ -48,6 +48,7 @@ resource "null_resource" "push_image" {
   provisioner "local-exec" {
     command = <<-EOT
       aws ecr get-login-password --region ${data.aws_region.current.name} | podman login --username AWS --password-stdin ${data.aws_caller_identity.current.account_id}.dkr.ecr.${data.aws_region.current.name}.amazonaws.com
+      ${var.pre_build_command}
       podman build --platform ${var.platform} -t ${aws_ecr_repository.main.repository_url}:latest ${var.container_path}
       podman push ${aws_ecr_repository.main.repository_url}:latest
     EOT
@@ -15,6 +15,12 @@ variable "file_trigger" {
   default = null
 }
 
+variable "pre_build_command" {
+  description = "Shell command run before the image is built, e.g. to stage files from outside container_path into it"
+  type = string
+  default = ""
+}
+
 variable "tags" {
   type = map(string)
 }
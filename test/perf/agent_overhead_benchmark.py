@@ -0,0 +1,212 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from perf_utils import REPO_ROOT, authorization_rows
+
+"""
+Load-test the strands-agent Lambda without Bedrock or a database
+
+Runs lambda_handler in-process with AGENT_MODEL=stub://scripted (app/lambdas/strands-agent-mcp/
+stub_model.py, replaying stub-agent-script.json) against the merchant and transaction MCP servers started locally, which call
+a stub query-data API answering every route with canned rows. Every request goes through
+the real orchestration path (action group event, response cache, budgets, MCP connect and
+tool listing, tool calls over streamable HTTP, retries and admission control, the EMF
+trace) with the model time fixed by --model-latency-ms, so what is measured is the
+overhead around the model. --max-p95-ms makes it a CI gate that fails on a regression:
+
+    python agent_overhead_benchmark.py --iterations 50 --concurrency 4
+    python agent_overhead_benchmark.py --iterations 20 --max-p95-ms 400
+"""
+
+STRANDS_AGENT_PATH = os.path.join(REPO_ROOT, "app", "lambdas", "strands-agent-mcp")
+CONTAINERS_PATH = os.path.join(REPO_ROOT, "app", "containers")
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub-agent-script.json")
+MERCHANT_NUMBER = "MRCH0001"
+
+# (operation, request body properties) of the benchmarked action group calls
+OPERATIONS = [
+    ("merchant_portfolio_agent", {"query": f"What is the address of {MERCHANT_NUMBER}?"}),
+    ("merchant_stats_agent", {"query": f"What are the monthly merchant stats of {MERCHANT_NUMBER}?"}),
+    ("transaction_agent", {"query": f"Show the recent authorizations of {MERCHANT_NUMBER}"}),
+    ("investigate", {
+        "merchant_portfolio_query": f"What is the address of {MERCHANT_NUMBER}?",
+        "transaction_query": f"Show the recent authorizations of {MERCHANT_NUMBER}"
+    })
+]
+
+MERCHANT = {
+    "merchant_number": MERCHANT_NUMBER,
+    "business_name": "Stub Sports Outlet",
+    "business_city": "Seattle",
+    "business_state": "WA",
+    "merchant_category_code": "5941",
+    "account_status": "Active"
+}
+
+def stub_body(path: str, params: dict) -> dict:
+    """Canned query-data response of a route"""
+    if path.startswith("/api/transaction/"):
+        rows = [json.loads(json.dumps(row, default=str)) for row in authorization_rows(int(params.get("limit", 5)), MERCHANT_NUMBER)]
+        if params.get("auth_transaction_id") or params.get("settlement_transaction_id"):
+            return {"item": rows[0]}
+        return {"items": rows}
+    if path == "/api/merchant/search":
+        return {"items": [MERCHANT], "pagination": {"total": 1, "pages": 1, "current_page": 1, "page_size": 10}}
+    # Merchant details, risk summary and stats share one row
+    return {"item": {**MERCHANT, "stat_date": params.get("stat_date", "Day"), "credit_refunds_count": 3, "credit_refunds_volume": "120.50"}}
+
+class StubQueryData(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        body = json.dumps(stub_body(url.path, params)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_query_data(port: int, handler=StubQueryData) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_mcp_server(server: str, port: int, data_port: int, python: str, environment: dict = None) -> subprocess.Popen:
+    """Start an MCP server on `port` against the stub query-data API and wait for its health check"""
+    process = subprocess.Popen(
+        [python, "handler.py"],
+        cwd=os.path.join(CONTAINERS_PATH, server),
+        env={
+            **os.environ, "PORT": str(port), "API_GATEWAY_BASE_URL": f"http://127.0.0.1:{data_port}", "QUERY_DATA_BACKEND": "api", "API_KEY": "",
+            **(environment or {})
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/healthz").status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"{server} did not become healthy")
+
+def load_agent_handler(merchant_port: int, transaction_port: int, model_latency_ms: float, script: str):
+    """Import the strands-agent Lambda handler wired to the local MCP servers and the stub model"""
+    os.environ.update({
+        "MERCH_ALB_DNS": f"127.0.0.1:{merchant_port}",
+        "TRANS_ALB_DNS": f"127.0.0.1:{transaction_port}",
+        "MCP_PATH": "/mcp",
+        "AGENT_MODEL": f"stub://scripted?latency_ms={model_latency_ms}&script={script}",
+        # Every request runs its sub-agents instead of hitting the response cache
+        "RESPONSE_CACHE_MAX_ENTRIES": "0"
+    })
+    sys.path.insert(0, STRANDS_AGENT_PATH)
+    spec = importlib.util.spec_from_file_location("strands_agent_handler", os.path.join(STRANDS_AGENT_PATH, "handler.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class LambdaContext:
+    def get_remaining_time_in_millis(self):
+        return 60000
+
+def action_group_event(operation: str, properties: dict) -> dict:
+    return {
+        "messageVersion": "1.0",
+        "actionGroup": "benchmark",
+        "apiPath": operation,
+        "httpMethod": "POST",
+        "sessionAttributes": {},
+        "requestBody": {"content": {"application/json": {"properties": [
+            {"name": name, "type": "string", "value": value} for name, value in properties.items()
+        ]}}}
+    }
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the strands-agent Lambda overhead around a scripted model")
+    parser.add_argument("--iterations", type=int, default=20, help="Requests per operation (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent requests (default: 1)")
+    parser.add_argument("--model-latency-ms", type=float, default=0, help="Scripted latency of every model turn (default: 0)")
+    parser.add_argument("--script", default=SCRIPT_PATH, help="Scripted tool calls and answers (default: stub-agent-script.json)")
+    parser.add_argument("--max-p95-ms", type=float, help="Exit with an error when an operation's p95 overhead exceeds this")
+    parser.add_argument("--port", type=int, default=8790, help="First of the three local ports used (default: 8790)")
+    parser.add_argument("--server-python", default=sys.executable, help="Python of the MCP servers' environment (default: this one)")
+    args = parser.parse_args()
+
+    data_port, merchant_port, transaction_port = args.port, args.port + 1, args.port + 2
+    data_api = start_stub_query_data(data_port)
+    servers = []
+    try:
+        servers.append(start_mcp_server("merchant_mcp", merchant_port, data_port, args.server_python))
+        servers.append(start_mcp_server("transaction_mcp", transaction_port, data_port, args.server_python))
+        handler = load_agent_handler(merchant_port, transaction_port, args.model_latency_ms, args.script)
+
+        def invoke(operation, properties):
+            started = time.perf_counter()
+            response = handler.lambda_handler(action_group_event(operation, properties), LambdaContext())
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            timing = json.loads(response.get("sessionAttributes", {}).get("agent_timing", "[]"))
+            model_turns = sum(trace["model_turns"] for trace in timing)
+            status = response["response"]["httpStatusCode"]
+            return operation, status, elapsed_ms, model_turns
+
+        # Warm up imports, connections and the MCP servers before measuring
+        for operation, properties in OPERATIONS:
+            invoke(operation, properties)
+
+        requests = [request for request in OPERATIONS for _ in range(args.iterations)]
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(lambda request: invoke(*request), requests))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+        data_api.shutdown()
+
+    print(f"strands-agent overhead over {args.iterations} requests per operation, concurrency {args.concurrency}, model turn latency {args.model_latency_ms:.0f} ms")
+    print(f"{'operation':<26} {'p50 ms':>8} {'p95 ms':>8} {'turns':>6} {'errors':>7}")
+    failed = False
+    for operation, _ in OPERATIONS:
+        rows = [result for result in results if result[0] == operation]
+        # Sub-agents of investigate run concurrently, so the scripted model time is only subtracted per request for the others
+        overhead = [
+            elapsed - (0 if operation == "investigate" else turns * args.model_latency_ms)
+            for _, _, elapsed, turns in rows
+        ]
+        errors = sum(1 for _, status, _, _ in rows if status != 200)
+        p95 = percentile(overhead, 0.95)
+        print(f"{operation:<26} {statistics.median(overhead):>8.1f} {p95:>8.1f} {statistics.mean(row[3] for row in rows):>6.1f} {errors:>7}")
+        if errors or (args.max_p95_ms is not None and p95 > args.max_p95_ms):
+            failed = True
+
+    if failed:
+        print("FAILED: errors or p95 overhead above --max-p95-ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
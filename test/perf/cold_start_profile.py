@@ -0,0 +1,122 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from perf_utils import REPO_ROOT
+
+"""
+Profile the cold-start imports of the strands-agent Lambda
+
+A Lambda cold start imports handler.py before the first invocation, and that init time
+is dominated by third-party imports. This imports the handler in fresh interpreters
+(as Lambda does, without running an invocation), reports the median init time over
+--runs, then the `python -X importtime` profile of one more run: the import time per
+top-level package and the import tree down to --depth, skipping imports under --min-ms.
+--site-packages runs against a built layer (build-script/build-layers.sh) instead of the
+interpreter's own packages, e.g. to compare the full and LAYER_MODE=slim builds. The
+profile of the current handler is checked in as cold-start-profile.txt:
+
+    python cold_start_profile.py --output cold-start-profile.txt
+    python cold_start_profile.py --site-packages ../../app/layers/strands-agents/python/lib/python3.13/site-packages
+"""
+
+STRANDS_AGENT_PATH = os.path.join(REPO_ROOT, "app", "lambdas", "strands-agent-mcp")
+INIT_CODE = "import time; started = time.perf_counter(); import handler; print((time.perf_counter() - started) * 1000)"
+
+class ImportNode:
+    def __init__(self, name: str, self_us: int, cumulative_us: int):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.children = []
+
+def parse_importtime(output: str) -> list:
+    """Root import nodes of `-X importtime` output, which lists every import after its own imports"""
+    pending = defaultdict(list)
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        node = ImportNode(name.strip(), int(self_us), int(cumulative_us))
+        node.children = pending.pop(depth + 1, [])
+        pending[depth].append(node)
+    return pending[0]
+
+def walk(nodes: list):
+    for node in nodes:
+        yield node
+        yield from walk(node.children)
+
+def run_handler_import(python: str, env: dict, flags: list, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [python] + flags + (["-X", "importtime"] if importtime else []) + ["-c", INIT_CODE]
+    return subprocess.run(command, cwd=STRANDS_AGENT_PATH, env=env, capture_output=True, text=True, check=True)
+
+def directory_size_mb(path: str) -> float:
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    ) / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the cold-start imports of the strands-agent Lambda")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters timed (default: 5)")
+    parser.add_argument("--depth", type=int, default=4, help="Import tree depth shown (default: 4)")
+    parser.add_argument("--min-ms", type=float, default=10, help="Hide imports faster than this (default: 10)")
+    parser.add_argument("--site-packages", help="Import the dependencies from this directory, e.g. a built layer")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to profile with (default: this one)")
+    parser.add_argument("--output", help="Write the profile to this file as well")
+    args = parser.parse_args()
+
+    # Bedrock model id as deployed, nothing connects at import time
+    env = {"AWS_REGION": "us-east-1", "AGENT_MODEL": "us.amazon.nova-pro-v1:0", **os.environ}
+    flags = []
+    if args.site_packages:
+        # Only the layer's packages, not the interpreter's site-packages
+        env["PYTHONPATH"] = os.path.abspath(args.site_packages)
+        flags.append("-S")
+
+    init_ms = [float(run_handler_import(args.python, env, flags).stdout.strip().splitlines()[-1]) for _ in range(args.runs)]
+    roots = parse_importtime(run_handler_import(args.python, env, flags, importtime=True).stderr)
+    handler = next(node for node in roots if node.name == "handler")
+
+    packages = defaultdict(int)
+    for node in walk([handler]):
+        packages[node.name.split(".")[0]] += node.self_us
+
+    version = subprocess.run([args.python, "-c", "import platform; print(platform.python_version())"], capture_output=True, text=True).stdout.strip()
+    lines = [
+        f"strands-agent cold start: import handler, Python {version} on {platform.machine()}",
+        f"init time: median {statistics.median(init_ms):.0f} ms over {args.runs} runs ({', '.join(f'{ms:.0f}' for ms in init_ms)})",
+    ]
+    if args.site_packages:
+        lines.append(f"site-packages: {directory_size_mb(args.site_packages):.1f} MB")
+    lines += ["", "import time per top-level package (self time, -X importtime run)", f"{'package':<36} {'ms':>8} {'share':>6}"]
+    total_us = sum(packages.values())
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1]):
+        if self_us / 1000 >= args.min_ms:
+            lines.append(f"{name:<36} {self_us / 1000:>8.1f} {self_us / total_us:>6.0%}")
+
+    lines += ["", f"import tree (cumulative ms, imports under {args.min_ms:g} ms hidden)"]
+    def tree(node, depth):
+        if depth > args.depth or node.cumulative_us / 1000 < args.min_ms:
+            return
+        lines.append(f"{node.cumulative_us / 1000:>9.1f}  {'  ' * depth}{node.name}")
+        for child in sorted(node.children, key=lambda child: -child.cumulative_us):
+            tree(child, depth + 1)
+    tree(handler, 0)
+
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import base64
+import time
+
+from perf_utils import authorization_rows, load_query_data_handler
+
+"""
+Measure the gzip content negotiation of query-data
+
+Builds query-data responses for synthetic authorization rows and reports the wire size
+with and without gzip, the base64 size of the Lambda proxy payload and the compression time
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure gzip savings between query-data and the MCP servers")
+    parser.add_argument("--rows", type=int, nargs="+", default=[5, 100, 1000], help="Row counts to measure (default: 5 100 1000)")
+    parser.add_argument("--iterations", type=int, default=20, help="Compression runs averaged per row count (default: 20)")
+    args = parser.parse_args()
+
+    handler = load_query_data_handler()
+    headers = {"Accept-Encoding": "gzip"}
+
+    print(f"{'rows':>6} {'format':>9} {'raw bytes':>10} {'gzip bytes':>11} {'base64 bytes':>13} {'ratio':>7} {'gzip ms':>8}")
+    for count in args.rows:
+        rows = authorization_rows(count)
+        for response_format in handler.RESPONSE_FORMATS:
+            response = handler.create_response(200, {"items": rows}, response_format)
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                compressed = handler.compress_response(response, headers)
+            elapsed_ms = (time.perf_counter() - started) * 1000 / args.iterations
+
+            raw_size = len(response["body"])
+            base64_size = len(compressed["body"])
+            wire_size = len(base64.b64decode(compressed["body"]))
+            print(f"{count:>6} {response_format:>9} {raw_size:>10} {wire_size:>11} {base64_size:>13} "
+                  f"{raw_size / wire_size:>6.1f}x {elapsed_ms:>8.2f}")
+
+if __name__ == "__main__":
+    main()
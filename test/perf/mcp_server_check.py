@@ -0,0 +1,123 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import asyncio
+import re
+import sys
+import time
+
+import httpx
+
+from agent_overhead_benchmark import MERCHANT_NUMBER, StubQueryData, start_mcp_server, start_stub_query_data
+
+"""
+Check that the MCP server actually serves its ASGI middleware
+
+Starts the merchant MCP server against a stub query-data API that answers after
+--upstream-delay-ms, so tool calls overlap, then checks:
+
+- metrics: /metrics reports mcp_http_requests_in_flight >= 1 while a tool call is
+  running, and a non-zero mcp_event_loop_lag_seconds once the lag probe has run
+- admission: with TOOL_MAX_IN_FLIGHT=N and ADMISSION_QUEUE_SIZE=0, N+1 concurrent
+  tools/call requests of one tool get at least one 503 with Retry-After
+
+Exits with an error when a check fails, e.g. in CI:
+
+    python mcp_server_check.py
+    python mcp_server_check.py --max-in-flight 4 --server-python /path/to/venv/bin/python
+"""
+
+MCP_HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+def slow_query_data(delay_seconds: float):
+    class SlowQueryData(StubQueryData):
+        def do_GET(self):
+            time.sleep(delay_seconds)
+            super().do_GET()
+    return SlowQueryData
+
+async def open_session(client: httpx.AsyncClient, url: str) -> dict:
+    """Initialize an MCP session, returns the headers of its requests (no session id when the server is stateless)"""
+    response = await client.post(url, headers=MCP_HEADERS, json={
+        "jsonrpc": "2.0", "id": 0, "method": "initialize",
+        "params": {"protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "mcp_server_check", "version": "1.0"}}
+    })
+    response.raise_for_status()
+    session_id = response.headers.get("mcp-session-id")
+    headers = {**MCP_HEADERS, **({"mcp-session-id": session_id} if session_id else {})}
+    await client.post(url, headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+    return headers
+
+async def call_tool(client: httpx.AsyncClient, url: str, headers: dict, request_id: int) -> httpx.Response:
+    return await client.post(url, headers=headers, json={
+        "jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+        "params": {"name": "get_merchant_details", "arguments": {"merchant_number": MERCHANT_NUMBER}}
+    })
+
+def metric_value(payload: str, name: str) -> float:
+    match = re.search(rf"^{name} (\S+)$", payload, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+async def check_metrics(base_url: str, delay_seconds: float) -> list:
+    failures = []
+    async with httpx.AsyncClient(timeout=30) as client:
+        headers = await open_session(client, f"{base_url}/mcp")
+        call = asyncio.create_task(call_tool(client, f"{base_url}/mcp", headers, 1))
+        await asyncio.sleep(delay_seconds / 2)
+        payload = (await client.get(f"{base_url}/metrics")).text
+        (await call).raise_for_status()
+        in_flight = metric_value(payload, "mcp_http_requests_in_flight")
+        if in_flight < 1:
+            failures.append(f"mcp_http_requests_in_flight is {in_flight} during a tool call")
+
+        # The probe starts with the first request and publishes after its first interval
+        await asyncio.sleep(2)
+        lag = metric_value((await client.get(f"{base_url}/metrics")).text, "mcp_event_loop_lag_seconds")
+        if lag <= 0:
+            failures.append("mcp_event_loop_lag_seconds is 0, the event loop lag probe is not running")
+    return failures
+
+async def check_admission(base_url: str, max_in_flight: int) -> list:
+    async with httpx.AsyncClient(timeout=30) as client:
+        headers = await open_session(client, f"{base_url}/mcp")
+        responses = await asyncio.gather(*(call_tool(client, f"{base_url}/mcp", headers, i + 1) for i in range(max_in_flight + 1)))
+    shed = [response for response in responses if response.status_code == 503]
+    if not shed:
+        return [f"{max_in_flight + 1} concurrent calls with TOOL_MAX_IN_FLIGHT={max_in_flight} got no 503: {[r.status_code for r in responses]}"]
+    if not all(response.headers.get("retry-after") for response in shed):
+        return ["503 responses of admission control have no Retry-After header"]
+    return []
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the MCP server's metrics and admission control middleware")
+    parser.add_argument("--max-in-flight", type=int, default=2, help="TOOL_MAX_IN_FLIGHT of the server (default: 2)")
+    parser.add_argument("--upstream-delay-ms", type=float, default=500, help="Stub query-data response delay (default: 500)")
+    parser.add_argument("--port", type=int, default=8795, help="First of the two local ports used (default: 8795)")
+    parser.add_argument("--server-python", default=sys.executable, help="Python of the MCP server's environment (default: this one)")
+    args = parser.parse_args()
+
+    delay_seconds = args.upstream_delay_ms / 1000
+    data_port, server_port = args.port, args.port + 1
+    data_api = start_stub_query_data(data_port, slow_query_data(delay_seconds))
+    server = start_mcp_server("merchant_mcp", server_port, data_port, args.server_python, {
+        "TOOL_MAX_IN_FLIGHT": str(args.max_in_flight),
+        "ADMISSION_QUEUE_SIZE": "0"
+    })
+    try:
+        base_url = f"http://127.0.0.1:{server_port}"
+        failures = asyncio.run(check_metrics(base_url, delay_seconds))
+        failures += asyncio.run(check_admission(base_url, args.max_in_flight))
+    finally:
+        server.terminate()
+        server.wait()
+        data_api.shutdown()
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: in-flight and event loop lag metrics served, admission control sheds with 503 and Retry-After")
+
+if __name__ == "__main__":
+    main()
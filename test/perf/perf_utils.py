@@ -0,0 +1,66 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import importlib.util
+import os
+import random
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+"""
+Shared helpers for the offline performance benchmarks
+
+Builds synthetic rows shaped like the authorizations table in data/schema/ddl.sql
+and loads the query-data lambda handler module without deploying it
+"""
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+QUERY_DATA_PATH = os.path.join(REPO_ROOT, "app", "lambdas", "query-data")
+
+DECLINE_REASONS = ["Insufficient Funds", "Do Not Honor", "Expired Card", "Suspected Fraud", "Invalid CVV"]
+
+def load_query_data_handler():
+    """Import app/lambdas/query-data/handler.py as the `query_data_handler` module"""
+    if QUERY_DATA_PATH not in sys.path:
+        sys.path.insert(0, QUERY_DATA_PATH)
+    spec = importlib.util.spec_from_file_location("query_data_handler", os.path.join(QUERY_DATA_PATH, "handler.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def authorization_rows(count, merchant_number="MRCH0001", seed=42):
+    """Generate `count` authorization row dicts, newest first, with DB-native value types"""
+    rng = random.Random(seed)
+    now = datetime(2025, 6, 30, 23, 59, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        approved = rng.random() > 0.15
+        created = now - timedelta(minutes=7 * i)
+        rows.append({
+            "id": count - i,
+            "merchant_number": merchant_number,
+            "account_number": f"{rng.randrange(10**15, 10**16)}",
+            "amount": Decimal(f"{rng.uniform(1, 2500):.2f}"),
+            "currency": "USD",
+            "transaction_type": rng.choice(["Purchase", "Pre Auth", "Pre Auth Complete", "Refund"]),
+            "payment_method": rng.choice(["EMV", "Manual", "Contactless Chip", "Swiped", "E-Commerce"]),
+            "card_expiry_date": f"{rng.randint(1, 12):02d}/{rng.randint(25, 30)}",
+            "auth_code": f"{rng.randrange(100000, 999999)}",
+            "transaction_datetime": now - timedelta(minutes=7 * i, seconds=rng.randint(0, 59)),
+            "approval_status": "Approved" if approved else "Declined",
+            "decline_reason": None if approved else rng.choice(DECLINE_REASONS),
+            "created_at": created,
+            "updated_at": created
+        })
+    return rows
+
+def estimate_tokens(text):
+    """
+    Approximate the model token count of `text`.
+
+    Counts alphabetic runs, digit groups of up to three and each punctuation character,
+    which tracks BPE tokenizers closely for JSON payloads. Use it for relative comparisons.
+    """
+    return len(re.findall(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]", text))
@@ -0,0 +1,36 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+
+from perf_utils import authorization_rows, estimate_tokens, load_query_data_handler
+
+"""
+Compare the records and columnar response encodings of query-data
+
+Encodes synthetic authorization rows with create_response in each format and reports
+the response body size and the estimated model tokens the agent would consume
+"""
+
+def measure(create_response, rows, response_format):
+    body = create_response(200, {"items": rows, "count": len(rows)}, response_format)["body"]
+    return len(body.encode("utf-8")), estimate_tokens(body)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes and tokens saved by the columnar response format")
+    parser.add_argument("--rows", type=int, nargs="+", default=[5, 100], help="Row counts to measure (default: 5 100)")
+    args = parser.parse_args()
+
+    handler = load_query_data_handler()
+
+    print(f"{'rows':>6} {'format':>9} {'bytes':>9} {'tokens':>8} {'bytes saved':>12} {'tokens saved':>13}")
+    for count in args.rows:
+        rows = authorization_rows(count)
+        base_bytes, base_tokens = measure(handler.create_response, rows, "records")
+        for response_format in handler.RESPONSE_FORMATS:
+            size, tokens = measure(handler.create_response, rows, response_format)
+            print(f"{count:>6} {response_format:>9} {size:>9} {tokens:>8} "
+                  f"{1 - size / base_bytes:>11.1%} {1 - tokens / base_tokens:>12.1%}")
+
+if __name__ == "__main__":
+    main()
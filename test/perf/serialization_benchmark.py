@@ -0,0 +1,63 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import json
+import time
+
+from perf_utils import authorization_rows, load_query_data_handler
+
+"""
+Benchmark query-data response serialization on a large authorization payload
+
+Compares the original json.dumps(body, default=str) path with each backend of the
+query-data serialization module, with NUMERIC values fetched as Decimal (psycopg2 default)
+and as text (NUMERIC_AS_STR typecaster), plus the MCP side parse of the resulting body
+"""
+
+def timed(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = fn()
+    return (time.perf_counter() - started) * 1000 / iterations, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query-data JSON serialization backends")
+    parser.add_argument("--rows", type=int, default=10000, help="Authorization rows in the payload (default: 10000)")
+    parser.add_argument("--iterations", type=int, default=10, help="Runs averaged per case (default: 10)")
+    args = parser.parse_args()
+
+    # Loading the handler puts the query-data directory on sys.path
+    load_query_data_handler()
+    import serialization
+
+    decimal_rows = authorization_rows(args.rows)
+    text_rows = [{**row, "amount": str(row["amount"])} for row in decimal_rows]
+
+    cases = [("json.dumps(default=str) [original]", "Decimal", lambda: json.dumps({"items": decimal_rows}, default=str))]
+    for name, dumps in serialization.SERIALIZERS.items():
+        cases.append((name, "Decimal", lambda dumps=dumps: dumps({"items": decimal_rows})))
+        cases.append((name, "text", lambda dumps=dumps: dumps({"items": text_rows})))
+
+    print(f"Serialize {args.rows} authorization rows (average of {args.iterations} runs)")
+    print(f"{'serializer':<38} {'NUMERIC':>8} {'ms':>9} {'bytes':>10}")
+    baseline_ms = None
+    body = None
+    for name, numeric, fn in cases:
+        elapsed_ms, body = timed(fn, args.iterations)
+        baseline_ms = baseline_ms or elapsed_ms
+        print(f"{name:<38} {numeric:>8} {elapsed_ms:>9.2f} {len(body):>10}  ({baseline_ms / elapsed_ms:.1f}x)")
+
+    print(f"\nParse the {len(body)} byte body in the MCP server")
+    loaders = [("json.loads [response.json()]", json.loads)]
+    try:
+        import orjson
+        loaders.append(("orjson.loads", orjson.loads))
+    except ImportError:
+        print("orjson not installed, skipping orjson.loads")
+    for name, loads in loaders:
+        elapsed_ms, _ = timed(lambda: loads(body), args.iterations)
+        print(f"{name:<38} {elapsed_ms:>18.2f}")
+
+if __name__ == "__main__":
+    main()
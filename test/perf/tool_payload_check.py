@@ -0,0 +1,125 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import sys
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+from agent_overhead_benchmark import CONTAINERS_PATH, MERCHANT_NUMBER, start_stub_query_data
+from perf_utils import authorization_rows, load_query_data_handler
+
+"""
+Check that the transaction MCP tools send payloads the query-data routes accept
+
+Serves a local data API that parses every request with the real query-data route
+(ROUTES[path].parse) and builds the response with run_route over a cursor returning
+synthetic rows, then calls the transaction MCP server's tools in-process against it. A
+payload the route rejects comes back as the tool's error, a projection or format the
+route ignores as rows with the wrong shape. Needs the MCP server and query-data
+dependencies, no AWS access or database:
+
+    python tool_payload_check.py
+"""
+
+query_data = load_query_data_handler()
+
+class RowsCursor:
+    """DB-API cursor answering every SELECT with synthetic rows of the selected columns"""
+    def __init__(self):
+        self.description = None
+        self.rows = []
+
+    def execute(self, query, values=None):
+        columns, table = re.search(r"SELECT\s+(.*?)\s+FROM\s+(\w+)", query, re.DOTALL).groups()
+        columns = query_data.TRANSACTION_COLUMNS[table] if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        rows = [{**{column: f"{column}-{i}" for column in columns}, **row} for i, row in enumerate(authorization_rows(3, MERCHANT_NUMBER))]
+        self.description = [(column,) for column in columns]
+        self.rows = [tuple(row[column] for column in columns) for row in rows]
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+class RoutedQueryData(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        route = query_data.ROUTES.get(url.path.lower())
+        try:
+            response = query_data.run_route(route, RowsCursor(), route.parse(params))
+        except query_data.RequestError as e:
+            response = query_data.create_response(e.status_code, {"error": e.message})
+        body = response["body"].encode()
+        self.send_response(response["statusCode"])
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# (tool, arguments, expected columns of the returned rows, None for every column)
+TOOL_CALLS = [
+    ("filter_transactions", {"field": "approval_status", "value": "Declined"}, None),
+    ("filter_transactions", {"field": "transaction_status", "value": "Settled", "table": "settlements"}, None),
+    ("filter_transactions", {"field": "payment_method", "value": "EMV", "fields": ["amount", "transaction_datetime"]}, ["amount", "transaction_datetime"]),
+    ("filter_transactions", {"field": "currency", "value": "USD", "fields": ["amount", "currency"], "response_format": "columnar"}, ["amount", "currency"])
+]
+
+def returned_columns(items) -> list:
+    if isinstance(items, dict):
+        return items["columns"]
+    return list(items[0]) if items else []
+
+async def check_tools(data_port: int) -> list:
+    os.environ.update({"API_GATEWAY_BASE_URL": f"http://127.0.0.1:{data_port}", "QUERY_DATA_BACKEND": "api", "API_KEY": ""})
+    sys.path.insert(0, os.path.join(CONTAINERS_PATH, "transaction_mcp"))
+    import handler
+    from fastmcp import Client
+
+    logging.disable(logging.INFO)
+    failures = []
+    async with Client(handler.mcp_server) as client:
+        for name, arguments, expected in TOOL_CALLS:
+            call = await client.call_tool(name, arguments, raise_on_error=False)
+            if call.is_error:
+                failures.append(f"{name}({arguments}): {call.content[0].text if call.content else 'tool error'}")
+                continue
+            result = call.structured_content or {}
+            if "error" in result:
+                failures.append(f"{name}({arguments}): {result.get('status_code', '')} {result['error']}")
+                continue
+            columns = returned_columns(result["items"])
+            if expected is not None and columns != expected:
+                failures.append(f"{name}({arguments}): returned columns {columns}, expected {expected}")
+            if arguments.get("response_format") == "columnar" and result.get("format") != "columnar":
+                failures.append(f"{name}({arguments}): response is not columnar")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-trip the transaction MCP tool payloads through the query-data routes")
+    parser.add_argument("--port", type=int, default=8797, help="Port of the local data API (default: 8797)")
+    args = parser.parse_args()
+
+    data_api = start_stub_query_data(args.port, RoutedQueryData)
+    try:
+        failures = asyncio.run(check_tools(args.port))
+    finally:
+        data_api.shutdown()
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: {len(TOOL_CALLS)} tool calls accepted by their query-data routes")
+
+if __name__ == "__main__":
+    main()
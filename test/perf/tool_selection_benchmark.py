@@ -0,0 +1,161 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from perf_utils import REPO_ROOT, estimate_tokens
+
+"""
+Measure the prompt tokens saved by sub-agent tool selection
+
+Every tool a sub-agent is given is sent with its description and input schema on every
+model turn. For each query of test/fut/mcp-test-cases.json, this reports the estimated
+tokens of the tool specs the sub-agent gets with all the MCP server's tools, with its
+action group's allowlist, and with the allowlist cut down to the top-k tools ranked by
+app/lambdas/strands-agent-mcp/tool_selection.py, and how many test cases still get the
+tools they need (CASE_TOOLS, or the tools a listing case expects) with each selection. The tool specs come from the merchant
+and transaction MCP servers, listed in-memory (one worker process per server, as both
+import a `handler` module), so no deployment is needed:
+
+    python tool_selection_benchmark.py
+    python tool_selection_benchmark.py --top-k 3
+"""
+
+CONTAINERS_PATH = os.path.join(REPO_ROOT, "app", "containers")
+STRANDS_AGENT_PATH = os.path.join(REPO_ROOT, "app", "lambdas", "strands-agent-mcp")
+TEST_CASES_PATH = os.path.join(REPO_ROOT, "test", "fut", "mcp-test-cases.json")
+
+# MCP server and action groups of each test case apiPath, the internet agent's servers are third-party
+CASE_ACTION_GROUPS = {
+    "merchant_agent": ("merchant_mcp", ["merchant_portfolio_agent", "merchant_stats_agent"]),
+    "merchant_portfolio_agent": ("merchant_mcp", ["merchant_portfolio_agent"]),
+    "merchant_stats_agent": ("merchant_mcp", ["merchant_stats_agent"]),
+    "transaction_agent": ("transaction_mcp", ["transaction_agent"])
+}
+
+# Tool each test case needs, test cases listing tools need the tools named in their expected response
+CASE_TOOLS = {
+    "Get merchant stats MRCH2885": ["get_merchant_stats"],
+    "Filter Merchant Stats MRCH2885": ["filter_merchant_stats"],
+    "Search Merchant with given fields": ["search_merchants"],
+    "Get merchant details by merchant number MRCH2885": ["get_merchant_details"],
+    "Filter merchant by merchant number MRCH2885 and business name": ["filter_data"],
+    "Get recent chargebacks for merchant MRCH2885": ["get_recent_chargebacks"],
+    "Get refund summary for merchant number MRCH2885": ["get_refund_summary"],
+    "Get authorization transaction id 1": ["get_authorization_transaction_by_id"],
+    "Get settlement transaction id 1": ["get_settlement_transaction_by_id"],
+    "Get authorization transaction deatils by merchant number MRCH2885": ["get_transactions_by_merchant"],
+    "Filter transactions by field and value": ["filter_transactions"],
+    "Get recent authorization transactions for merchant number MRCH2885": ["get_recent_transactions"],
+    "Get recent settlement transactions for merchant number MRCH2885": ["get_recent_transactions"],
+    "Get decline analysis for merchant number MRCH2885": ["get_decline_analysis"]
+}
+
+async def list_tool_specs(server: str) -> list:
+    """Tool specs of the MCP server as the strands agent sends them to the model"""
+    sys.path.insert(0, os.path.join(CONTAINERS_PATH, server))
+    import handler
+    from fastmcp import Client
+
+    async with Client(handler.mcp_server) as client:
+        tools = await client.list_tools()
+    return [{"name": tool.name, "description": tool.description, "inputSchema": {"json": tool.inputSchema}} for tool in tools]
+
+def server_tool_specs(server: str, environment: dict = None) -> list:
+    """Tool specs of the MCP server, listed by a worker process with `environment` set"""
+    # Listing tools doesn't call the data API, any base URL will do
+    env = {"API_GATEWAY_BASE_URL": "http://localhost", **os.environ, **(environment or {})}
+    worker = subprocess.run([sys.executable, __file__, "--worker", server], env=env, capture_output=True, text=True, check=True)
+    return json.loads(worker.stdout.strip().splitlines()[-1])
+
+def load_tool_selection(top_k: int):
+    """Import app/lambdas/strands-agent-mcp/tool_selection.py without the agent's dependencies"""
+    os.environ["AGENT_TOOL_TOP_K"] = str(top_k)
+    spec = importlib.util.spec_from_file_location("tool_selection", os.path.join(STRANDS_AGENT_PATH, "tool_selection.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def case_query(case: dict) -> str:
+    payload = case["request_payload"]
+    for parameter in payload.get("parameters", []):
+        if parameter.get("name") == "query":
+            return parameter["value"]
+    return payload.get("inputText", "")
+
+def needed_tools(case: dict, tools: list) -> set:
+    """Tools of the server the test case needs, empty when its MCP server has none of them"""
+    expected = json.dumps(case.get("expected_response_contains") or {})
+    names = {tool.tool_spec["name"] for tool in tools}
+    listed = {name for name in names if name in expected}
+    return listed or names & set(CASE_TOOLS.get(case["name"], []))
+
+def spec_tokens(tools: list) -> int:
+    return sum(estimate_tokens(json.dumps(tool.tool_spec)) for tool in tools)
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate tool spec tokens per sub-agent turn with and without tool selection")
+    parser.add_argument("--top-k", type=int, default=4, help="Tools kept by the relevance ranker (default: 4)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(list_tool_specs(args.worker))))
+        return
+
+    tool_selection = load_tool_selection(args.top_k)
+    with open(TEST_CASES_PATH) as f:
+        cases = json.load(f)["test_cases"]
+
+    server_tools = {}
+    for server in sorted({server for server, _ in CASE_ACTION_GROUPS.values()}):
+        server_tools[server] = [SimpleNamespace(tool_spec=spec) for spec in server_tool_specs(server)]
+
+    totals = {"all": 0, "allowlist": 0, "top_k": 0}
+    # Test cases whose needed tools all reach one of their action groups, per selection
+    kept = {"allowlist": 0, "top_k": 0}
+    scored_cases = 0
+    print(f"Estimated tool spec tokens per model turn, top-k {args.top_k}")
+    print(f"{'action group':<26} {'all':>6} {'allow':>6} {'top-k':>6}  query -> tools")
+    for case in cases:
+        operation = case["request_payload"].get("apiPath", "")
+        if operation not in CASE_ACTION_GROUPS:
+            continue
+        server, action_groups = CASE_ACTION_GROUPS[operation]
+        query = case_query(case)
+        tools = server_tools[server]
+        needed = needed_tools(case, tools)
+        given = {"allowlist": set(), "top_k": set()}
+        for action_group in action_groups:
+            allowed = tool_selection.allowed_tools(action_group, tools)
+            selected = tool_selection.select_tools(action_group, query, tools)
+            counts = {"all": spec_tokens(tools), "allowlist": spec_tokens(allowed), "top_k": spec_tokens(selected)}
+            for name, count in counts.items():
+                totals[name] += count
+            given["allowlist"].update(tool.tool_spec["name"] for tool in allowed)
+            given["top_k"].update(tool.tool_spec["name"] for tool in selected)
+            names = ", ".join(tool.tool_spec["name"] for tool in selected)
+            print(f"{action_group:<26} {counts['all']:>6} {counts['allowlist']:>6} {counts['top_k']:>6}  {query} -> {names}")
+        if not needed:
+            print(f"{'':<26} {'':>20}  needed tool not on {server}, not scored")
+            continue
+        scored_cases += 1
+        for name in kept:
+            if needed <= given[name]:
+                kept[name] += 1
+            else:
+                print(f"{'':<26} {'':>20}  {name} drops needed {', '.join(sorted(needed - given[name]))}")
+
+    print(f"{'total':<26} {totals['all']:>6} {totals['allowlist']:>6} {totals['top_k']:>6}")
+    for name in ("allowlist", "top_k"):
+        print(f"{name}: {1 - totals[name] / totals['all']:.0%} fewer tool spec tokens than all tools, needed tools kept in {kept[name]}/{scored_cases} test cases")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import json
+from types import SimpleNamespace
+
+from perf_utils import estimate_tokens
+from tool_selection_benchmark import load_tool_selection, server_tool_specs
+
+"""
+Count the tokens of every MCP tool spec and the tool overhead of each sub-agent
+
+Every model turn of a sub-agent resends the name, description and input schema of each
+tool it was given. This lists the merchant and transaction MCP servers' tools in-memory,
+once per TOOL_DESCRIPTION_STYLE, and reports the estimated tokens of each tool's
+description and input schema, then the total tool-spec tokens per model turn of every
+action group (after its allowlist in app/lambdas/strands-agent-mcp/tool_selection.py,
+before query ranking):
+
+    python tool_spec_tokens.py
+    python tool_spec_tokens.py --styles compact --json
+"""
+
+SERVERS = ("merchant_mcp", "transaction_mcp")
+# MCP server of each action group, the internet agent's servers are third-party
+ACTION_GROUP_SERVERS = {
+    "merchant_portfolio_agent": "merchant_mcp",
+    "merchant_stats_agent": "merchant_mcp",
+    "transaction_agent": "transaction_mcp"
+}
+
+def spec_tokens(spec: dict) -> dict:
+    description = estimate_tokens(spec["description"] or "")
+    schema = estimate_tokens(json.dumps(spec["inputSchema"]))
+    return {"description": description, "schema": schema, "total": estimate_tokens(json.dumps(spec))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate the tokens of MCP tool specs per tool and per sub-agent")
+    parser.add_argument("--styles", nargs="+", default=["verbose", "compact"], help="TOOL_DESCRIPTION_STYLE values to compare (default: verbose compact)")
+    parser.add_argument("--json", action="store_true", help="Print the counts as JSON")
+    args = parser.parse_args()
+
+    tool_selection = load_tool_selection(0)
+    # style -> server -> tool name -> token counts
+    counts = {
+        style: {
+            server: {spec["name"]: spec_tokens(spec) for spec in server_tool_specs(server, {"TOOL_DESCRIPTION_STYLE": style})}
+            for server in SERVERS
+        }
+        for style in args.styles
+    }
+    action_groups = {
+        style: {
+            action_group: sum(
+                counts[style][server][tool.tool_spec["name"]]["total"]
+                for tool in tool_selection.allowed_tools(action_group, [SimpleNamespace(tool_spec={"name": name}) for name in counts[style][server]])
+            )
+            for action_group, server in ACTION_GROUP_SERVERS.items()
+        }
+        for style in args.styles
+    }
+
+    if args.json:
+        print(json.dumps({"tools": counts, "action_groups": action_groups}, indent=2))
+        return
+
+    print("Estimated tokens per tool spec (description / input schema / total)")
+    print(f"{'tool':<38}" + "".join(f"{style:>22}" for style in args.styles))
+    for server in SERVERS:
+        for name in counts[args.styles[0]][server]:
+            cells = "".join(
+                f"{'{description} / {schema} / {total}'.format(**counts[style][server][name]):>22}"
+                for style in args.styles
+            )
+            print(f"{name:<38}{cells}")
+
+    print("\nEstimated tool-spec tokens per model turn")
+    print(f"{'action group':<38}" + "".join(f"{style:>22}" for style in args.styles))
+    for action_group in ACTION_GROUP_SERVERS:
+        print(f"{action_group:<38}" + "".join(f"{action_groups[style][action_group]:>22}" for style in args.styles))
+
+if __name__ == "__main__":
+    main()
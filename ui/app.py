@@ -60,6 +60,7 @@ if len(st.session_state.items()) == 0:
 with st.sidebar:
     if st.button("Reset Session"):
         init_session_state()
+    bypass_cache = st.checkbox("Fresh data", help="Skip cached support agent answers and always query the latest data")
 
 # Messages in the conversation
 for message in st.session_state.messages:
@@ -73,83 +74,86 @@ if prompt := st.chat_input():
         st.write(prompt)
 
     with st.chat_message("assistant"):
-        with st.empty():
-            with st.spinner():
-                response = bedrock_agent_runtime.invoke_agent(
-                    agent_id,
-                    agent_alias_id,
-                    st.session_state.session_id,
-                    prompt
-                )
-            output_text = response["output_text"]
-
-            # An agent that uses Titan as the FM and has knowledge bases attached may return a JSON object with the
-            # instruction and result fields
-            st.session_state.titan_citation_style = False
-            try:
-                # When parsing the JSON, strict mode must be disabled to handle badly escaped newlines
-                output_json = json.loads(output_text, strict=False)
-                if "instruction" in output_json and "result" in output_json:
-                    output_text = output_json["result"]
-                    st.session_state.titan_citation_style = "%[X]%" in output_json["instruction"]
-            except json.JSONDecodeError as e:
-                pass
-
-            # Add citations
-            if len(response["citations"]) > 0:
-                citation_nums = []
-
-                # Citations in response from agents that use Titan as the FM may be out sequence
-                # Thus we need to renumber them
-                def replace_citation(match):
-                    global citation_nums
-                    orig_citation_num = match.group(1)
-                    citation_nums.append(orig_citation_num)
-                    return f"<sup>[{orig_citation_num}]</sup>"
-
-                if st.session_state.titan_citation_style:
-                    output_text = re.sub(r"%\[(\d+)\]%", replace_citation, output_text)
-
-                i = 0
-                citation_locs = {}
-                for citation in response["citations"]:
-                    for retrieved_ref in citation["retrievedReferences"]:
-                        citation_num = i + 1
-                        if st.session_state.titan_citation_style:
-                            citation_num = citation_nums[i]
-                        if citation_num not in citation_locs.keys():
-                            citation_marker = f"[{citation_num}]"
-                            match retrieved_ref['location']['type']:
-                                case 'CONFLUENCE':
-                                    citation_locs[citation_num] = f"{retrieved_ref['location']['confluenceLocation']['url']}"
-                                case 'CUSTOM':
-                                    citation_locs[citation_num] = f"{retrieved_ref['location']['customDocumentLocation']['id']}"
-                                case 'KENDRA':
-                                    citation_locs[citation_num] = f"{retrieved_ref['location']['kendraDocumentLocation']['uri']}"
-                                case 'S3':
-                                    citation_locs[citation_num] = f"{retrieved_ref['location']['s3Location']['uri']}"
-                                case 'SALESFORCE':
-                                    citation_locs[citation_num] = f"{retrieved_ref['location']['salesforceLocation']['url']}"
-                                case 'SHAREPOINT':
-                                    citation_locs[citation_num] = f"{retrieved_ref['location']['sharePointLocation']['url']}"
-                                case 'SQL':
-                                    citation_locs[citation_num] = f"{retrieved_ref['location']['sqlLocation']['query']}"
-                                case 'WEB':
-                                    citation_locs[citation_num] = f"{retrieved_ref['location']['webLocation']['url']}"
-                                case _:
-                                    logger.warning(f"Unknown location type: {retrieved_ref['location']['type']}")
-                        i += 1
-                citation_locs = dict(sorted(citation_locs.items(), key=lambda item: int(item[0])))
-                st.session_state.citation_nums = citation_nums
-
-                output_text += "\n"
-                for citation_num, citation_loc in citation_locs.items():
-                    output_text += f"\n<br>[{citation_num}] {citation_loc}"
-
-            st.session_state.messages.append({"role": "assistant", "content": output_text})
-            st.session_state.citations = response["citations"]
-            st.session_state.trace = response["trace"]
-            st.markdown(output_text, unsafe_allow_html=True)
+        # The final response renders as it streams in, replaced by the formatted text once complete
+        placeholder = st.empty()
+        with st.spinner():
+            response = bedrock_agent_runtime.invoke_agent(
+                agent_id,
+                agent_alias_id,
+                st.session_state.session_id,
+                prompt,
+                bypass_cache,
+                on_text=lambda text: placeholder.markdown(text, unsafe_allow_html=True)
+            )
+        output_text = response["output_text"]
+
+        # An agent that uses Titan as the FM and has knowledge bases attached may return a JSON object with the
+        # instruction and result fields
+        st.session_state.titan_citation_style = False
+        try:
+            # When parsing the JSON, strict mode must be disabled to handle badly escaped newlines
+            output_json = json.loads(output_text, strict=False)
+            if "instruction" in output_json and "result" in output_json:
+                output_text = output_json["result"]
+                st.session_state.titan_citation_style = "%[X]%" in output_json["instruction"]
+        except json.JSONDecodeError as e:
+            pass
+
+        # Add citations
+        if len(response["citations"]) > 0:
+            citation_nums = []
+
+            # Citations in response from agents that use Titan as the FM may be out sequence
+            # Thus we need to renumber them
+            def replace_citation(match):
+                global citation_nums
+                orig_citation_num = match.group(1)
+                citation_nums.append(orig_citation_num)
+                return f"<sup>[{orig_citation_num}]</sup>"
+
+            if st.session_state.titan_citation_style:
+                output_text = re.sub(r"%\[(\d+)\]%", replace_citation, output_text)
+
+            i = 0
+            citation_locs = {}
+            for citation in response["citations"]:
+                for retrieved_ref in citation["retrievedReferences"]:
+                    citation_num = i + 1
+                    if st.session_state.titan_citation_style:
+                        citation_num = citation_nums[i]
+                    if citation_num not in citation_locs.keys():
+                        citation_marker = f"[{citation_num}]"
+                        match retrieved_ref['location']['type']:
+                            case 'CONFLUENCE':
+                                citation_locs[citation_num] = f"{retrieved_ref['location']['confluenceLocation']['url']}"
+                            case 'CUSTOM':
+                                citation_locs[citation_num] = f"{retrieved_ref['location']['customDocumentLocation']['id']}"
+                            case 'KENDRA':
+                                citation_locs[citation_num] = f"{retrieved_ref['location']['kendraDocumentLocation']['uri']}"
+                            case 'S3':
+                                citation_locs[citation_num] = f"{retrieved_ref['location']['s3Location']['uri']}"
+                            case 'SALESFORCE':
+                                citation_locs[citation_num] = f"{retrieved_ref['location']['salesforceLocation']['url']}"
+                            case 'SHAREPOINT':
+                                citation_locs[citation_num] = f"{retrieved_ref['location']['sharePointLocation']['url']}"
+                            case 'SQL':
+                                citation_locs[citation_num] = f"{retrieved_ref['location']['sqlLocation']['query']}"
+                            case 'WEB':
+                                citation_locs[citation_num] = f"{retrieved_ref['location']['webLocation']['url']}"
+                            case _:
+                                logger.warning(f"Unknown location type: {retrieved_ref['location']['type']}")
+                    i += 1
+            citation_locs = dict(sorted(citation_locs.items(), key=lambda item: int(item[0])))
+            st.session_state.citation_nums = citation_nums
+
+            output_text += "\n"
+            for citation_num, citation_loc in citation_locs.items():
+                output_text += f"\n<br>[{citation_num}] {citation_loc}"
+
+        st.session_state.messages.append({"role": "assistant", "content": output_text})
+        st.session_state.citations = response["citations"]
+        st.session_state.trace = response["trace"]
+        placeholder.markdown(output_text, unsafe_allow_html=True)
 
 trace_types_map = {
     "Pre-Processing": ["preGuardrailTrace", "preProcessingTrace"],
@@ -8,7 +8,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def invoke_agent(agent_id, agent_alias_id, session_id, prompt):
+def invoke_agent(agent_id, agent_alias_id, session_id, prompt, bypass_cache=False, on_text=None):
+    """
+    Invoke the agent and collect its answer, citations and trace
+
+    The final response streams back in chunks; on_text, when given, is called with the text
+    received so far after every chunk.
+    """
     try:
         sts = boto3.client('sts')
         try:
@@ -23,7 +29,10 @@ def invoke_agent(agent_id, agent_alias_id, session_id, prompt):
             agentAliasId=agent_alias_id,
             enableTrace=True,
             sessionId=session_id,
-            inputText=prompt
+            inputText=prompt,
+            # Read by the support agents, which then skip their response cache
+            sessionState={"sessionAttributes": {"bypass_cache": "true" if bypass_cache else "false"}},
+            streamingConfigurations={"streamFinalResponse": True}
         )
 
         output_text = ""
@@ -36,6 +45,8 @@ def invoke_agent(agent_id, agent_alias_id, session_id, prompt):
             if "chunk" in event:
                 chunk = event["chunk"]
                 output_text += chunk["bytes"].decode()
+                if on_text:
+                    on_text(output_text)
                 if "attribution" in chunk:
                     citations += chunk["attribution"]["citations"]
 